@@ -0,0 +1,4 @@
+# Load .env once for the whole package; modules read settings at import
+from dotenv import load_dotenv
+
+load_dotenv()
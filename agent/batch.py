@@ -0,0 +1,137 @@
+"""Run many inputs through the compiled graph with bounded concurrency.
+
+Re-processing, evaluations and migrations push hundreds of messages through
+the graph at once. `arun_batch` runs them with at most `concurrency` graph
+runs in flight and yields each result as soon as it finishes (not in input
+order). A failing item is reported in its own `BatchResult` and does not stop
+the rest of the batch.
+
+Inputs are pulled lazily from the iterable, so generators of any size work
+without materializing the whole batch.
+
+    async for result in arun_batch(graph, inputs, concurrency=16):
+        print(result.index, result.ok, result.error)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterable, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+
+from agent.llm_scheduler import Priority, llm_priority
+
+DEFAULT_CONCURRENCY = 8
+
+
+@dataclass
+class BatchResult:
+    index: int
+    ok: bool
+    output: Optional[dict] = None
+    error: Optional[str] = None
+    elapsed_ms: float = 0.0
+
+
+def user_message_input(content: str) -> dict:
+    """Graph input for a single user message."""
+    return {
+        "messages": [{"role": "user", "content": content}],
+        "classification_decision": None,
+        "email_input": None,
+    }
+
+
+async def _run_one(
+    graph,
+    index: int,
+    item: Tuple[dict, Optional[RunnableConfig]],
+    timeout: Optional[float],
+    priority: Priority,
+) -> BatchResult:
+    inputs, config = item
+    start = time.perf_counter()
+    try:
+        with llm_priority(priority):
+            output = await asyncio.wait_for(
+                graph.ainvoke(inputs, config), timeout=timeout
+            )
+    except asyncio.TimeoutError:
+        error = f"timed out after {timeout}s"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    else:
+        return BatchResult(
+            index, True, output=output, elapsed_ms=(time.perf_counter() - start) * 1000
+        )
+    return BatchResult(
+        index, False, error=error, elapsed_ms=(time.perf_counter() - start) * 1000
+    )
+
+
+async def arun_batch(
+    graph,
+    items: Iterable[Any],
+    *,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    config: Optional[RunnableConfig] = None,
+    timeout: Optional[float] = None,
+    priority: Priority = Priority.BATCH,
+) -> AsyncIterator[BatchResult]:
+    """Run `items` through `graph`, yielding results in completion order.
+
+    Each item is either a graph input dict, used with `config`, or an
+    `(input, config)` pair for per-item settings such as `thread_id`.
+    `timeout` bounds each graph run in seconds. Model calls are scheduled at
+    `priority`, behind interactive traffic by default.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    pending = enumerate(items)
+    results: asyncio.Queue = asyncio.Queue()
+
+    def _next() -> Optional[Tuple[int, Tuple[dict, Optional[RunnableConfig]]]]:
+        try:
+            index, item = next(pending)
+        except StopIteration:
+            return None
+        if isinstance(item, tuple):
+            return index, item
+        return index, (item, config)
+
+    async def worker() -> None:
+        # Workers share the iterator, so at most `concurrency` runs are in flight
+        while (entry := _next()) is not None:
+            result = await _run_one(graph, entry[0], entry[1], timeout, priority)
+            await results.put(result)
+
+    async def supervise() -> None:
+        try:
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        finally:
+            await results.put(None)
+
+    supervisor = asyncio.create_task(supervise())
+    try:
+        while (result := await results.get()) is not None:
+            yield result
+        await supervisor
+    finally:
+        # The consumer stopped early (e.g. client disconnected): stop the runs
+        supervisor.cancel()
+
+
+def run_batch(graph, items: Iterable[Any], **kwargs: Any) -> List[BatchResult]:
+    """Blocking wrapper around `arun_batch`; results are in input order."""
+
+    async def collect() -> List[BatchResult]:
+        return [result async for result in arun_batch(graph, items, **kwargs)]
+
+    return sorted(asyncio.run(collect()), key=lambda result: result.index)
+
+
+__all__ = ["BatchResult", "arun_batch", "run_batch", "user_message_input"]
@@ -0,0 +1,255 @@
+"""Cache of router decisions keyed on a normalized user message.
+
+The same handful of phrasings ("show me my applications", "update my X
+application") make up most traffic, so `classifier_router` caches the
+`RouterSchema` classification instead of asking `llm_router` every time.
+
+Two backends are provided:
+- InMemoryClassificationCache: bounded LRU with TTL, per process
+- MongoClassificationCache: shared collection with a TTL index, for
+  multi-worker deployments. It goes through the app's shared Motor client
+  (`backend.db.db`), so it uses the per-worker pool and settings and never
+  blocks the event loop. Its TTL index is created by `init_indexes`.
+
+Env vars used:
+- CLASSIFIER_CACHE_BACKEND: "memory" (default), "mongo" or "none"
+- CLASSIFIER_CACHE_MAXSIZE: max entries for the memory backend (default 4096)
+- CLASSIFIER_CACHE_TTL_SECONDS: entry lifetime (default 86400)
+- CLASSIFIER_CACHE_COLLECTION: collection name for the mongo backend
+  (default "classifier_cache")
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import string
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+COMPANY_PLACEHOLDER = "<company>"
+
+# "... to Google ...", "my Stripe application", "at Jane Street for ..."
+_COMPANY_CONTEXT_RE = re.compile(
+    r"\b(my|to|at|from|with|for)\s+([a-z0-9][\w&.-]*(?:\s+[a-z0-9][\w&.-]*)?)\s+"
+    r"(application|app|role|position|job|interview|offer|internship)\b"
+)
+# "applied to Jane Street", "an offer from stripe", "interviewing at Google":
+# a run of capitalized words, or one lower-case word, after the slot
+_COMPANY_SLOT_RE = re.compile(
+    r"(?i:\b(applied|apply(?:ing)?|applications?|interview(?:s|ing)?|offers?"
+    r"|rejected|heard back)\s+(to|at|with|from|for|by)\s+)"
+    r"([A-Z][\w&.-]*(?:\s+[A-Z][\w&.-]*)*|[a-z0-9][\w&.-]*)"
+)
+_STOPWORDS = frozenset({"a", "an", "the", "this", "that", "my", "new", "current"})
+_PUNCT_TABLE = str.maketrans({c: " " for c in string.punctuation if c not in "<>"})
+_WS_RE = re.compile(r"\s+")
+
+
+def _mask_slot(match: re.Match) -> str:
+    if match.group(3).split()[0].lower() in _STOPWORDS:
+        return match.group(0)
+    return f"{match.group(1)} {match.group(2)} {COMPANY_PLACEHOLDER}"
+
+
+def _mask_context(match: re.Match) -> str:
+    name = match.group(2)
+    if name.split()[0] in _STOPWORDS:
+        return match.group(0)
+    return f"{match.group(1)} {COMPANY_PLACEHOLDER} {match.group(3)}"
+
+
+def normalize_message(text: str) -> str:
+    """Fold case, punctuation and whitespace and mask company names.
+
+    Only names in a company slot are masked ("applied to Stripe", "my stripe
+    application"). Other words are kept even when capitalized: "Resume" or
+    "LeetCode" may be what decides the route.
+    """
+    masked = _COMPANY_SLOT_RE.sub(_mask_slot, text.strip())
+    folded = masked.lower().translate(_PUNCT_TABLE)
+    folded = _WS_RE.sub(" ", folded).strip()
+    return _COMPANY_CONTEXT_RE.sub(_mask_context, folded)
+
+
+class CacheStats:
+    """Thread-safe hit/miss counters."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def record_eviction(self, expired: bool = False) -> None:
+        with self._lock:
+            if expired:
+                self.expirations += 1
+            else:
+                self.evictions += 1
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hit_rate,
+            }
+
+
+class ClassificationCache(ABC):
+    """Maps normalized messages to a classification label."""
+
+    def __init__(self) -> None:
+        self.stats = CacheStats()
+
+    @staticmethod
+    def key_for(message: str) -> str:
+        return normalize_message(message)
+
+    def get(self, message: str) -> Optional[str]:
+        value = self._get(self.key_for(message))
+        self.stats.record(value is not None)
+        return value
+
+    def set(self, message: str, classification: str) -> None:
+        self._set(self.key_for(message), classification)
+
+    async def aget(self, message: str) -> Optional[str]:
+        return self.get(message)
+
+    async def aset(self, message: str, classification: str) -> None:
+        self.set(message, classification)
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[str]: ...
+
+    @abstractmethod
+    def _set(self, key: str, classification: str) -> None: ...
+
+    def clear(self) -> None:
+        """Drop all entries (optional for shared backends)."""
+
+
+class InMemoryClassificationCache(ClassificationCache):
+    """Bounded LRU cache with per-entry TTL."""
+
+    def __init__(self, maxsize: int = 4096, ttl_seconds: float = 86400.0):
+        super().__init__()
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.stats.record_eviction(expired=True)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def _set(self, key: str, classification: str) -> None:
+        with self._lock:
+            self._data[key] = (classification, time.monotonic() + self.ttl_seconds)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats.record_eviction()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class MongoClassificationCache(ClassificationCache):
+    """Shared cache stored in a Mongo collection.
+
+    Size is bounded by a TTL index on `expires_at`; reads also check the
+    expiry since the TTL monitor only runs about once a minute. Motor is
+    async-only, so sync callers (`graph.invoke` in scripts) skip the shared
+    cache and always miss.
+    """
+
+    def __init__(self, collection_name: str = "classifier_cache", ttl_seconds: float = 86400.0):
+        super().__init__()
+        self.collection_name = collection_name
+        self.ttl_seconds = ttl_seconds
+
+    def _collection(self):
+        from backend.db.db import get_collection
+
+        return get_collection(self.collection_name)
+
+    def _get(self, key: str) -> Optional[str]:
+        return None
+
+    def _set(self, key: str, classification: str) -> None:
+        pass
+
+    async def aget(self, message: str) -> Optional[str]:
+        doc = await self._collection().find_one(
+            {
+                "_id": self.key_for(message),
+                "expires_at": {"$gt": datetime.now(timezone.utc)},
+            },
+            {"classification": 1},
+        )
+        self.stats.record(doc is not None)
+        return doc["classification"] if doc else None
+
+    async def aset(self, message: str, classification: str) -> None:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        await self._collection().update_one(
+            {"_id": self.key_for(message)},
+            {"$set": {"classification": classification, "expires_at": expires_at}},
+            upsert=True,
+        )
+
+    async def aclear(self) -> None:
+        await self._collection().delete_many({})
+
+
+def build_classifier_cache() -> Optional[ClassificationCache]:
+    """Create the cache configured through environment variables."""
+    backend = os.getenv("CLASSIFIER_CACHE_BACKEND", "memory").strip().lower()
+    ttl_seconds = float(os.getenv("CLASSIFIER_CACHE_TTL_SECONDS", "86400"))
+
+    if backend in ("", "none", "off"):
+        return None
+    if backend == "memory":
+        maxsize = int(os.getenv("CLASSIFIER_CACHE_MAXSIZE", "4096"))
+        return InMemoryClassificationCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+    if backend == "mongo":
+        return MongoClassificationCache(
+            os.getenv("CLASSIFIER_CACHE_COLLECTION", "classifier_cache"),
+            ttl_seconds=ttl_seconds,
+        )
+    raise ValueError(f"Unknown CLASSIFIER_CACHE_BACKEND: {backend}")
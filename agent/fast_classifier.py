@@ -0,0 +1,367 @@
+"""Local, CPU-only pre-classifier for the router.
+
+Most routing decisions are obvious ("I applied to Stripe today", "show me my
+applications"), so paying a gpt-4.1 round trip for them is wasteful. This
+module answers those messages locally and only defers to `llm_router` when it
+is not confident enough:
+
+- A small multinomial logistic regression over hashed word n-grams, trained
+  in-process on a seed corpus the first time it is needed.
+- Keyword/regex rules for telling phrasings. A rule does not decide on its
+  own: a match adds a feature, and training learns how much it counts. So
+  "I sent my resume to Stripe via LinkedIn" is an application, not a resume
+  question, even though it mentions a resume.
+- The confidence threshold is derived from held-out data: the corpus is
+  cross-validated and the threshold is the lowest confidence at which
+  held-out predictions reach the target precision.
+
+Env vars used:
+- FAST_CLASSIFIER_ENABLED: "0"/"false" disables the fast path (default on)
+- FAST_CLASSIFIER_TARGET_PRECISION: held-out precision the derived threshold
+  must reach (default 0.97)
+- FAST_CLASSIFIER_THRESHOLD: fixed minimum confidence to skip the LLM,
+  instead of deriving it
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LABELS: Tuple[str, ...] = (
+    "application_tracking",
+    "interview_prep",
+    "calendar",
+    "resume_assistant",
+    "general",
+)
+
+# Rules are (name, label, pattern). A match adds the feature `rule:<name>`;
+# the label is the one the rule points at (reported as the decision source).
+_RULES: List[Tuple[str, str, re.Pattern]] = [
+    (
+        "application_command",
+        "application_tracking",
+        re.compile(
+            r"\b(i\s+(just\s+)?(applied|submitted)|log\s+(an?\s+|my\s+)?(new\s+)?application"
+            r"|show\s+(me\s+)?(all\s+)?my\s+(current\s+)?applications"
+            r"|(update|change|mark)\s+my\s+\w+(\s+\w+)?\s+application)\b"
+        ),
+    ),
+    (
+        # Sending something to a company, or naming where it was sent
+        "application_phrasing",
+        "application_tracking",
+        re.compile(
+            r"\b(sent|submitted|emailed|applied|uploaded)\b.*\b(to|at|for)\b"
+            r"|\b(via|through|on)\s+(linkedin|indeed|handshake|glassdoor|a\s+referral"
+            r"|referral|their\s+(website|careers?\s+page))\b"
+        ),
+    ),
+    (
+        "resume_words",
+        "resume_assistant",
+        re.compile(r"\b(resume|cv|cover\s+letter)s?\b"),
+    ),
+    (
+        "interview_prep",
+        "interview_prep",
+        re.compile(
+            r"\b(mock\s+interview|behavioral\s+questions?|leetcode"
+            r"|prepare\s+for\s+(an?\s+|my\s+)?(\w+\s+)?interview)\b"
+        ),
+    ),
+    (
+        "calendar",
+        "calendar",
+        re.compile(
+            r"\b(remind\s+me|schedule|reschedule|calendar"
+            r"|follow[\s-]?up\s+(call|email|reminder))\b"
+        ),
+    ),
+]
+
+# Small labelled corpus used to train the linear model on first use.
+_SEED_EXAMPLES: List[Tuple[str, str]] = [
+    ("I applied to Google for a software engineer role today via LinkedIn", "application_tracking"),
+    ("Applied to Databricks for a data intern role yesterday via referral", "application_tracking"),
+    ("Can you show me my current applications?", "application_tracking"),
+    ("What applications do I have in progress", "application_tracking"),
+    ("Update my Google application status to interviewing", "application_tracking"),
+    ("Mark the Stripe application as rejected", "application_tracking"),
+    ("I got an offer from Meta, update the status", "application_tracking"),
+    ("Log a new application to Netflix for a backend role", "application_tracking"),
+    ("How many jobs have I applied to so far", "application_tracking"),
+    ("Which companies have I applied to this month", "application_tracking"),
+    ("I submitted an application to Amazon on their website", "application_tracking"),
+    ("Delete my Microsoft application", "application_tracking"),
+    ("Sent my resume to Shopify through a referral today", "application_tracking"),
+    ("I emailed my CV to the Airbnb recruiter for the ML role", "application_tracking"),
+    ("Submitted my resume and cover letter to Notion on their website", "application_tracking"),
+    ("Uploaded my resume to the Figma careers page for a design role", "application_tracking"),
+    ("Airbnb rejected me, please record that", "application_tracking"),
+    ("List all my applications with status applied", "application_tracking"),
+    ("How do I prepare for a technical interview?", "interview_prep"),
+    ("Give me some common behavioral interview questions", "interview_prep"),
+    ("Can we do a mock interview for a system design round", "interview_prep"),
+    ("What should I study for a coding interview at Google", "interview_prep"),
+    ("How do I answer tell me about yourself", "interview_prep"),
+    ("Tips for a final round onsite interview", "interview_prep"),
+    ("What questions should I ask the interviewer", "interview_prep"),
+    ("Help me practice the STAR method for interviews", "interview_prep"),
+    ("I have a phone screen tomorrow, how should I prepare", "interview_prep"),
+    ("Can you help me schedule a follow-up call?", "calendar"),
+    ("Remind me to email the recruiter next Tuesday", "calendar"),
+    ("Put my Amazon interview on my calendar for Friday at 2pm", "calendar"),
+    ("Set a reminder to follow up with Stripe in a week", "calendar"),
+    ("When is my next interview scheduled", "calendar"),
+    ("Reschedule my call with the hiring manager to Monday", "calendar"),
+    ("What do I have coming up this week", "calendar"),
+    ("Block time tomorrow morning for applications", "calendar"),
+    ("I need help updating my resume", "resume_assistant"),
+    ("Can you tailor my resume for a data science role", "resume_assistant"),
+    ("Which resume version did I send to Google", "resume_assistant"),
+    ("Review my CV and suggest improvements", "resume_assistant"),
+    ("Write a cover letter for the Netflix position", "resume_assistant"),
+    ("Should my resume be one page", "resume_assistant"),
+    ("Add my new internship to my resume", "resume_assistant"),
+    ("Is my resume good enough to send to Google", "resume_assistant"),
+    ("How should I format the skills section of my CV", "resume_assistant"),
+    ("What's the best way to find remote jobs?", "general"),
+    ("How do I negotiate a higher salary", "general"),
+    ("Is it better to work at a startup or a big company", "general"),
+    ("How can I grow my network on LinkedIn", "general"),
+    ("What skills are in demand for software engineers", "general"),
+    ("I feel burned out from job hunting, any advice", "general"),
+    ("How long does it usually take to hear back from companies", "general"),
+    ("Should I switch careers into product management", "general"),
+    ("hello", "general"),
+    ("thanks!", "general"),
+]
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+_N_FEATURES = 1 << 18
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _matched_rules(text: str) -> List[Tuple[str, str]]:
+    """(name, label) of the rules matching `text`."""
+    lowered = text.lower()
+    return [(name, label) for name, label, pattern in _RULES if pattern.search(lowered)]
+
+
+def _featurize(text: str) -> Dict[int, float]:
+    """Hash unigrams, bigrams and matched rules into a fixed-size sparse vector."""
+    tokens = _tokenize(text)
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    grams += [f"rule:{name}" for name, _ in _matched_rules(text)]
+    features: Dict[int, float] = {}
+    for gram in grams:
+        index = zlib.crc32(gram.encode()) % _N_FEATURES
+        features[index] = features.get(index, 0.0) + 1.0
+    if not features:
+        return features
+    norm = math.sqrt(sum(v * v for v in features.values()))
+    return {k: v / norm for k, v in features.items()}
+
+
+def _softmax(scores: Sequence[float]) -> List[float]:
+    top = max(scores)
+    exps = [math.exp(s - top) for s in scores]
+    total = sum(exps)
+    return [e / total for e in exps]
+
+
+class HashedNgramModel:
+    """Multinomial logistic regression over hashed n-gram features."""
+
+    def __init__(self, labels: Sequence[str] = LABELS):
+        self.labels = tuple(labels)
+        self.weights: Dict[int, List[float]] = {}
+        self.bias: List[float] = [0.0] * len(self.labels)
+
+    def _scores(self, features: Dict[int, float]) -> List[float]:
+        scores = list(self.bias)
+        for index, value in features.items():
+            row = self.weights.get(index)
+            if row is None:
+                continue
+            for i, w in enumerate(row):
+                scores[i] += w * value
+        return scores
+
+    def fit(
+        self,
+        examples: Sequence[Tuple[str, str]],
+        *,
+        epochs: int = 30,
+        learning_rate: float = 0.5,
+        l2: float = 1e-4,
+    ) -> "HashedNgramModel":
+        data = [(_featurize(text), self.labels.index(label)) for text, label in examples]
+        n_labels = len(self.labels)
+        for _ in range(epochs):
+            for features, target in data:
+                probs = _softmax(self._scores(features))
+                for i in range(n_labels):
+                    grad = probs[i] - (1.0 if i == target else 0.0)
+                    self.bias[i] -= learning_rate * grad
+                    for index, value in features.items():
+                        row = self.weights.setdefault(index, [0.0] * n_labels)
+                        row[i] -= learning_rate * (grad * value + l2 * row[i])
+        return self
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        features = _featurize(text)
+        if not features:
+            return "general", 0.0
+        probs = _softmax(self._scores(features))
+        best = max(range(len(probs)), key=probs.__getitem__)
+        return self.labels[best], probs[best]
+
+
+def derive_threshold(
+    examples: Sequence[Tuple[str, str]], target_precision: float, folds: int = 5
+) -> float:
+    """Lowest confidence at which held-out predictions reach `target_precision`.
+
+    Each example is predicted by a model trained on the other folds. Returns
+    infinity (never skip the LLM) if no threshold is precise enough.
+    """
+    held_out: List[Tuple[float, bool]] = []
+    for fold in range(folds):
+        train = [e for i, e in enumerate(examples) if i % folds != fold]
+        model = HashedNgramModel().fit(train)
+        for text, label in examples[fold::folds]:
+            predicted, confidence = model.predict(text)
+            held_out.append((confidence, predicted == label))
+    held_out.sort(key=lambda item: item[0], reverse=True)
+    threshold, correct = math.inf, 0
+    for count, (confidence, ok) in enumerate(held_out, 1):
+        correct += ok
+        if correct / count >= target_precision:
+            threshold = confidence
+    return threshold
+
+
+@dataclass(frozen=True)
+class FastClassification:
+    classification: str
+    confidence: float
+    source: str  # "rule" (a rule for the label matched) or "model"
+
+
+class FastPathStats:
+    """Thread-safe counters describing how much traffic skips the LLM."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.total = 0
+        self.rule_hits = 0
+        self.model_hits = 0
+        self.fallbacks = 0
+
+    def record(self, source: Optional[str]) -> None:
+        with self._lock:
+            self.total += 1
+            if source == "rule":
+                self.rule_hits += 1
+            elif source == "model":
+                self.model_hits += 1
+            else:
+                self.fallbacks += 1
+
+    @property
+    def skip_rate(self) -> float:
+        """Fraction of classified messages that never reached the LLM."""
+        if not self.total:
+            return 0.0
+        return (self.rule_hits + self.model_hits) / self.total
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "total": self.total,
+                "rule_hits": self.rule_hits,
+                "model_hits": self.model_hits,
+                "fallbacks": self.fallbacks,
+                "skip_rate": self.skip_rate,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.total = self.rule_hits = self.model_hits = self.fallbacks = 0
+
+
+class FastClassifier:
+    """The linear model with rule features; None means "ask the LLM"."""
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        *,
+        target_precision: float = 0.97,
+        enabled: bool = True,
+        examples: Sequence[Tuple[str, str]] = _SEED_EXAMPLES,
+    ):
+        # None: derived from held-out data when the model is trained
+        self.threshold = threshold
+        self.target_precision = target_precision
+        self.enabled = enabled
+        self.stats = FastPathStats()
+        self._examples = examples
+        self._model: Optional[HashedNgramModel] = None
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self) -> HashedNgramModel:
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    if self.threshold is None:
+                        self.threshold = derive_threshold(
+                            self._examples, self.target_precision
+                        )
+                    self._model = HashedNgramModel().fit(self._examples)
+        return self._model
+
+    def _classify(self, text: str) -> Optional[FastClassification]:
+        label, confidence = self.model.predict(text)
+        if confidence < self.threshold:
+            return None
+        rule_labels = {rule_label for _, rule_label in _matched_rules(text)}
+        return FastClassification(
+            label, confidence, "rule" if label in rule_labels else "model"
+        )
+
+    def classify(self, text: str) -> Optional[FastClassification]:
+        """Return a confident local decision, or None to fall back to the LLM."""
+        if not self.enabled:
+            return None
+        decision = self._classify(text)
+        self.stats.record(decision.source if decision else None)
+        return decision
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off")
+
+
+_threshold = os.getenv("FAST_CLASSIFIER_THRESHOLD")
+
+fast_classifier = FastClassifier(
+    threshold=float(_threshold) if _threshold else None,
+    target_precision=float(os.getenv("FAST_CLASSIFIER_TARGET_PRECISION", "0.97")),
+    enabled=_env_flag("FAST_CLASSIFIER_ENABLED", True),
+)
@@ -1,17 +1,27 @@
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import START, END, StateGraph
 from agent.state import State
-from agent.nodes.classifier_agent import classifier_router
+from agent.nodes.classifier_agent import aclassifier_router, classifier_router
 from agent.nodes.application_agent import application_manager_agent
+from agent.history import acompact_history, compact_history
 
 # Build workflow
 overall_workflow = StateGraph(State)
 
 # Add nodes
-overall_workflow.add_node("classifier_router", classifier_router)
+overall_workflow.add_node(
+    "compact_history",
+    RunnableLambda(compact_history, afunc=acompact_history, name="compact_history"),
+)
+overall_workflow.add_node(
+    "classifier_router",
+    RunnableLambda(classifier_router, afunc=aclassifier_router, name="classifier_router"),
+)
 overall_workflow.add_node("application_agent", application_manager_agent)
 
 # Add edges to connect nodes
-overall_workflow.add_edge(START, "classifier_router")
+overall_workflow.add_edge(START, "compact_history")
+overall_workflow.add_edge("compact_history", "classifier_router")
 overall_workflow.add_conditional_edges(
     "classifier_router",
     lambda state: state.get("classification_decision"),
@@ -28,6 +38,11 @@ overall_workflow.add_edge("application_agent", END)
 # Compile the workflow
 graph = overall_workflow.compile()
 
+
+def build_graph(checkpointer=None):
+    """Compile the workflow, optionally with a checkpointer for persistent threads."""
+    return overall_workflow.compile(checkpointer=checkpointer)
+
 # def stream_graph_updates(user_input: str):
 #     for event in graph.stream({"messages": [{"role": "user", "content": user_input}]}):
 #         for value in event.values():
@@ -0,0 +1,143 @@
+"""Bounded conversation history for persistent threads.
+
+With a checkpointer, a thread's `messages` would otherwise grow forever and
+`llm_call` would resend all of them on every loop iteration. The
+`compact_history` node runs before routing and keeps only the last
+HISTORY_MAX_TURNS user turns in state; older messages are folded into a
+running `summary` (one LLM call, only when something is dropped) that
+`llm_call` sends as context. It also drops tool calls that never got a
+result (threads saved while a `Done` call ended the turn without one), which
+OpenAI would otherwise reject when the history is replayed.
+
+Env vars used:
+- HISTORY_MAX_TURNS: user turns kept verbatim (default 10)
+- HISTORY_SUMMARIZE: "0"/"false" drops old turns without summarizing
+"""
+
+from __future__ import annotations
+
+import os
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, RemoveMessage, ToolMessage
+from agent.state import State
+from agent.models import get_chat_model
+from agent.prompts.summary_prompt import SUMMARY_SYSTEM_PROMPT, SUMMARY_USER_PROMPT
+
+HISTORY_MAX_TURNS = int(os.getenv("HISTORY_MAX_TURNS", "10"))
+HISTORY_SUMMARIZE = os.getenv("HISTORY_SUMMARIZE", "true").lower() not in (
+    "0",
+    "false",
+    "no",
+    "off",
+)
+
+# Summarization LLM, built on first use by `_get_llm`
+llm = None
+
+
+def _get_llm():
+    global llm
+    if llm is None:
+        llm = get_chat_model()
+    return llm
+
+
+def split_turns(
+    messages: Sequence[BaseMessage], max_turns: Optional[int] = None
+) -> Tuple[List[BaseMessage], List[BaseMessage]]:
+    """Split messages into (older, recent) at the start of the last N user turns.
+
+    Cutting on user messages keeps tool calls and their results together.
+    """
+    max_turns = HISTORY_MAX_TURNS if max_turns is None else max_turns
+    human_indexes = [i for i, m in enumerate(messages) if m.type == "human"]
+    if len(human_indexes) <= max_turns:
+        return [], list(messages)
+    cut = human_indexes[-max_turns]
+    return list(messages[:cut]), list(messages[cut:])
+
+
+def close_dangling_tool_calls(messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+    """Copies of AI messages with unanswered tool calls, without those calls.
+
+    The copies keep their ids, so returning them from a node replaces the
+    originals in place.
+    """
+    answered = {m.tool_call_id for m in messages if isinstance(m, ToolMessage)}
+    repaired: List[BaseMessage] = []
+    for m in messages:
+        if not isinstance(m, AIMessage) or not m.tool_calls:
+            continue
+        kept = [call for call in m.tool_calls if call["id"] in answered]
+        if len(kept) == len(m.tool_calls):
+            continue
+        # The raw OpenAI calls would be sent instead when `tool_calls` is empty
+        additional_kwargs = {k: v for k, v in m.additional_kwargs.items() if k != "tool_calls"}
+        repaired.append(
+            m.model_copy(update={"tool_calls": kept, "additional_kwargs": additional_kwargs})
+        )
+    return repaired
+
+
+def summary_messages(state: State) -> List[dict]:
+    """System context carrying the summary of dropped turns, if any."""
+    summary = state.get("summary")
+    if not summary:
+        return []
+    return [
+        {
+            "role": "system",
+            "content": f"Summary of the earlier conversation:\n{summary}",
+        }
+    ]
+
+
+def _summary_prompt(summary: str, older: Sequence[BaseMessage]) -> List[dict]:
+    transcript = "\n".join(f"{m.type}: {m.content}" for m in older if m.content)
+    return [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": SUMMARY_USER_PROMPT.format(
+                summary=summary or "(none)", messages=transcript
+            ),
+        },
+    ]
+
+
+def _compaction(
+    older: Sequence[BaseMessage], recent: Sequence[BaseMessage], summary: str
+) -> dict:
+    return {
+        "messages": [RemoveMessage(id=m.id) for m in older]
+        + close_dangling_tool_calls(recent),
+        "summary": summary,
+    }
+
+
+def _repair(recent: Sequence[BaseMessage]) -> dict:
+    repaired = close_dangling_tool_calls(recent)
+    return {"messages": repaired} if repaired else {}
+
+
+def compact_history(state: State):
+    """Drop turns beyond the window, folding them into the summary"""
+    older, recent = split_turns(state["messages"])
+    if not older:
+        return _repair(recent)
+    summary = state.get("summary") or ""
+    if HISTORY_SUMMARIZE:
+        summary = _get_llm().invoke(_summary_prompt(summary, older)).content
+    return _compaction(older, recent, summary)
+
+
+async def acompact_history(state: State):
+    """Async counterpart of `compact_history`"""
+    older, recent = split_turns(state["messages"])
+    if not older:
+        return _repair(recent)
+    summary = state.get("summary") or ""
+    if HISTORY_SUMMARIZE:
+        summary = (await _get_llm().ainvoke(_summary_prompt(summary, older))).content
+    return _compaction(older, recent, summary)
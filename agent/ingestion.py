@@ -0,0 +1,325 @@
+"""Bulk ingestion of application-confirmation emails.
+
+Backfills the applications collection from years of mail:
+
+1. `iter_emails` streams messages from mbox files and directories of .eml
+   files as a generator, in a stable order.
+2. `is_candidate` is a cheap local prefilter that drops obviously irrelevant
+   mail (alerts, newsletters, personal mail) before any LLM call.
+3. Remaining emails are grouped into batches and each batch is extracted with
+   a single structured-output call.
+4. Each batch's results are written with one unordered `bulk_write` keyed on
+   the email id, company and role, so an email confirming several
+   applications stores each of them and re-running a batch never duplicates
+   applications.
+
+Progress is saved to a JSON checkpoint after each batch is written, so an
+interrupted run resumes after the last written batch. Each email is rendered the same way as
+`State.email_input`, so single emails can also be fed through the graph.
+
+    python -m agent.ingestion --user-id <id> --checkpoint ingest.json ~/Mail/archive.mbox
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import email
+import email.utils
+import hashlib
+import json
+import mailbox
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from email import policy
+from email.message import EmailMessage
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, cast
+
+from agent.llm_scheduler import Priority, llm_priority
+from agent.models import get_chat_model
+from agent.prompts.ingestion_prompt import INGESTION_SYSTEM_PROMPT, INGESTION_USER_PROMPT
+from agent.schemas import EmailExtractionSchema
+
+MAX_BODY_CHARS = 2000
+
+_POSITIVE_RE = re.compile(
+    r"thank(s| you) for (applying|your application|your interest)"
+    r"|(we('ve| have)?|has been) received your application"
+    r"|application (received|submitted|confirmation)"
+    r"|your application (to|for|has been)"
+    r"|you applied (to|for)",
+    re.IGNORECASE,
+)
+_NEGATIVE_RE = re.compile(
+    r"job alert|jobs? (you may|recommended|for you)|newsletter|webinar"
+    r"|unfortunately|not (be )?moving forward|schedule (an|your) interview",
+    re.IGNORECASE,
+)
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class EmailRecord:
+    email_id: str
+    subject: str
+    sender: str
+    date: Optional[str]
+    body: str
+
+
+@dataclass
+class IngestionStats:
+    seen: int = 0
+    skipped: int = 0
+    candidates: int = 0
+    llm_calls: int = 0
+    extracted: int = 0
+    written: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def emails_per_second(self) -> float:
+        elapsed = time.perf_counter() - self.started_at
+        return self.seen / elapsed if elapsed else 0.0
+
+    def report(self) -> str:
+        return (
+            f"seen={self.seen} candidates={self.candidates} llm_calls={self.llm_calls} "
+            f"extracted={self.extracted} written={self.written} "
+            f"({self.emails_per_second:.1f} emails/s)"
+        )
+
+
+def _message_body(message: EmailMessage) -> str:
+    part = message.get_body(preferencelist=("plain", "html"))
+    if part is None:
+        return ""
+    try:
+        content = part.get_content()
+    except (LookupError, UnicodeDecodeError):
+        return ""
+    if part.get_content_subtype() == "html":
+        content = _TAG_RE.sub(" ", content)
+    return _WS_RE.sub(" ", content).strip()[:MAX_BODY_CHARS]
+
+
+def _to_record(message: EmailMessage, fallback_id: str) -> EmailRecord:
+    date = None
+    if message["date"]:
+        try:
+            parsed = email.utils.parsedate_to_datetime(str(message["date"]))
+            date = parsed.date().isoformat()
+        except (TypeError, ValueError):
+            date = None
+    message_id = str(message["message-id"] or "").strip()
+    return EmailRecord(
+        email_id=message_id or hashlib.sha1(fallback_id.encode()).hexdigest(),
+        subject=str(message["subject"] or ""),
+        sender=str(message["from"] or ""),
+        date=date,
+        body=_message_body(message),
+    )
+
+
+def _read_eml(path: Path) -> EmailMessage:
+    with open(path, "rb") as f:
+        return cast(EmailMessage, email.message_from_binary_file(f, policy=policy.default))
+
+
+def iter_emails(paths: Iterable[str]) -> Iterator[EmailRecord]:
+    """Yield emails from mbox files and .eml directories, in a stable order."""
+    for raw_path in paths:
+        path = Path(raw_path)
+        if path.is_dir():
+            for eml in sorted(path.rglob("*.eml")):
+                yield _to_record(_read_eml(eml), str(eml))
+            continue
+        if path.suffix == ".eml":
+            yield _to_record(_read_eml(path), str(path))
+            continue
+        box = mailbox.mbox(
+            path,
+            factory=lambda f: email.message_from_binary_file(f, policy=policy.default),
+            create=False,
+        )
+        for index, message in enumerate(box):
+            yield _to_record(message, f"{path}#{index}")
+
+
+def is_candidate(record: EmailRecord) -> bool:
+    """Cheap local check for mail that may confirm an application."""
+    text = f"{record.subject}\n{record.body[:500]}"
+    return bool(_POSITIVE_RE.search(text)) and not _NEGATIVE_RE.search(record.subject)
+
+
+def format_email_input(record: EmailRecord) -> str:
+    """Render an email as plain text, the format used for `State.email_input`."""
+    return (
+        f"From: {record.sender}\nDate: {record.date or 'unknown'}\n"
+        f"Subject: {record.subject}\n\n{record.body}"
+    )
+
+
+def batched(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def default_extractor():
+    """The gpt-4.1 structured-output model used for extraction."""
+    return get_chat_model().with_structured_output(EmailExtractionSchema)
+
+
+async def extract_applications(
+    records: Sequence[EmailRecord], extractor
+) -> List[Tuple[EmailRecord, dict]]:
+    """Extract applications from a batch of emails with one LLM call."""
+    emails = "\n\n".join(
+        f"### Email {i}\n{format_email_input(record)}" for i, record in enumerate(records)
+    )
+    result = await extractor.ainvoke(
+        [
+            {"role": "system", "content": INGESTION_SYSTEM_PROMPT},
+            {"role": "user", "content": INGESTION_USER_PROMPT.format(emails=emails)},
+        ]
+    )
+    result = cast(EmailExtractionSchema, result)
+
+    extracted = []
+    for item in result.results:
+        if not item.is_application or not item.company:
+            continue
+        if not 0 <= item.email_index < len(records):
+            continue
+        record = records[item.email_index]
+        extracted.append(
+            (
+                record,
+                {
+                    "company": item.company,
+                    "role": item.role or "Unknown",
+                    "date": item.date or record.date or "",
+                    "source": item.source or "email",
+                },
+            )
+        )
+    return extracted
+
+
+def load_checkpoint(path: Optional[str]) -> dict:
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"position": 0, "written": 0}
+
+
+def save_checkpoint(path: Optional[str], checkpoint: dict) -> None:
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+async def ingest_mailbox(
+    paths: Sequence[str],
+    user_id: str,
+    *,
+    extractor=None,
+    writer=None,
+    batch_size: int = 20,
+    checkpoint_path: Optional[str] = None,
+    progress_every: float = 10.0,
+) -> IngestionStats:
+    """Stream emails through prefilter, batched extraction and bulk writes.
+
+    `extractor` is any runnable with `ainvoke` returning
+    `EmailExtractionSchema` (a fake model in tests); `writer` receives lists
+    of application documents and returns their `BulkWriteResult`, and
+    defaults to `bulk_insert_from_emails`.
+    """
+    from backend.db import applications
+
+    extractor = extractor or default_extractor()
+    writer = writer or applications.bulk_insert_from_emails
+
+    checkpoint = load_checkpoint(checkpoint_path)
+    stats = IngestionStats(written=checkpoint["written"])
+    position = checkpoint["position"]
+    batch: List[EmailRecord] = []
+    last_report = time.perf_counter()
+
+    async def process() -> None:
+        stats.llm_calls += 1
+        # Backfills yield to interactive chat traffic
+        with llm_priority(Priority.BATCH):
+            extracted = await extract_applications(batch, extractor)
+        docs = [
+            applications.new_application_doc(
+                user_id,
+                fields["company"],
+                fields["role"],
+                fields["date"],
+                fields["source"],
+                email_id=record.email_id,
+            )
+            for record, fields in extracted
+        ]
+        stats.extracted += len(docs)
+        if docs:
+            result = await writer(docs)
+            # Emails already stored by an earlier run are matched, not upserted
+            stats.written += result.upserted_count
+        batch.clear()
+        # Everything up to `position` is extracted and written
+        save_checkpoint(checkpoint_path, {"position": position, "written": stats.written})
+
+    for record in islice(iter_emails(paths), position, None):
+        position += 1
+        stats.seen += 1
+        if not is_candidate(record):
+            stats.skipped += 1
+            continue
+        stats.candidates += 1
+        batch.append(record)
+        if len(batch) >= batch_size:
+            await process()
+
+        if time.perf_counter() - last_report >= progress_every:
+            print(f"📬 {stats.report()}")
+            last_report = time.perf_counter()
+
+    if batch:
+        await process()
+    else:
+        save_checkpoint(checkpoint_path, {"position": position, "written": stats.written})
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill applications from a mailbox")
+    parser.add_argument("paths", nargs="+", help="mbox files, .eml files or directories")
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--checkpoint", help="JSON file used to resume interrupted runs")
+    parser.add_argument("--batch-size", type=int, default=20, help="Emails per LLM call")
+    args = parser.parse_args()
+    stats = asyncio.run(
+        ingest_mailbox(
+            args.paths,
+            args.user_id,
+            batch_size=args.batch_size,
+            checkpoint_path=args.checkpoint,
+        )
+    )
+    print(f"✅ Done: {stats.report()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,556 @@
+"""Process-wide scheduler for outbound LLM requests.
+
+Each node used to call OpenAI on its own. Under load they hit 429s together
+and retried (or failed) independently. Every chat model from
+`agent.models.get_chat_model` now sends its HTTP requests through one
+`LLMScheduler`, installed as an httpx transport, which provides:
+
+- Token buckets for requests and tokens per minute. Tokens are estimated from
+  the request body and `max_tokens`.
+- Priorities: interactive traffic (the default) is admitted before work
+  marked with `llm_priority(Priority.BATCH)` (batch runs, mailbox backfills).
+- Exponential backoff with full jitter on 429/5xx and connection errors,
+  honouring `Retry-After`. The OpenAI client's own retries are disabled.
+- Adaptive concurrency: the in-flight limit grows additively on success and
+  is halved, at most once per round of requests in flight, when the API
+  signals overload (429 or 5xx) or when latency rises. Latency is compared
+  like with like: each model and route keeps a slow EWMA baseline and a fast
+  EWMA of recent calls, and the limit backs off when the recent average
+  exceeds the baseline by LLM_LATENCY_TOLERANCE. A steady mix of short and
+  long calls moves both averages alike, so only a real slowdown triggers it.
+
+The scheduler works with both the sync and async clients, across threads and
+event loops. It sits at the HTTP layer, so it can be exercised against any
+OpenAI-compatible server (see `benchmarks/llm_scheduler.py`).
+
+Env vars used:
+- LLM_SCHEDULER_ENABLED: "0"/"false" sends requests directly (default on)
+- LLM_RPM_LIMIT / LLM_TPM_LIMIT: requests / tokens per minute (0 = unlimited)
+- LLM_MIN_CONCURRENCY / LLM_MAX_CONCURRENCY: in-flight bounds (default 1 / 32)
+- LLM_MAX_RETRIES: retries on 429/5xx (default 4)
+- LLM_BACKOFF_BASE_SECONDS / LLM_BACKOFF_MAX_SECONDS: backoff (default 0.5 / 20)
+- LLM_LATENCY_TOLERANCE: recent/baseline latency ratio that counts as
+  overload (default 2.0)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Dict, Iterator, Optional
+
+import httpx
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+DEFAULT_COMPLETION_TOKENS = 512
+
+
+class Priority(IntEnum):
+    """Lower values are admitted first."""
+
+    INTERACTIVE = 0
+    BATCH = 10
+
+
+_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(priority: Priority) -> Iterator[None]:
+    """Run model calls made in this context at `priority`."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _priority.get()
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute; a rate of 0 means unlimited."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available."""
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        # Requests larger than the bucket wait for a full bucket instead of forever
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        if self.rate:
+            self.tokens -= min(amount, self.capacity)
+
+
+class LatencyBaseline:
+    """Slow and fast EWMAs of call latency for one model and route.
+
+    Both start as plain running means, so the first calls do not skew them.
+    """
+
+    def __init__(self, slow_alpha: float = 0.01, fast_alpha: float = 0.05, warmup: int = 50):
+        self.slow_alpha = slow_alpha
+        self.fast_alpha = fast_alpha
+        self.warmup = warmup
+        self.samples = 0
+        self.baseline = 0.0
+        self.recent = 0.0
+
+    def observe(self, latency: float) -> None:
+        self.samples += 1
+        slow = max(self.slow_alpha, 1 / self.samples)
+        fast = max(self.fast_alpha, 1 / self.samples)
+        self.baseline += slow * (latency - self.baseline)
+        self.recent += fast * (latency - self.recent)
+
+    @property
+    def ratio(self) -> float:
+        """Recent over baseline latency; 1.0 until warmed up."""
+        if self.samples < self.warmup or self.baseline <= 0:
+            return 1.0
+        return self.recent / self.baseline
+
+
+class _Waiter:
+    """A queued request; woken from any thread when it may be admitted."""
+
+    def __init__(self, priority: int, seq: int, tokens: float):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.cancelled = False
+        self._event = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_event: Optional[asyncio.Event] = None
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def bind_loop(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._async_event = asyncio.Event()
+
+    def wake(self) -> None:
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._async_event.set)
+            except RuntimeError:
+                # The waiter's loop is closed; it is not waiting any more
+                pass
+        else:
+            self._event.set()
+
+    def wait(self, timeout: Optional[float]) -> None:
+        self._event.wait(timeout)
+        self._event.clear()
+
+    async def async_wait(self, timeout: Optional[float]) -> None:
+        try:
+            await asyncio.wait_for(self._async_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._async_event.clear()
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        *,
+        rpm: float = 0,
+        tpm: float = 0,
+        min_concurrency: int = 1,
+        max_concurrency: int = 32,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        latency_tolerance: float = 2.0,
+    ):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.latency_tolerance = latency_tolerance
+        self._latency: Dict[str, LatencyBaseline] = {}
+        # When the limit was last cut; requests started before then were
+        # already in flight and must not cut it again
+        self._last_cut = float("-inf")
+        self._lock = threading.Lock()
+        self._queue: list = []
+        self._seq = itertools.count()
+        self.in_flight = 0
+        self.stats = {
+            "admitted": 0,
+            "retried": 0,
+            "rate_limited": 0,
+            "server_errors": 0,
+            "latency_backoffs": 0,
+            "failed": 0,
+        }
+
+    # Admission
+
+    def _enqueue(self, tokens: float) -> _Waiter:
+        waiter = _Waiter(int(current_priority()), next(self._seq), tokens)
+        with self._lock:
+            heapq.heappush(self._queue, waiter)
+        return waiter
+
+    def _head(self) -> Optional[_Waiter]:
+        while self._queue and self._queue[0].cancelled:
+            heapq.heappop(self._queue)
+        return self._queue[0] if self._queue else None
+
+    def _try_admit(self, waiter: _Waiter) -> Optional[float]:
+        """Admit `waiter` if it may run now; otherwise return how long to wait.
+
+        None means "until woken" (not at the head, or no free slot).
+        """
+        with self._lock:
+            if self._head() is not waiter or self.in_flight >= max(1, int(self.limit)):
+                return None
+            now = time.monotonic()
+            delay = max(
+                self.requests.delay_for(1, now), self.tokens.delay_for(waiter.tokens, now)
+            )
+            if delay > 0:
+                return delay
+            heapq.heappop(self._queue)
+            self.requests.take(1)
+            self.tokens.take(waiter.tokens)
+            self.in_flight += 1
+            self.stats["admitted"] += 1
+            following = self._head()
+        if following is not None:
+            following.wake()
+        return 0.0
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        with self._lock:
+            waiter.cancelled = True
+            following = self._head()
+        if following is not None:
+            following.wake()
+
+    def acquire(self, tokens: float) -> None:
+        waiter = self._enqueue(tokens)
+        try:
+            while (delay := self._try_admit(waiter)) != 0.0:
+                waiter.wait(delay)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    async def aacquire(self, tokens: float) -> None:
+        waiter = self._enqueue(tokens)
+        waiter.bind_loop()
+        try:
+            while (delay := self._try_admit(waiter)) != 0.0:
+                await waiter.async_wait(delay)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    def _cut(self, started: float, now: float) -> bool:
+        # A burst of slow or failed calls from one round of requests is one signal
+        if started < self._last_cut:
+            return False
+        self.limit = max(self.min_concurrency, self.limit / 2)
+        self._last_cut = now
+        return True
+
+    def release(
+        self, started: float, status_code: Optional[int] = None, key: Optional[str] = None
+    ) -> None:
+        """Free a slot and adapt the concurrency limit to the outcome.
+
+        `started` is the request's `time.monotonic()` start; `status_code` is
+        None when the request failed without a response. `key` names the
+        model and route whose latency baseline the call is compared with.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            if status_code in RETRY_STATUS_CODES:
+                self.stats["rate_limited" if status_code == 429 else "server_errors"] += 1
+                self._cut(started, now)
+            elif status_code is not None:
+                ratio = 1.0
+                if key is not None and status_code < 400:
+                    baseline = self._latency.setdefault(key, LatencyBaseline())
+                    baseline.observe(now - started)
+                    ratio = baseline.ratio
+                if ratio > self.latency_tolerance:
+                    if self._cut(started, now):
+                        self.stats["latency_backoffs"] += 1
+                else:
+                    self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            head = self._head()
+        if head is not None:
+            head.wake()
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.stats["retried"] += 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.stats["failed"] += 1
+
+    # Retries
+
+    def backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Full-jitter exponential backoff, at least the server's Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+        if response is not None:
+            retry_after = _retry_after(response)
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "queued": sum(not w.cancelled for w in self._queue),
+            }
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+def _payload(request: httpx.Request) -> dict:
+    try:
+        payload = json.loads(request.content) if request.content else {}
+    except ValueError:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def estimate_tokens(request: httpx.Request, payload: Optional[dict] = None) -> float:
+    """Rough prompt + completion token count for the TPM bucket."""
+    payload = _payload(request) if payload is None else payload
+    completion = (
+        payload.get("max_completion_tokens")
+        or payload.get("max_tokens")
+        or DEFAULT_COMPLETION_TOKENS
+    )
+    # ~4 bytes per token of English JSON
+    return len(request.content) / 4 + completion
+
+
+def latency_key(request: httpx.Request, payload: Optional[dict] = None) -> str:
+    """The model and route whose calls share a latency baseline."""
+    payload = _payload(request) if payload is None else payload
+    return f"{payload.get('model', '')}:{request.url.path}"
+
+
+class _ReleasingStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Response body that frees its scheduler slot once closed.
+
+    Streamed completions keep their slot until the last chunk is read, so the
+    concurrency limit covers whole generations, not just time to headers.
+    """
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    def _done(self) -> None:
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+    def __iter__(self):
+        yield from self._stream
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._done()
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._done()
+
+
+def _releasing(
+    scheduler: LLMScheduler,
+    request: httpx.Request,
+    response: httpx.Response,
+    started: float,
+    key: str,
+) -> httpx.Response:
+    return httpx.Response(
+        status_code=response.status_code,
+        headers=response.headers,
+        stream=_ReleasingStream(
+            response.stream,
+            lambda: scheduler.release(started, response.status_code, key),
+        ),
+        extensions=response.extensions,
+        request=request,
+    )
+
+
+class ScheduledAsyncTransport(httpx.AsyncBaseTransport):
+    """httpx transport that admits, retries and times requests via a scheduler."""
+
+    def __init__(self, scheduler: LLMScheduler, transport: httpx.AsyncBaseTransport):
+        self.scheduler = scheduler
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        scheduler = self.scheduler
+        await request.aread()
+        payload = _payload(request)
+        tokens = estimate_tokens(request, payload)
+        key = latency_key(request, payload)
+        attempt = 0
+        while True:
+            await scheduler.aacquire(tokens)
+            start = time.monotonic()
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError:
+                scheduler.release(start)
+                if attempt >= scheduler.max_retries:
+                    scheduler.record_failure()
+                    raise
+                response = None
+            else:
+                if (
+                    response.status_code not in RETRY_STATUS_CODES
+                    or attempt >= scheduler.max_retries
+                ):
+                    return _releasing(scheduler, request, response, start, key)
+                await response.aclose()
+                scheduler.release(start, response.status_code, key)
+            delay = scheduler.backoff(attempt, response)
+            attempt += 1
+            scheduler.record_retry()
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class ScheduledTransport(httpx.BaseTransport):
+    """Blocking counterpart of `ScheduledAsyncTransport`."""
+
+    def __init__(self, scheduler: LLMScheduler, transport: httpx.BaseTransport):
+        self.scheduler = scheduler
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        scheduler = self.scheduler
+        request.read()
+        payload = _payload(request)
+        tokens = estimate_tokens(request, payload)
+        key = latency_key(request, payload)
+        attempt = 0
+        while True:
+            scheduler.acquire(tokens)
+            start = time.monotonic()
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError:
+                scheduler.release(start)
+                if attempt >= scheduler.max_retries:
+                    scheduler.record_failure()
+                    raise
+                response = None
+            else:
+                if (
+                    response.status_code not in RETRY_STATUS_CODES
+                    or attempt >= scheduler.max_retries
+                ):
+                    return _releasing(scheduler, request, response, start, key)
+                response.close()
+                scheduler.release(start, response.status_code, key)
+            delay = scheduler.backoff(attempt, response)
+            attempt += 1
+            scheduler.record_retry()
+            time.sleep(delay)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+def build_llm_scheduler() -> Optional[LLMScheduler]:
+    """Create the scheduler configured through environment variables."""
+    enabled = os.getenv("LLM_SCHEDULER_ENABLED", "1").strip().lower()
+    if enabled in ("0", "false", "no", "off"):
+        return None
+    return LLMScheduler(
+        rpm=float(os.getenv("LLM_RPM_LIMIT", "0")),
+        tpm=float(os.getenv("LLM_TPM_LIMIT", "0")),
+        min_concurrency=int(os.getenv("LLM_MIN_CONCURRENCY", "1")),
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "32")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "4")),
+        backoff_base=float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5")),
+        backoff_max=float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "20")),
+        latency_tolerance=float(os.getenv("LLM_LATENCY_TOLERANCE", "2.0")),
+    )
+
+
+# Shared by every model built in this process
+llm_scheduler = build_llm_scheduler()
+
+
+__all__ = [
+    "LLMScheduler",
+    "LatencyBaseline",
+    "Priority",
+    "ScheduledAsyncTransport",
+    "ScheduledTransport",
+    "TokenBucket",
+    "build_llm_scheduler",
+    "current_priority",
+    "llm_priority",
+    "llm_scheduler",
+]
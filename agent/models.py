@@ -0,0 +1,87 @@
+"""Shared chat models, built on first use.
+
+Every node used to call `init_chat_model("openai:gpt-4.1")` at import, which
+imported the OpenAI SDK and built a separate client (and HTTP connection
+pool) per module before the process did any work. `get_chat_model` builds
+one model per (model, temperature) the first time it is asked for and hands
+the same instance to every caller, so nodes share its pooled HTTP client.
+
+OpenAI models send their requests through the process-wide
+`agent.llm_scheduler.llm_scheduler` (rate limits, priorities, backoff and
+adaptive concurrency), which replaces the SDK's own retries. Identical
+requests already in flight on the async client are coalesced by
+`agent.single_flight.llm_single_flight`.
+
+Nodes keep their derived runnables (`with_structured_output`, `bind_tools`)
+in module globals that start as None and are filled in on first use, so tests
+and benchmarks can still assign fakes to them.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, Tuple
+
+import httpx
+
+DEFAULT_MODEL = "openai:gpt-4.1"
+
+_models: Dict[Tuple[str, float], Any] = {}
+_lock = threading.Lock()
+
+
+def _client_kwargs(model: str) -> Dict[str, Any]:
+    from agent.llm_scheduler import (
+        ScheduledAsyncTransport,
+        ScheduledTransport,
+        llm_scheduler,
+    )
+    from agent.single_flight import SingleFlightAsyncTransport, llm_single_flight
+
+    if not model.startswith("openai:") or (
+        llm_scheduler is None and llm_single_flight is None
+    ):
+        return {}
+
+    transport: httpx.BaseTransport = httpx.HTTPTransport()
+    async_transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport()
+    kwargs: Dict[str, Any] = {}
+    if llm_scheduler is not None:
+        transport = ScheduledTransport(llm_scheduler, transport)
+        async_transport = ScheduledAsyncTransport(llm_scheduler, async_transport)
+        kwargs["max_retries"] = 0
+    if llm_single_flight is not None:
+        # Outermost, so collapsed calls never reach the scheduler
+        async_transport = SingleFlightAsyncTransport(llm_single_flight, async_transport)
+
+    timeout = httpx.Timeout(600.0, connect=5.0)
+    return {
+        "http_client": httpx.Client(transport=transport, timeout=timeout),
+        "http_async_client": httpx.AsyncClient(transport=async_transport, timeout=timeout),
+        **kwargs,
+    }
+
+
+def get_chat_model(model: str = DEFAULT_MODEL, temperature: float = 0.0):
+    """Return the shared chat model for this configuration."""
+    key = (model, temperature)
+    if (instance := _models.get(key)) is not None:
+        return instance
+    with _lock:
+        if (instance := _models.get(key)) is None:
+            # Deferred: importing the provider SDK dominates agent import time
+            from langchain.chat_models import init_chat_model
+
+            instance = _models[key] = init_chat_model(
+                model, temperature=temperature, **_client_kwargs(model)
+            )
+    return instance
+
+
+def clear_models() -> None:
+    """Forget built models (e.g. after changing credentials in tests)."""
+    with _lock:
+        _models.clear()
+
+
+__all__ = ["DEFAULT_MODEL", "clear_models", "get_chat_model"]
@@ -1,22 +1,78 @@
-from typing import Optional
-from langchain.chat_models import init_chat_model
+import asyncio
+import functools
+import os
+import threading
+from datetime import date as date_type
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, List, Optional, Union, cast
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.tools import tool
 from langgraph.graph import StateGraph, START, END
 from agent.state import State
+from agent.models import get_chat_model
+from agent.history import summary_messages
+from agent.schemas import ApplicationOperation, ApplicationOperationsSchema
 from agent.prompts.application_manager_prompt import APPLICATION_MANAGER_PROMPT
-from dotenv import load_dotenv
+from agent.prompts.application_extraction_prompt import (
+    APPLICATION_EXTRACTION_SYSTEM_PROMPT,
+    APPLICATION_EXTRACTION_USER_PROMPT,
+)
+from backend.db import application_stats, applications
+
+
+def _current_user_id(config: RunnableConfig) -> Optional[str]:
+    return (config or {}).get("configurable", {}).get("user_id")
+
+
+_NO_USER = {
+    "status": "error",
+    "message": "No user_id was provided for this conversation",
+}
+
+
+# Sync callers (`graph.invoke`, scripts) run the async tools on one private
+# event loop, so the shared Motor client is only ever bound to that loop
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="tool-loop", daemon=True).start()
+            _sync_loop = loop
+    return _sync_loop
+
+
+def _with_sync_func(async_tool):
+    """Give an async tool a blocking `func` so `invoke` works too."""
+    coroutine = async_tool.coroutine
+
+    @functools.wraps(coroutine)
+    def run(*args, **kwargs):
+        future = asyncio.run_coroutine_threadsafe(
+            coroutine(*args, **kwargs), _get_sync_loop()
+        )
+        return future.result()
 
-load_dotenv()
+    async_tool.func = run
+    return async_tool
 
 
 # Define tools
+@_with_sync_func
 @tool
-def log_application(
+async def log_application(
     company: str,
     role: str,
     date: str,
     source: str,
     resume_version: Optional[str] = None,
+    *,
+    config: RunnableConfig,
 ):
     """
     Log a new job application to the database.
@@ -28,14 +84,21 @@ def log_application(
         source: How you applied (e.g., LinkedIn, referral, website)
         resume_version: Optional resume version used
     """
+    user_id = _current_user_id(config)
+    if not user_id:
+        return _NO_USER
+    await applications.create_application(
+        user_id, company, role, date, source, resume_version
+    )
     return {
         "status": "success",
         "message": f"Application to {company} for {role} logged successfully",
     }
 
 
+@_with_sync_func
 @tool
-def update_application(company: str, updates: dict):
+async def update_application(company: str, updates: dict, *, config: RunnableConfig):
     """
     Update an existing job application.
 
@@ -43,33 +106,63 @@ def update_application(company: str, updates: dict):
         company: The company name
         updates: Dictionary of fields to update (e.g., {"status": "interviewing"})
     """
+    user_id = _current_user_id(config)
+    if not user_id:
+        return _NO_USER
+    resolution = await applications.resolve_company(user_id, company)
+    if resolution.ambiguous:
+        names = ", ".join(match.company for match in resolution.candidates)
+        return {
+            "status": "ambiguous",
+            "message": f"'{company}' could be any of: {names}. Ask which one to update.",
+            "candidates": [match.company for match in resolution.candidates],
+        }
+    if resolution.match is not None:
+        company = resolution.match.company
+    updated = await applications.update_application(
+        user_id, company, updates, resolution=resolution
+    )
+    if updated is None:
+        return {
+            "status": "not_found",
+            "message": f"No application to {company} found",
+        }
     return {
         "status": "success",
         "message": f"Application to {company} updated successfully",
+        "application": updated,
     }
 
 
+@_with_sync_func
 @tool
-def get_applications_by_user():
+async def get_applications_by_user(
+    status: Optional[str] = None, *, config: RunnableConfig
+):
     """
     Get all applications for the current user.
+
+    Args:
+        status: Optional status filter (e.g., "applied", "interviewing")
     """
-    return {
-        "applications": [
-            {
-                "company": "Google",
-                "role": "SWE",
-                "status": "applied",
-                "date": "2024-01-15",
-            },
-            {
-                "company": "Microsoft",
-                "role": "Software Engineer",
-                "status": "interviewing",
-                "date": "2024-01-10",
-            },
-        ]
-    }
+    user_id = _current_user_id(config)
+    if not user_id:
+        return _NO_USER
+    return {"applications": await applications.list_applications(user_id, status)}
+
+
+@_with_sync_func
+@tool
+async def get_application_stats(*, config: RunnableConfig):
+    """
+    Get counts of the current user's applications: total, per status, per
+    source, per week (last 8 weeks) and the response rate. Use this for
+    "how many" questions instead of listing every application.
+    """
+    user_id = _current_user_id(config)
+    if not user_id:
+        return _NO_USER
+    return {"stats": await application_stats.get_stats(user_id, weeks=8)}
 
 
 @tool
@@ -81,12 +174,35 @@ def Done():
 
 
 # Get tools
-tools = [log_application, update_application, get_applications_by_user, Done]
+tools = [
+    log_application,
+    update_application,
+    get_applications_by_user,
+    get_application_stats,
+    Done,
+]
 tools_by_name = {tool.name: tool for tool in tools}
 
-# Initialize the LLM for use with tools
-llm = init_chat_model("openai:gpt-4.1", temperature=0.0)
-llm_with_tools = llm.bind_tools(tools, tool_choice="any")
+# Tool calls from one model turn run concurrently; sync tools share this pool
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "15"))
+tool_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("TOOL_MAX_WORKERS", "8")),
+    thread_name_prefix="tool",
+)
+
+# "tools": the model calls tools in a loop until it calls Done
+# "extract": one structured-output call lists the operations, which run directly
+APPLICATION_AGENT_MODE = os.getenv("APPLICATION_AGENT_MODE", "tools").strip().lower()
+
+# LLM bound to the tools, built on first use by `_get_llm_with_tools`
+llm_with_tools = None
+
+
+def _get_llm_with_tools():
+    global llm_with_tools
+    if llm_with_tools is None:
+        llm_with_tools = get_chat_model().bind_tools(tools, tool_choice="any")
+    return llm_with_tools
 
 
 # Nodes
@@ -94,48 +210,149 @@ def llm_call(state: State):
     """LLM decides whether to call a tool or not"""
     return {
         "messages": [
-            llm_with_tools.invoke(
+            _get_llm_with_tools().invoke(
+                [
+                    {"role": "system", "content": APPLICATION_MANAGER_PROMPT},
+                ]
+                + summary_messages(state)
+                + state["messages"]
+            )
+        ]
+    }
+
+
+async def allm_call(state: State):
+    """Async counterpart of `llm_call`"""
+    return {
+        "messages": [
+            await _get_llm_with_tools().ainvoke(
                 [
                     {"role": "system", "content": APPLICATION_MANAGER_PROMPT},
                 ]
+                + summary_messages(state)
                 + state["messages"]
             )
         ]
     }
 
 
-def tool_node(state: State):
-    """Performs the tool call"""
+def _tool_message(tool_call: dict, observation) -> dict:
+    return {"role": "tool", "content": observation, "tool_call_id": tool_call["id"]}
+
+
+def _tool_error(tool_call: dict, message: str) -> ToolMessage:
+    return ToolMessage(content=message, tool_call_id=tool_call["id"], status="error")
+
+
+def _unknown_tool(tool_call: dict) -> ToolMessage:
+    # The model named a tool that does not exist; it can retry with a real one
+    return _tool_error(tool_call, f"Unknown tool {tool_call['name']}")
+
+
+def _run_tools(
+    tool_calls: List[dict], config: RunnableConfig
+) -> List[Union[dict, ToolMessage]]:
+    futures = []
+    for tool_call in tool_calls:
+        tool = tools_by_name.get(tool_call["name"])
+        futures.append(
+            None
+            if tool is None
+            else tool_executor.submit(tool.invoke, tool_call["args"], config)
+        )
     result = []
-    for tool_call in state["messages"][-1].tool_calls:
+    for tool_call, future in zip(tool_calls, futures):
+        if future is None:
+            result.append(_unknown_tool(tool_call))
+            continue
+        try:
+            observation = future.result(timeout=TOOL_TIMEOUT_SECONDS)
+        except FutureTimeoutError:
+            future.cancel()
+            result.append(
+                _tool_error(
+                    tool_call,
+                    f"{tool_call['name']} timed out after {TOOL_TIMEOUT_SECONDS}s",
+                )
+            )
+        except Exception as e:
+            result.append(_tool_error(tool_call, f"{tool_call['name']} failed: {e}"))
+        else:
+            result.append(_tool_message(tool_call, observation))
+    return result
+
+
+def tool_node(state: State, config: RunnableConfig):
+    """Performs the tool calls concurrently on the shared thread pool"""
+    return {"messages": _run_tools(state["messages"][-1].tool_calls, config)}
+
+
+async def _arun_tool(
+    tool_call: dict, config: RunnableConfig
+) -> Union[dict, ToolMessage]:
+    try:
         tool = tools_by_name[tool_call["name"]]
-        observation = tool.invoke(tool_call["args"])
-        result.append(
-            {"role": "tool", "content": observation, "tool_call_id": tool_call["id"]}
+    except KeyError:
+        return _unknown_tool(tool_call)
+    if getattr(tool, "coroutine", None) is not None:
+        call = tool.ainvoke(tool_call["args"], config)
+    else:
+        loop = asyncio.get_running_loop()
+        call = loop.run_in_executor(
+            tool_executor, functools.partial(tool.invoke, tool_call["args"], config)
         )
-    return {"messages": result}
+    try:
+        observation = await asyncio.wait_for(call, timeout=TOOL_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return _tool_error(
+            tool_call, f"{tool_call['name']} timed out after {TOOL_TIMEOUT_SECONDS}s"
+        )
+    except Exception as e:
+        return _tool_error(tool_call, f"{tool_call['name']} failed: {e}")
+    return _tool_message(tool_call, observation)
+
+
+async def _arun_tools(
+    tool_calls: List[dict], config: RunnableConfig
+) -> List[Union[dict, ToolMessage]]:
+    result = await asyncio.gather(
+        *(_arun_tool(tool_call, config) for tool_call in tool_calls)
+    )
+    return list(result)
+
+
+async def atool_node(state: State, config: RunnableConfig):
+    """Performs the tool calls concurrently, keeping the model's call order"""
+    return {"messages": await _arun_tools(state["messages"][-1].tool_calls, config)}
 
 
 # Conditional edge function
 def should_continue(state: State):
-    """Route to Action, or end if Done tool called"""
+    """Route to Action, or to Finish if Done tool called"""
     messages = state["messages"]
     last_message = messages[-1]
-    if last_message.tool_calls:
-        for tool_call in last_message.tool_calls:
-            if tool_call["name"] == "Done":
-                return END
-            else:
-                return "Action"
-    return END
+    if not last_message.tool_calls:
+        return END
+    if any(tool_call["name"] == "Done" for tool_call in last_message.tool_calls):
+        # The calls still get tool results: a checkpointed thread replays this
+        # turn, and OpenAI rejects tool calls that have no response
+        return "Finish"
+    return "Action"
 
 
 # Build workflow
 application_manager_agent = StateGraph(State)
 
 # Add nodes
-application_manager_agent.add_node("llm_call", llm_call)
-application_manager_agent.add_node("environment", tool_node)
+application_manager_agent.add_node(
+    "llm_call", RunnableLambda(llm_call, afunc=allm_call, name="llm_call")
+)
+application_manager_agent.add_node(
+    "environment", RunnableLambda(tool_node, afunc=atool_node, name="environment")
+)
+application_manager_agent.add_node(
+    "finish", RunnableLambda(tool_node, afunc=atool_node, name="finish")
+)
 
 # Add edges to connect nodes
 application_manager_agent.add_edge(START, "llm_call")
@@ -145,10 +362,156 @@ application_manager_agent.add_conditional_edges(
     {
         # Name returned by should_continue : Name of next node to visit
         "Action": "environment",
+        "Finish": "finish",
         END: END,
     },
 )
 application_manager_agent.add_edge("environment", "llm_call")
+application_manager_agent.add_edge("finish", END)
 
 # Compile the agent
-application_manager_agent = application_manager_agent.compile()
+tool_loop_agent = application_manager_agent.compile()
+
+
+# Single-call extraction mode
+
+# Structured-output extractor, built on first use by `_get_extractor`
+llm_extractor = None
+
+_UPDATE_FIELDS = ("role", "date", "source", "resume_version", "status", "notes")
+
+
+def _get_extractor():
+    global llm_extractor
+    if llm_extractor is None:
+        llm_extractor = get_chat_model().with_structured_output(
+            ApplicationOperationsSchema
+        )
+    return llm_extractor
+
+
+def _extraction_prompt(state: State) -> list:
+    *history, last = state["messages"]
+    content = last.content if hasattr(last, "content") else last["content"]
+    return (
+        [{"role": "system", "content": APPLICATION_EXTRACTION_SYSTEM_PROMPT}]
+        + summary_messages(state)
+        + history
+        + [
+            {
+                "role": "user",
+                "content": APPLICATION_EXTRACTION_USER_PROMPT.format(
+                    today=date_type.today().isoformat(), user_message=content
+                ),
+            }
+        ]
+    )
+
+
+def _operation_call(index: int, op: ApplicationOperation) -> Optional[dict]:
+    """Translate an extracted operation into a call of the matching tool."""
+    call_id = f"op_{index}"
+    if op.action == "stats":
+        return {"name": "get_application_stats", "args": {}, "id": call_id}
+    if op.action == "query":
+        return {
+            "name": "get_applications_by_user",
+            "args": {"status": op.status},
+            "id": call_id,
+        }
+    if not op.company:
+        return None
+    if op.action == "log":
+        return {
+            "name": "log_application",
+            "args": {
+                "company": op.company,
+                "role": op.role or "Unknown",
+                "date": op.date or date_type.today().isoformat(),
+                "source": op.source or "Unknown",
+                "resume_version": op.resume_version,
+            },
+            "id": call_id,
+        }
+    updates = {field: getattr(op, field) for field in _UPDATE_FIELDS if getattr(op, field)}
+    if not updates:
+        return None
+    return {
+        "name": "update_application",
+        "args": {"company": op.company, "updates": updates},
+        "id": call_id,
+    }
+
+
+def _operation_calls(result) -> List[dict]:
+    operations = cast(ApplicationOperationsSchema, result).operations
+    calls = (_operation_call(i, op) for i, op in enumerate(operations))
+    return [call for call in calls if call is not None]
+
+
+def _describe(observation) -> str:
+    """One line (or list) of reply text for a tool result."""
+    if not isinstance(observation, dict):
+        return str(observation)
+    if "stats" in observation:
+        stats = observation["stats"]
+        by_status = ", ".join(f"{n} {status}" for status, n in stats["by_status"].items())
+        text = f"You have {stats['total']} application(s)"
+        if by_status:
+            text += f": {by_status}"
+        return f"{text}. Response rate: {stats['response_rate']:.0%}."
+    if "applications" in observation:
+        found = observation["applications"]
+        if not found:
+            return "You have no matching applications."
+        lines = [f"You have {len(found)} matching application(s):"]
+        for app in found:
+            status = app.get("status") or "applied"
+            lines.append(
+                f"- {app.get('company')}: {app.get('role')} ({status}, {app.get('date')})"
+            )
+        return "\n".join(lines)
+    return observation.get("message") or str(observation)
+
+
+def _observation(result: Union[dict, ToolMessage]) -> Any:
+    return result.content if isinstance(result, ToolMessage) else result["content"]
+
+
+def _extraction_reply(results: List[Union[dict, ToolMessage]]) -> dict:
+    if not results:
+        text = "I couldn't find an application to log, update or look up in that message."
+    else:
+        text = "\n".join(_describe(_observation(r)) for r in results)
+    return {"messages": [AIMessage(content=text)]}
+
+
+def extract_call(state: State, config: RunnableConfig):
+    """One LLM call extracts every operation; they run without a tool loop"""
+    result = _get_extractor().invoke(_extraction_prompt(state))
+    # In order: a later operation may depend on an earlier one (log, then update)
+    results = [_run_tools([call], config)[0] for call in _operation_calls(result)]
+    return _extraction_reply(results)
+
+
+async def aextract_call(state: State, config: RunnableConfig):
+    """Async counterpart of `extract_call`"""
+    result = await _get_extractor().ainvoke(_extraction_prompt(state))
+    results = [await _arun_tool(call, config) for call in _operation_calls(result)]
+    return _extraction_reply(results)
+
+
+extract_workflow = StateGraph(State)
+extract_workflow.add_node(
+    "extract_call", RunnableLambda(extract_call, afunc=aextract_call, name="extract_call")
+)
+extract_workflow.add_edge(START, "extract_call")
+extract_workflow.add_edge("extract_call", END)
+extract_agent = extract_workflow.compile()
+
+
+# The agent used by the main graph, chosen per deployment
+APPLICATION_AGENT_MODES = {"tools": tool_loop_agent, "extract": extract_agent}
+if APPLICATION_AGENT_MODE not in APPLICATION_AGENT_MODES:
+    raise ValueError(f"Unknown APPLICATION_AGENT_MODE: {APPLICATION_AGENT_MODE}")
+application_manager_agent = APPLICATION_AGENT_MODES[APPLICATION_AGENT_MODE]
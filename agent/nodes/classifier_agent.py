@@ -1,92 +1,143 @@
-from langchain.chat_models import init_chat_model
 from langgraph.graph import END
 from langgraph.types import Command
 from agent.state import State
+from agent.models import get_chat_model
 from agent.schemas import RouterSchema
+from agent.fast_classifier import fast_classifier
+from agent.classifier_cache import build_classifier_cache
 from agent.prompts.classifier_prompt import (
     CLASSIFIER_SYSTEM_PROMPT,
     CLASSIFIER_USER_PROMPT,
 )
-from dotenv import load_dotenv
-from typing import cast
+from typing import Optional, cast
 
-load_dotenv()
+# Router LLM with structured output, built on first use by `_get_router`
+llm_router = None
 
-# Initialize the LLM for use with router / structured output
-llm = init_chat_model("openai:gpt-4.1", temperature=0.0)
-llm_router = llm.with_structured_output(RouterSchema)
+# Cache of previous router decisions, keyed on the normalized message
+classifier_cache = build_classifier_cache()
 
 
-def classifier_router(state: State):
-    """Analyze user message to decide which agent should handle it.
+def _get_router():
+    global llm_router
+    if llm_router is None:
+        llm_router = get_chat_model().with_structured_output(RouterSchema)
+    return llm_router
 
-    The classifier step routes user messages to the appropriate specialized agent:
-    - application_tracking: For job application logging and queries
-    - interview_prep: For interview preparation questions
-    - calendar: For scheduling and follow-up questions
-    - resume_assistant: For resume-related questions
-    - general: For general job hunting advice
-    """
-    # Get the last user message
-    messages = state["messages"]
-    if not messages:
-        return Command(goto=END)
 
-    last_message = messages[-1]
-    user_message = (
+def _last_user_message(state: State):
+    last_message = state["messages"][-1]
+    return (
         last_message.content if hasattr(last_message, "content") else str(last_message)
     )
 
-    system_prompt = CLASSIFIER_SYSTEM_PROMPT
-    user_prompt = CLASSIFIER_USER_PROMPT.format(user_message=user_message)
 
-    # Run the router LLM
-    result = llm_router.invoke(
-        [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ]
-    )
+def _router_prompt(user_message) -> list:
+    return [
+        {"role": "system", "content": CLASSIFIER_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": CLASSIFIER_USER_PROMPT.format(user_message=user_message),
+        },
+    ]
+
 
-    # Decision
-    result = cast(RouterSchema, result)
-    classification = result.classification
+def _fast_decision(user_message) -> Optional[str]:
+    """Confident local decision, or None when the cache/LLM must decide."""
+    if not isinstance(user_message, str):
+        return None
+    fast = fast_classifier.classify(user_message)
+    return fast.classification if fast is not None else None
 
+
+def _route(classification: str) -> Command:
+    """Build the routing command for a classification."""
     if classification == "application_tracking":
         print(
             "🎯 Classification: APPLICATION_TRACKING - Routing to application manager"
         )
         goto = "application_agent"
         update = {
-            "classification_decision": result.classification,
+            "classification_decision": classification,
         }
     elif classification == "interview_prep":
         print(
             "📝 Classification: INTERVIEW_PREP - This would route to interview prep agent"
         )
         update = {
-            "classification_decision": result.classification,
+            "classification_decision": classification,
         }
         goto = END  # For now, end since we don't have interview prep agent
     elif classification == "calendar":
         print("📅 Classification: CALENDAR - This would route to calendar agent")
         update = {
-            "classification_decision": result.classification,
+            "classification_decision": classification,
         }
         goto = END  # For now, end since we don't have calendar agent
     elif classification == "resume_assistant":
         print("📄 Classification: RESUME_ASSISTANT - This would route to resume agent")
         update = {
-            "classification_decision": result.classification,
+            "classification_decision": classification,
         }
         goto = END  # For now, end since we don't have resume agent
     elif classification == "general":
         print("💬 Classification: GENERAL - This would route to general assistant")
         update = {
-            "classification_decision": result.classification,
+            "classification_decision": classification,
         }
         goto = END  # For now, end since we don't have general agent
     else:
-        raise ValueError(f"Invalid classification: {result.classification}")
+        raise ValueError(f"Invalid classification: {classification}")
 
     return Command(goto=goto, update=update)
+
+
+def classifier_router(state: State):
+    """Analyze user message to decide which agent should handle it.
+
+    The classifier step routes user messages to the appropriate specialized agent:
+    - application_tracking: For job application logging and queries
+    - interview_prep: For interview preparation questions
+    - calendar: For scheduling and follow-up questions
+    - resume_assistant: For resume-related questions
+    - general: For general job hunting advice
+
+    Confident local decisions and cached decisions skip the router LLM.
+    """
+    if not state["messages"]:
+        return Command(goto=END)
+
+    user_message = _last_user_message(state)
+    cacheable = isinstance(user_message, str) and classifier_cache is not None
+
+    classification = _fast_decision(user_message)
+    if classification is None and cacheable:
+        classification = classifier_cache.get(user_message)
+    if classification is None:
+        # Run the router LLM
+        result = _get_router().invoke(_router_prompt(user_message))
+        classification = cast(RouterSchema, result).classification
+        if cacheable:
+            classifier_cache.set(user_message, classification)
+
+    return _route(classification)
+
+
+async def aclassifier_router(state: State):
+    """Async counterpart of `classifier_router` for `ainvoke`/`astream`."""
+    if not state["messages"]:
+        return Command(goto=END)
+
+    user_message = _last_user_message(state)
+    cacheable = isinstance(user_message, str) and classifier_cache is not None
+
+    classification = _fast_decision(user_message)
+    if classification is None and cacheable:
+        classification = await classifier_cache.aget(user_message)
+    if classification is None:
+        result = await _get_router().ainvoke(_router_prompt(user_message))
+        classification = cast(RouterSchema, result).classification
+        if cacheable:
+            await classifier_cache.aset(user_message, classification)
+
+    return _route(classification)
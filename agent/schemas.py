@@ -1,5 +1,5 @@
-from typing import Literal
-from langchain_core.pydantic_v1 import BaseModel
+from typing import List, Literal, Optional
+from langchain_core.pydantic_v1 import BaseModel, Field
 
 
 class RouterSchema(BaseModel):
@@ -12,3 +12,53 @@ class RouterSchema(BaseModel):
         "resume_assistant",
         "general",
     ]
+
+
+class ExtractedApplication(BaseModel):
+    """A job application found in one email of an extraction batch."""
+
+    email_index: int = Field(description="Index of the email in the batch")
+    is_application: bool = Field(
+        description="True only if the email confirms an application the user submitted"
+    )
+    company: Optional[str] = None
+    role: Optional[str] = None
+    date: Optional[str] = Field(default=None, description="YYYY-MM-DD")
+    source: Optional[str] = Field(
+        default=None, description="Where the user applied, e.g. LinkedIn, Greenhouse"
+    )
+
+
+class EmailExtractionSchema(BaseModel):
+    """Schema for extracting applications from a batch of emails."""
+
+    results: List[ExtractedApplication]
+
+
+class ApplicationOperation(BaseModel):
+    """One change to, or question about, the user's applications."""
+
+    action: Literal["log", "update", "query", "stats"] = Field(
+        description="log a new application, update an existing one, query them, "
+        "or count them (stats)"
+    )
+    company: Optional[str] = Field(
+        default=None, description="Company name; required for log and update"
+    )
+    role: Optional[str] = None
+    date: Optional[str] = Field(default=None, description="YYYY-MM-DD")
+    source: Optional[str] = Field(
+        default=None, description="How the user applied, e.g. LinkedIn, referral"
+    )
+    resume_version: Optional[str] = None
+    status: Optional[str] = Field(
+        default=None,
+        description="New status for update, or status filter for query",
+    )
+    notes: Optional[str] = None
+
+
+class ApplicationOperationsSchema(BaseModel):
+    """Schema for extracting every application operation in a message."""
+
+    operations: List[ApplicationOperation]
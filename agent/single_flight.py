@@ -0,0 +1,244 @@
+"""Coalescing of identical in-flight LLM requests (single-flight).
+
+A client retry, or several workers handling the same inbound message, can
+send byte-identical chat completion requests at the same time. The
+`SingleFlightAsyncTransport` sends only the first one (the leader). Identical
+requests that arrive while it is in flight get the leader's status, headers
+and body. The body is replayed chunk by chunk as it arrives, so streamed
+completions still stream for every waiter.
+
+The key is a hash of the method, URL and request body, which includes the
+model config, messages and tools. The transport wraps the scheduler's, so
+collapsed calls take no scheduler slot or rate-limit budget. Only the async
+client coalesces; the blocking client is used by the legacy sync graph path.
+
+Env vars used:
+- LLM_SINGLE_FLIGHT_ENABLED: "0"/"false" disables coalescing (default on)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import threading
+from typing import Dict, List, Optional
+
+import httpx
+
+from backend.metrics import LLM_CALLS_COALESCED, LLM_FLIGHTS
+
+
+def request_key(request: httpx.Request) -> str:
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(str(request.url).encode())
+    digest.update(request.content)
+    return digest.hexdigest()
+
+
+def _as_error(e: BaseException) -> Exception:
+    # Cancellation of the leader is reported to followers as a read error
+    return e if isinstance(e, Exception) else httpx.ReadError("coalesced request cancelled")
+
+
+class _Flight:
+    """Response of one leader request, shared with its followers."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.response: Optional[httpx.Response] = None
+        self.chunks: List[bytes] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+        self._waiters: List[tuple] = []
+
+    def _notify(self) -> None:
+        waiters, self._waiters = self._waiters, []
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass
+
+    def publish(
+        self,
+        *,
+        response: Optional[httpx.Response] = None,
+        chunk: Optional[bytes] = None,
+        done: bool = False,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        with self.lock:
+            if response is not None:
+                self.response = response
+            if chunk:
+                self.chunks.append(chunk)
+            if error is not None and not self.done:
+                self.error = error
+            self.done = self.done or done or error is not None
+            self._notify()
+
+    async def wait(self, ready) -> None:
+        """Wait until `ready()` (checked under the lock) becomes true."""
+        while True:
+            with self.lock:
+                if ready():
+                    return
+                event = asyncio.Event()
+                self._waiters.append((asyncio.get_running_loop(), event))
+            await event.wait()
+
+
+class _LeaderStream(httpx.AsyncByteStream):
+    """Leader's body: passes chunks through and records them for followers."""
+
+    def __init__(self, stream, flight: _Flight, finish):
+        self._stream = stream
+        self._flight = flight
+        self._finish = finish
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                self._flight.publish(chunk=chunk)
+                yield chunk
+        except BaseException as e:
+            self._flight.publish(error=_as_error(e))
+            self._finish()
+            raise
+        self._flight.publish(done=True)
+        # Identical requests from now on get a fresh response
+        self._finish()
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            # Closed before the end: followers cannot get the rest of the body
+            self._flight.publish(error=httpx.ReadError("coalesced response was closed early"))
+            self._finish()
+
+
+class _FollowerStream(httpx.AsyncByteStream):
+    """Replays the leader's recorded chunks, then follows new ones."""
+
+    def __init__(self, flight: _Flight):
+        self._flight = flight
+
+    async def __aiter__(self):
+        flight, position = self._flight, 0
+        while True:
+            await flight.wait(lambda: len(flight.chunks) > position or flight.done)
+            with flight.lock:
+                chunks = flight.chunks[position:]
+                done, error = flight.done, flight.error
+            for chunk in chunks:
+                yield chunk
+            position += len(chunks)
+            if done and position == len(flight.chunks):
+                if error is not None:
+                    raise error
+                return
+
+    async def aclose(self) -> None:
+        pass
+
+
+class SingleFlight:
+    """Registry of in-flight requests keyed on `request_key`."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self.stats = {"leaders": 0, "collapsed": 0}
+
+    def join(self, key: str) -> tuple[_Flight, bool]:
+        """Return the flight for `key` and whether the caller leads it."""
+        with self._lock:
+            if (flight := self._flights.get(key)) is not None:
+                flight.followers += 1
+                self.stats["collapsed"] += 1
+                LLM_CALLS_COALESCED.inc()
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            self.stats["leaders"] += 1
+            LLM_FLIGHTS.inc()
+            return flight, True
+
+    def finish(self, key: str, flight: _Flight) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+
+class SingleFlightAsyncTransport(httpx.AsyncBaseTransport):
+    def __init__(self, flights: SingleFlight, transport: httpx.AsyncBaseTransport):
+        self.flights = flights
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "POST" or not request.url.path.endswith("/chat/completions"):
+            return await self.transport.handle_async_request(request)
+
+        await request.aread()
+        key = request_key(request)
+        flight, leader = self.flights.join(key)
+        if not leader:
+            await flight.wait(lambda: flight.response is not None or flight.done)
+            if flight.response is None:
+                raise flight.error or httpx.ReadError("coalesced request failed")
+            return httpx.Response(
+                status_code=flight.response.status_code,
+                headers=flight.response.headers,
+                stream=_FollowerStream(flight),
+                extensions={},
+                request=request,
+            )
+
+        finished = False
+
+        def finish() -> None:
+            nonlocal finished
+            if not finished:
+                finished = True
+                self.flights.finish(key, flight)
+
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException as e:
+            finish()
+            flight.publish(error=_as_error(e))
+            raise
+        flight.publish(response=response)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_LeaderStream(response.stream, flight, finish),
+            extensions=response.extensions,
+            request=request,
+        )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def build_single_flight() -> Optional[SingleFlight]:
+    enabled = os.getenv("LLM_SINGLE_FLIGHT_ENABLED", "1").strip().lower()
+    if enabled in ("0", "false", "no", "off"):
+        return None
+    return SingleFlight()
+
+
+# Shared by every model built in this process
+llm_single_flight = build_single_flight()
+
+
+__all__ = [
+    "SingleFlight",
+    "SingleFlightAsyncTransport",
+    "build_single_flight",
+    "llm_single_flight",
+    "request_key",
+]
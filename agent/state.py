@@ -6,3 +6,4 @@ class State(TypedDict):
     messages: Annotated[list, add_messages]
     classification_decision: Optional[str]
     email_input: Optional[str]
+    summary: Optional[str]
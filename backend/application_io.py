@@ -0,0 +1,292 @@
+"""Streaming CSV/JSON import and export of applications.
+
+Uploads are parsed as their bytes arrive: `parse_rows` yields one
+`(row_number, fields)` pair per record without reading the whole body, and
+`import_applications` validates the rows with `ApplicationImportRow` and
+writes them in unordered `bulk_write` batches. Exports are rendered row by
+row from a Motor cursor.
+
+Formats:
+- csv: header row required; column names are case-insensitive and a few
+  spreadsheet aliases ("Position", "Date Applied") are understood
+- ndjson: one JSON object per line
+- json: a JSON array of objects
+
+Env vars used:
+- APPLICATION_IMPORT_BATCH_SIZE: rows per `bulk_write` (default 500)
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import json
+import os
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Literal, Tuple
+
+from pydantic import ValidationError
+
+from backend.db import applications
+from backend.models.applications import (
+    ApplicationImportRow,
+    ImportRowError,
+    ImportSummary,
+)
+
+Format = Literal["csv", "ndjson", "json"]
+
+IMPORT_BATCH_SIZE = int(os.getenv("APPLICATION_IMPORT_BATCH_SIZE", "500"))
+MAX_REPORTED_ERRORS = 1000
+
+EXPORT_COLUMNS = ("company", "role", "status", "date", "source", "resume_version", "notes")
+
+_COLUMN_ALIASES = {
+    "company name": "company",
+    "employer": "company",
+    "position": "role",
+    "title": "role",
+    "job title": "role",
+    "date applied": "date",
+    "applied on": "date",
+    "application date": "date",
+    "applied via": "source",
+    "resume": "resume_version",
+}
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+class RowError(ValueError):
+    """A record that could not be parsed; the rest of the upload continues."""
+
+
+def format_for(content_type: str) -> Format:
+    """Upload format implied by a Content-Type header (JSON by default)."""
+    content_type = content_type.split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv", "text/plain"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return "json"
+
+
+async def _text(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    # utf-8-sig drops the BOM spreadsheet exports like to add
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    async for chunk in chunks:
+        if text := decoder.decode(chunk):
+            yield text
+    if tail := decoder.decode(b"", final=True):
+        yield tail
+
+
+async def _lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    pending = ""
+    async for text in _text(chunks):
+        pending += text
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+def _column(name: str) -> str:
+    name = " ".join(name.strip().lower().replace("_", " ").split())
+    return _COLUMN_ALIASES.get(name, name.replace(" ", "_"))
+
+
+async def _parse_csv(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    header = None
+    row = 0
+    record = ""
+    async for line in _lines(chunks):
+        record += line + "\n"
+        # A quoted field may span lines; a record ends when its quotes balance
+        if record.count('"') % 2:
+            continue
+        values, record = next(csv.reader([record]), []), ""
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [_column(name) for name in values]
+            continue
+        row += 1
+        yield row, dict(zip(header, values))
+    if record.strip():
+        yield row + 1, RowError("unterminated quoted field")
+
+
+async def _parse_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    row = 0
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            yield row, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row, RowError(f"invalid JSON: {e.msg}")
+
+
+async def _parse_json_array(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    decoder = json.JSONDecoder()
+    buffer, position, row, opened = "", 0, 0, False
+    async for text in _text(chunks):
+        buffer = buffer[position:] + text
+        position = 0
+        while True:
+            # Skip whitespace and the array's punctuation between items
+            while position < len(buffer) and buffer[position] in " \t\r\n,]":
+                position += 1
+            if position < len(buffer) and not opened:
+                if buffer[position] != "[":
+                    raise RowError("expected a JSON array of objects")
+                opened = True
+                position += 1
+                continue
+            if position >= len(buffer):
+                break
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Incomplete item: wait for more of the body
+                break
+            row += 1
+            yield row, item
+    if buffer[position:].strip(" \t\r\n,]"):
+        yield row + 1, RowError("invalid or truncated JSON")
+
+
+def parse_rows(chunks: AsyncIterable[bytes], format: Format) -> AsyncIterator[Tuple[int, Any]]:
+    """Records of an upload as `(row_number, fields)`.
+
+    `fields` is a `RowError` for a record that could not be parsed.
+    """
+    parsers = {"csv": _parse_csv, "ndjson": _parse_ndjson, "json": _parse_json_array}
+    return parsers[format](chunks)
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+def _document(user_id: str, fields: Any) -> dict:
+    if isinstance(fields, Exception):
+        raise fields
+    if not isinstance(fields, dict):
+        raise RowError("expected an object")
+    try:
+        row = ApplicationImportRow.model_validate(fields)
+    except ValidationError as e:
+        raise RowError(_validation_message(e)) from None
+    return applications.new_application_doc(
+        user_id,
+        row.company,
+        row.role,
+        row.date,
+        row.source,
+        row.resume_version,
+        status=row.status,
+        notes=row.notes,
+        import_key=applications.import_key(row.company, row.role, row.date),
+    )
+
+
+async def import_applications(
+    user_id: str,
+    chunks: AsyncIterable[bytes],
+    format: Format,
+    *,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> ImportSummary:
+    """Validate and store every row of an upload, `batch_size` rows per write."""
+    summary = ImportSummary()
+    batch: List[dict] = []
+    batch_rows: List[int] = []
+
+    def fail(row: int, error: str) -> None:
+        summary.failed += 1
+        if len(summary.errors) < MAX_REPORTED_ERRORS:
+            summary.errors.append(ImportRowError(row=row, error=error))
+
+    async def flush() -> None:
+        if not batch:
+            return
+        result = await applications.bulk_import_applications(batch)
+        summary.inserted += result.inserted
+        summary.duplicates += result.duplicates
+        for index, error in sorted(result.errors.items()):
+            fail(batch_rows[index], error)
+        batch.clear()
+        batch_rows.clear()
+
+    try:
+        async for row, fields in parse_rows(chunks, format):
+            summary.received += 1
+            try:
+                batch.append(_document(user_id, fields))
+            except RowError as e:
+                fail(row, str(e))
+                continue
+            batch_rows.append(row)
+            if len(batch) >= batch_size:
+                await flush()
+    except RowError as e:
+        # The upload as a whole is unreadable (e.g. not a JSON array)
+        fail(0, str(e))
+    await flush()
+    return summary
+
+
+def _export_row(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {column: doc.get(column) for column in EXPORT_COLUMNS}
+
+
+async def export_applications(user_id: str, format: Format) -> AsyncIterator[str]:
+    """Render the user's applications in `format` as they come off the cursor."""
+    cursor = applications.export_cursor(user_id)
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        async for doc in cursor:
+            writer.writerow(
+                "" if value is None else value for value in _export_row(doc).values()
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+        return
+
+    if format == "ndjson":
+        async for doc in cursor:
+            yield json.dumps(_export_row(doc)) + "\n"
+        return
+
+    separator = "["
+    async for doc in cursor:
+        yield separator + json.dumps(_export_row(doc))
+        separator = ",\n"
+    yield "[]" if separator == "[" else "]"
+
+
+__all__ = [
+    "EXPORT_COLUMNS",
+    "IMPORT_BATCH_SIZE",
+    "MEDIA_TYPES",
+    "export_applications",
+    "format_for",
+    "import_applications",
+    "parse_rows",
+]
@@ -0,0 +1,178 @@
+"""Per-user application funnel counters.
+
+Each user has one document in `application_stats` (keyed on the user's id)
+with counts per status, per source and per ISO week of the application
+date. `backend.db.applications` applies `$inc` deltas right after every
+insert, update and delete, so reading the funnel is a single `find_one`
+however many applications the user has.
+
+The deltas are a separate write, not a transaction, so an interrupted write
+can leave the counters off by one. `rebuild_stats` recomputes them from the
+applications with an aggregation pipeline. It runs automatically when a
+user has no counter document yet, so applications stored before the
+counters existed are counted too.
+"""
+
+from __future__ import annotations
+
+from datetime import date as date_type, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from bson import ObjectId
+
+from backend.db.db import application_stats_collection, applications_collection
+
+
+UserId = Union[str, ObjectId]
+
+# Statuses that mean the company has not answered yet
+NO_RESPONSE_STATUSES = frozenset({"applied", "ghosted", "no response", "unknown"})
+
+_COUNTERS = ("by_status", "by_source", "by_week")
+
+
+def _normalize_user_id(user_id: UserId) -> ObjectId:
+    return user_id if isinstance(user_id, ObjectId) else ObjectId(str(user_id))
+
+
+def _counter_key(value: Any) -> str:
+    """Lower-cased counter name that is safe as a Mongo field name."""
+    key = str(value or "").strip().lower()
+    return key.replace(".", "_").replace("$", "_") or "unknown"
+
+
+def _week_key(value: Any) -> str:
+    """ISO week of a "YYYY-MM-DD" date ("2026-W03")."""
+    try:
+        year, week, _ = date_type.fromisoformat(str(value)[:10]).isocalendar()
+    except ValueError:
+        return "unknown"
+    return f"{year}-W{week:02d}"
+
+
+def _keys(doc: dict) -> Dict[str, str]:
+    return {
+        "by_status": _counter_key(doc.get("status")),
+        "by_source": _counter_key(doc.get("source")),
+        "by_week": _week_key(doc.get("date")),
+    }
+
+
+def _add(increments: Dict[str, int], doc: dict, sign: int) -> None:
+    increments["total"] = increments.get("total", 0) + sign
+    for counter, key in _keys(doc).items():
+        path = f"{counter}.{key}"
+        increments[path] = increments.get(path, 0) + sign
+
+
+async def _apply(user_id: ObjectId, increments: Dict[str, int]) -> None:
+    increments = {path: n for path, n in increments.items() if n}
+    if not increments:
+        return
+    result = await application_stats_collection.update_one(
+        {"_id": user_id},
+        {"$inc": increments, "$set": {"updated_at": datetime.now(timezone.utc)}},
+    )
+    if result.matched_count == 0:
+        # No counters yet: count everything, including this write
+        await rebuild_stats(user_id)
+
+
+async def record_inserted(docs: Iterable[dict]) -> None:
+    """Count newly stored application documents (any mix of users)."""
+    by_user: Dict[ObjectId, Dict[str, int]] = {}
+    for doc in docs:
+        _add(by_user.setdefault(doc["user_id"], {}), doc, +1)
+    for user_id, increments in by_user.items():
+        await _apply(user_id, increments)
+
+
+async def record_updated(user_id: UserId, before: dict, after: dict) -> None:
+    """Move one application between counters after an update."""
+    increments: Dict[str, int] = {}
+    _add(increments, before, -1)
+    _add(increments, after, +1)
+    await _apply(_normalize_user_id(user_id), increments)
+
+
+async def delete_stats(user_id: UserId) -> None:
+    await application_stats_collection.delete_one({"_id": _normalize_user_id(user_id)})
+
+
+def _group_by(field: str) -> List[dict]:
+    return [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+
+
+async def rebuild_stats(user_id: UserId) -> dict:
+    """Recompute a user's counters from their applications and store them."""
+    user_oid = _normalize_user_id(user_id)
+    pipeline = [
+        {"$match": {"user_id": user_oid}},
+        {
+            "$facet": {
+                "by_status": _group_by("status"),
+                "by_source": _group_by("source"),
+                # Grouped on the raw date; weeks are folded below with `_week_key`
+                "by_week": _group_by("date"),
+            }
+        },
+    ]
+    facets = (await applications_collection.aggregate(pipeline).to_list(length=1))[0]
+
+    stats: Dict[str, Any] = {"_id": user_oid}
+    for counter in _COUNTERS:
+        key = _week_key if counter == "by_week" else _counter_key
+        counts: Dict[str, int] = {}
+        for group in facets[counter]:
+            name = key(group["_id"])
+            counts[name] = counts.get(name, 0) + group["count"]
+        stats[counter] = counts
+    stats["total"] = sum(stats["by_status"].values())
+    stats["updated_at"] = datetime.now(timezone.utc)
+
+    await application_stats_collection.replace_one({"_id": user_oid}, stats, upsert=True)
+    return stats
+
+
+def _funnel(stats: dict, weeks: Optional[int]) -> dict:
+    counters = {
+        counter: {k: n for k, n in (stats.get(counter) or {}).items() if n > 0}
+        for counter in _COUNTERS
+    }
+    total = max(stats.get("total", 0), 0)
+    waiting = sum(
+        n for status, n in counters["by_status"].items() if status in NO_RESPONSE_STATUSES
+    )
+    by_week = dict(sorted(counters["by_week"].items()))
+    if weeks is not None:
+        by_week = dict(list(by_week.items())[-weeks:])
+    return {
+        "total": total,
+        "by_status": dict(sorted(counters["by_status"].items(), key=lambda kv: -kv[1])),
+        "by_source": dict(sorted(counters["by_source"].items(), key=lambda kv: -kv[1])),
+        "by_week": by_week,
+        "response_rate": round((total - waiting) / total, 3) if total else 0.0,
+    }
+
+
+async def get_stats(user_id: UserId, *, weeks: Optional[int] = None) -> dict:
+    """Funnel statistics for a user: totals per status, source and week.
+
+    `response_rate` is the share of applications whose status shows the
+    company answered. `weeks` keeps only the most recent weeks.
+    """
+    user_oid = _normalize_user_id(user_id)
+    stats = await application_stats_collection.find_one({"_id": user_oid})
+    if stats is None:
+        stats = await rebuild_stats(user_oid)
+    return _funnel(stats, weeks)
+
+
+__all__ = [
+    "NO_RESPONSE_STATUSES",
+    "delete_stats",
+    "get_stats",
+    "rebuild_stats",
+    "record_inserted",
+    "record_updated",
+]
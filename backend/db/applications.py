@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from bson import ObjectId
+from pymongo import DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from pymongo.results import BulkWriteResult
+
+from backend.db import application_stats
+from backend.db.company_index import CompanyIndex, CompanyResolution, company_indexes
+from backend.db.db import applications_collection
+
+
+UserId = Union[str, ObjectId]
+
+# Fields the agent sees; everything else stays in the database
+APPLICATION_PROJECTION = {
+    "_id": 0,
+    "company": 1,
+    "role": 1,
+    "status": 1,
+    "date": 1,
+    "source": 1,
+    "resume_version": 1,
+}
+
+# Columns of an export, in order
+EXPORT_PROJECTION = {**APPLICATION_PROJECTION, "notes": 1}
+
+UPDATABLE_FIELDS = frozenset(
+    {"company", "role", "status", "date", "source", "resume_version", "notes"}
+)
+
+# Identity of an email-derived application: one email may confirm several
+EMAIL_APPLICATION_KEY = ("email_id", "company_normalized", "role")
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def _normalize_user_id(user_id: UserId) -> ObjectId:
+    return user_id if isinstance(user_id, ObjectId) else ObjectId(str(user_id))
+
+
+def normalize_company(company: str) -> str:
+    """Case- and punctuation-insensitive company key ("Google, Inc." -> "google inc")."""
+    return _NON_ALNUM_RE.sub(" ", company.lower()).strip()
+
+
+async def company_index(user_id: UserId, *, refresh: bool = False) -> CompanyIndex:
+    """The user's company index, loaded from Mongo on first use."""
+    user_key = str(_normalize_user_id(user_id))
+    if not refresh and (index := company_indexes.get(user_key)) is not None:
+        return index
+    cursor = applications_collection.find(
+        {"user_id": _normalize_user_id(user_id)},
+        {"_id": 0, "company": 1, "company_normalized": 1},
+    )
+    index = CompanyIndex(
+        (doc.get("company") or doc["company_normalized"], doc["company_normalized"])
+        for doc in await cursor.to_list(length=None)
+        if doc.get("company_normalized")
+    )
+    company_indexes.put(user_key, index)
+    return index
+
+
+async def resolve_company(user_id: UserId, company: str) -> CompanyResolution:
+    """Match a free-text company name against the user's applications.
+
+    Returns the winning company, or ranked candidates when several are
+    close. A name with no candidates reloads the index once, in case
+    another worker stored it.
+    """
+    normalized = normalize_company(company)
+    resolution = (await company_index(user_id)).resolve(normalized)
+    if resolution.match is None and not resolution.candidates:
+        resolution = (await company_index(user_id, refresh=True)).resolve(normalized)
+    return resolution
+
+
+def new_application_doc(
+    user_id: UserId,
+    company: str,
+    role: str,
+    date: str,
+    source: str,
+    resume_version: Optional[str] = None,
+    *,
+    status: str = "applied",
+    **extra: Any,
+) -> dict:
+    """Build an application document ready to be inserted."""
+    now = datetime.now(timezone.utc)
+    return {
+        "user_id": _normalize_user_id(user_id),
+        "company": company,
+        "company_normalized": normalize_company(company),
+        "role": role,
+        "status": status,
+        "date": date,
+        "source": source,
+        "resume_version": resume_version,
+        "created_at": now,
+        "updated_at": now,
+        **extra,
+    }
+
+
+async def create_application(
+    user_id: UserId,
+    company: str,
+    role: str,
+    date: str,
+    source: str,
+    resume_version: Optional[str] = None,
+    *,
+    status: str = "applied",
+) -> dict:
+    """Insert a new application and return the stored document."""
+    doc = new_application_doc(
+        user_id, company, role, date, source, resume_version, status=status
+    )
+    insert_result = await applications_collection.insert_one(doc)
+    doc["_id"] = insert_result.inserted_id
+    await _record_new([doc])
+    return doc
+
+
+def _upsert_operations(docs: List[dict], keys: Sequence[str]) -> List[UpdateOne]:
+    return [
+        UpdateOne(
+            {"user_id": doc["user_id"], **{key: doc[key] for key in keys}},
+            {"$setOnInsert": doc},
+            upsert=True,
+        )
+        for doc in docs
+    ]
+
+
+async def _record_new(docs: Iterable[dict]) -> None:
+    """Keep the company index and funnel counters in sync with new documents."""
+    docs = list(docs)
+    for doc in docs:
+        company_indexes.add(str(doc["user_id"]), doc["company"], doc["company_normalized"])
+    await application_stats.record_inserted(docs)
+
+
+async def bulk_insert_from_emails(docs: List[dict]) -> BulkWriteResult:
+    """Insert email-derived applications in one unordered `bulk_write`.
+
+    Each document must carry `email_id`. An email may confirm several
+    applications, so documents are keyed on the email, company and role
+    (`EMAIL_APPLICATION_KEY`); ones already stored for the user are left
+    untouched, so re-running a batch is safe.
+    """
+    result = await applications_collection.bulk_write(
+        _upsert_operations(docs, EMAIL_APPLICATION_KEY), ordered=False
+    )
+    # Only upserted documents are new; the rest were already counted
+    await _record_new(docs[i] for i in result.upserted_ids)
+    return result
+
+
+def import_key(company: str, role: str, date: str) -> str:
+    """Identity of an imported row, so re-uploading a file adds nothing."""
+    raw = "|".join((normalize_company(company), role.strip().lower(), date))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+@dataclass
+class ImportBatchResult:
+    inserted: int = 0
+    duplicates: int = 0
+    # Position in the batch -> error message
+    errors: Dict[int, str] = field(default_factory=dict)
+
+
+async def bulk_import_applications(docs: List[dict]) -> ImportBatchResult:
+    """Insert imported applications in one unordered `bulk_write`.
+
+    Each document must carry `import_key` (see `import_key`); rows imported
+    before are counted as duplicates. A failing row does not stop the rest
+    of the batch and is reported by its position in `docs`.
+    """
+    try:
+        result = await applications_collection.bulk_write(
+            _upsert_operations(docs, ("import_key",)), ordered=False
+        )
+        upserted, errors = set(result.upserted_ids), {}
+    except BulkWriteError as e:
+        upserted = {u["index"] for u in e.details.get("upserted", [])}
+        errors = {
+            w["index"]: w.get("errmsg", "write failed")
+            for w in e.details.get("writeErrors", [])
+        }
+    await _record_new(docs[i] for i in sorted(upserted))
+    return ImportBatchResult(
+        inserted=len(upserted),
+        duplicates=len(docs) - len(upserted) - len(errors),
+        errors=errors,
+    )
+
+
+def export_cursor(user_id: UserId, *, batch_size: int = 500):
+    """Cursor over all of a user's applications, most recent first."""
+    return (
+        applications_collection.find(
+            {"user_id": _normalize_user_id(user_id)}, EXPORT_PROJECTION
+        )
+        .sort("date", DESCENDING)
+        .batch_size(batch_size)
+    )
+
+
+async def update_application(
+    user_id: UserId,
+    company: str,
+    updates: Dict[str, Any],
+    *,
+    resolution: Optional[CompanyResolution] = None,
+) -> Optional[dict]:
+    """Apply `updates` to the user's most recent application to `company`.
+
+    `company` is resolved with `resolve_company`, so "Google LLC" or a typo
+    finds the stored "Google"; callers that already resolved it pass
+    `resolution` to skip the lookup. Unknown fields are ignored. Returns the
+    projected, updated document or None if no single company matches.
+    """
+    if resolution is None:
+        resolution = await resolve_company(user_id, company)
+    if resolution.match is None:
+        return None
+
+    update_fields = {k: v for k, v in updates.items() if k in UPDATABLE_FIELDS}
+    if "company" in update_fields:
+        update_fields["company_normalized"] = normalize_company(update_fields["company"])
+    update_fields["updated_at"] = datetime.now(timezone.utc)
+
+    # The previous values are needed to move the application between counters
+    before = await applications_collection.find_one_and_update(
+        {
+            "user_id": _normalize_user_id(user_id),
+            "company_normalized": {"$in": list(resolution.match.keys)},
+        },
+        {"$set": update_fields},
+        sort=[("date", DESCENDING)],
+        projection=APPLICATION_PROJECTION,
+        return_document=ReturnDocument.BEFORE,
+    )
+    if before is None or "company" in update_fields:
+        # Renamed here, or the match was stale: rebuild the index on next use
+        company_indexes.invalidate(str(_normalize_user_id(user_id)))
+    if before is None:
+        return None
+    updated = {
+        **before,
+        **{k: v for k, v in update_fields.items() if k in APPLICATION_PROJECTION},
+    }
+    await application_stats.record_updated(user_id, before, updated)
+    return updated
+
+
+async def list_applications(
+    user_id: UserId, status: Optional[str] = None, limit: int = 100
+) -> List[dict]:
+    """Most recent applications for a user, optionally filtered by status."""
+    query: dict = {"user_id": _normalize_user_id(user_id)}
+    if status:
+        query["status"] = status
+    cursor = (
+        applications_collection.find(query, APPLICATION_PROJECTION)
+        .sort("date", DESCENDING)
+        .limit(limit)
+    )
+    return await cursor.to_list(length=limit)
+
+
+async def delete_applications_for_user(user_id: UserId) -> int:
+    result = await applications_collection.delete_many(
+        {"user_id": _normalize_user_id(user_id)}
+    )
+    company_indexes.invalidate(str(_normalize_user_id(user_id)))
+    await application_stats.delete_stats(user_id)
+    return result.deleted_count or 0
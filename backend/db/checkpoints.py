@@ -0,0 +1,196 @@
+"""LangGraph checkpointer stored in the shared Motor database.
+
+Each checkpoint is one document in `checkpoints`, serialized with the
+saver's serde (msgpack via JsonPlusSerializer) into a BSON Binary; pending
+writes live in `checkpoint_writes`. Both collections are indexed on the
+thread id and expire through TTL indexes on `updated_at` (see
+`init_indexes`), so abandoned threads clean themselves up.
+
+Only the async API is implemented: the graph must be driven with
+`ainvoke`/`astream`, which is how the backend runs it.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional, Sequence
+
+from bson import Binary
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import DESCENDING, UpdateOne
+
+from backend.db.db import checkpoint_writes_collection, checkpoints_collection
+
+
+class MongoCheckpointSaver(BaseCheckpointSaver[int]):
+    def __init__(
+        self,
+        checkpoints: AsyncIOMotorCollection = checkpoints_collection,
+        writes: AsyncIOMotorCollection = checkpoint_writes_collection,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.checkpoints = checkpoints
+        self.writes = writes
+
+    def _dump(self, value: Any) -> Dict[str, Any]:
+        type_, data = self.serde.dumps_typed(value)
+        return {"type": type_, "data": Binary(data)}
+
+    def _load(self, stored: Dict[str, Any]) -> Any:
+        return self.serde.loads_typed((stored["type"], bytes(stored["data"])))
+
+    @staticmethod
+    def _config(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> RunnableConfig:
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+            }
+        }
+
+    async def _to_tuple(self, doc: dict) -> CheckpointTuple:
+        thread_id, checkpoint_ns = doc["thread_id"], doc["checkpoint_ns"]
+        writes = self.writes.find(
+            {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": doc["checkpoint_id"],
+            }
+        ).sort([("task_id", 1), ("idx", 1)])
+        pending_writes = [
+            (w["task_id"], w["channel"], self._load(w["value"])) async for w in writes
+        ]
+        parent_id = doc.get("parent_checkpoint_id")
+        return CheckpointTuple(
+            config=self._config(thread_id, checkpoint_ns, doc["checkpoint_id"]),
+            checkpoint=self._load(doc["checkpoint"]),
+            metadata=self._load(doc["metadata"]),
+            parent_config=(
+                self._config(thread_id, checkpoint_ns, parent_id) if parent_id else None
+            ),
+            pending_writes=pending_writes,
+        )
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        query = {
+            "thread_id": config["configurable"]["thread_id"],
+            "checkpoint_ns": config["configurable"].get("checkpoint_ns", ""),
+        }
+        if checkpoint_id := get_checkpoint_id(config):
+            query["checkpoint_id"] = checkpoint_id
+        doc = await self.checkpoints.find_one(
+            query, sort=[("checkpoint_id", DESCENDING)]
+        )
+        return await self._to_tuple(doc) if doc else None
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        query: Dict[str, Any] = {}
+        if config:
+            query["thread_id"] = config["configurable"]["thread_id"]
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                query["checkpoint_ns"] = checkpoint_ns
+            if checkpoint_id := get_checkpoint_id(config):
+                query["checkpoint_id"] = checkpoint_id
+        if before and (before_id := get_checkpoint_id(before)):
+            exact = query.pop("checkpoint_id", None)
+            query["checkpoint_id"] = {"$lt": before_id}
+            if exact:
+                query["checkpoint_id"]["$eq"] = exact
+
+        remaining = limit
+        async for doc in self.checkpoints.find(query).sort("checkpoint_id", DESCENDING):
+            if remaining is not None and remaining <= 0:
+                break
+            item = await self._to_tuple(doc)
+            if filter and not all(item.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if remaining is not None:
+                remaining -= 1
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        await self.checkpoints.update_one(
+            {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            },
+            {
+                "$set": {
+                    "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+                    "checkpoint": self._dump(checkpoint),
+                    "metadata": self._dump(get_checkpoint_metadata(config, metadata)),
+                    "updated_at": datetime.now(timezone.utc),
+                }
+            },
+            upsert=True,
+        )
+        return self._config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        now = datetime.now(timezone.utc)
+        operations = []
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            key = {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+                "task_id": task_id,
+                "idx": write_idx,
+            }
+            fields = {
+                "channel": channel,
+                "value": self._dump(value),
+                "task_path": task_path,
+                "updated_at": now,
+            }
+            # Regular writes are kept once; special channels overwrite
+            update = {"$setOnInsert": fields} if write_idx >= 0 else {"$set": fields}
+            operations.append(UpdateOne(key, update, upsert=True))
+        if operations:
+            await self.writes.bulk_write(operations, ordered=False)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self.checkpoints.delete_many({"thread_id": thread_id})
+        await self.writes.delete_many({"thread_id": thread_id})
+
+
+__all__ = ["MongoCheckpointSaver"]
@@ -0,0 +1,240 @@
+"""In-memory index of each user's company names for fuzzy lookups.
+
+`update_application` receives whatever the user typed ("google", "Google
+LLC", "Alphabet/Google", "gogle"). Stored applications carry the persisted
+`company_normalized` key (see `normalize_company`), which only matches the
+exact spelling. `CompanyIndex` groups a user's keys under a canonical name
+(legal suffixes such as "inc" or "llc" dropped) and resolves a free-text
+name through exact, token-subset, trigram and edit-distance matching. Nothing
+here touches Mongo: `backend.db.applications` loads a user's index with one
+query on `user_company_idx` and keeps it in sync on insert and update.
+
+Env vars used:
+- COMPANY_INDEX_MAX_USERS: per-user indexes kept in memory (default 10000)
+- COMPANY_MATCH_MIN_SCORE: lowest score that counts as a match (default 0.6)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Dropped from canonical names, so "Google LLC" and "google" are one company
+_LEGAL_SUFFIXES = frozenset(
+    "ag co company corp corporation gmbh group inc incorporated limited llc llp "
+    "ltd plc sa the".split()
+)
+
+MIN_SCORE = float(os.getenv("COMPANY_MATCH_MIN_SCORE", "0.6"))
+# Candidates this close to the best one make the lookup ambiguous
+AMBIGUITY_MARGIN = 0.1
+MAX_CANDIDATES = 5
+# Names sharing fewer trigrams than this skip the edit-distance check
+_MIN_JACCARD = 0.2
+
+
+def canonical_company(normalized: str) -> str:
+    """Canonical form of a `normalize_company` key ("google llc" -> "google")."""
+    tokens = normalized.split()
+    kept = [t for t in tokens if t not in _LEGAL_SUFFIXES]
+    return " ".join(kept or tokens)
+
+
+def _trigrams(name: str) -> Set[str]:
+    padded = f"  {name} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            )
+        previous = current
+    return previous[-1]
+
+
+def _token_score(query: List[str], name: List[str]) -> float:
+    query_set, name_set = set(query), set(name)
+    # "alphabet google" vs "google", "meta" vs "meta platforms"
+    if query_set <= name_set or name_set <= query_set:
+        return 0.9
+    # "jane st" vs "jane street"
+    if len(query) <= len(name) and all(n.startswith(q) for q, n in zip(query, name)):
+        return 0.8
+    # "aws" vs "amazon web services"
+    if len(query) == 1 and len(name) > 1 and query[0] == "".join(t[0] for t in name):
+        return 0.8
+    return 0.0
+
+
+def _score(query: str, name: str, jaccard: float) -> float:
+    if query == name:
+        return 1.0
+    if token := _token_score(query.split(), name.split()):
+        return token
+    if jaccard < _MIN_JACCARD:
+        return 0.0
+    edit = 1 - _edit_distance(query, name) / max(len(query), len(name))
+    return 0.85 * max(jaccard, edit)
+
+
+@dataclass(frozen=True)
+class CompanyMatch:
+    """One canonical company and the stored keys that belong to it."""
+
+    company: str
+    canonical: str
+    keys: Tuple[str, ...]
+    score: float
+
+
+@dataclass
+class CompanyResolution:
+    """Outcome of `CompanyIndex.resolve`.
+
+    `match` is set when one company clearly wins. Otherwise `candidates`
+    lists the best ones, highest score first (empty when nothing is close).
+    """
+
+    match: Optional[CompanyMatch] = None
+    candidates: List[CompanyMatch] = field(default_factory=list)
+
+    @property
+    def ambiguous(self) -> bool:
+        return self.match is None and bool(self.candidates)
+
+
+class CompanyIndex:
+    """Company names of one user, with trigram and token lookups."""
+
+    def __init__(self, companies: Iterable[Tuple[str, str]] = ()) -> None:
+        # canonical -> {company_normalized: display name}
+        self._names: Dict[str, Dict[str, str]] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._by_gram: Dict[str, Set[str]] = {}
+        self._by_initial: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        for company, normalized in companies:
+            self.add(company, normalized)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, company: str, normalized: str) -> None:
+        canonical = canonical_company(normalized)
+        if not canonical:
+            return
+        with self._lock:
+            keys = self._names.get(canonical)
+            if keys is None:
+                keys = self._names[canonical] = {}
+                grams = self._grams[canonical] = _trigrams(canonical)
+                for gram in grams:
+                    self._by_gram.setdefault(gram, set()).add(canonical)
+                self._by_initial.setdefault(canonical[0], set()).add(canonical)
+            keys.setdefault(normalized, company)
+
+    def _candidates(self, query: str, grams: Set[str]) -> Dict[str, float]:
+        """Names sharing a token prefix or a trigram with `query`, with their
+        trigram Jaccard similarity."""
+        overlaps: Dict[str, int] = {}
+        for gram in grams:
+            for name in self._by_gram.get(gram, ()):
+                overlaps[name] = overlaps.get(name, 0) + 1
+        first = query.split()[0]
+        for name in self._by_initial.get(first[0], ()):
+            overlaps.setdefault(name, 0)
+        return {
+            name: overlap / (len(grams) + len(self._grams[name]) - overlap)
+            for name, overlap in overlaps.items()
+        }
+
+    def resolve(self, normalized: str) -> CompanyResolution:
+        """Resolve a `normalize_company` key to one company or ranked candidates."""
+        query = canonical_company(normalized)
+        if not query:
+            return CompanyResolution()
+        grams = _trigrams(query)
+        with self._lock:
+            scored = []
+            for canonical, jaccard in self._candidates(query, grams).items():
+                score = _score(query, canonical, jaccard)
+                if score >= MIN_SCORE:
+                    keys = self._names[canonical]
+                    scored.append(
+                        CompanyMatch(
+                            company=next(iter(keys.values())),
+                            canonical=canonical,
+                            keys=tuple(keys),
+                            score=round(score, 3),
+                        )
+                    )
+        scored.sort(key=lambda match: (-match.score, match.canonical))
+        candidates = scored[:MAX_CANDIDATES]
+        if not candidates:
+            return CompanyResolution()
+        best = candidates[0]
+        if best.score == 1.0 or len(candidates) == 1 or (
+            candidates[1].score < best.score - AMBIGUITY_MARGIN
+        ):
+            return CompanyResolution(match=best, candidates=candidates)
+        return CompanyResolution(candidates=candidates)
+
+
+class CompanyIndexRegistry:
+    """Bounded LRU of per-user `CompanyIndex`es."""
+
+    def __init__(self, max_users: int = 10000) -> None:
+        self.max_users = max_users
+        self._indexes: "OrderedDict[str, CompanyIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_key: str) -> Optional[CompanyIndex]:
+        with self._lock:
+            index = self._indexes.get(user_key)
+            if index is not None:
+                self._indexes.move_to_end(user_key)
+            return index
+
+    def put(self, user_key: str, index: CompanyIndex) -> None:
+        with self._lock:
+            self._indexes[user_key] = index
+            self._indexes.move_to_end(user_key)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+
+    def add(self, user_key: str, company: str, normalized: str) -> None:
+        """Record a stored company; users not loaded yet pick it up on load."""
+        if (index := self.get(user_key)) is not None:
+            index.add(company, normalized)
+
+    def invalidate(self, user_key: str) -> None:
+        with self._lock:
+            self._indexes.pop(user_key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+
+# Shared by every request in this process
+company_indexes = CompanyIndexRegistry(int(os.getenv("COMPANY_INDEX_MAX_USERS", "10000")))
+
+
+__all__ = [
+    "CompanyIndex",
+    "CompanyIndexRegistry",
+    "CompanyMatch",
+    "CompanyResolution",
+    "canonical_company",
+    "company_indexes",
+]
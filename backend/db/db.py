@@ -1,7 +1,13 @@
 """Application-wide MongoDB setup (async via Motor).
 
 This module exposes a singleton Mongo client and database, ready to be imported
-and used anywhere in the app. It also provides convenience helpers for:
+and used anywhere in the app. The API opens the client in its `lifespan`
+(`open_client`), so each worker process gets its own client and connection
+pool, bound to the event loop that serves its requests. Scripts and the
+agent fall back to creating it on first use. Importing the DAL never starts
+Motor's background monitoring or requires Mongo settings, and a client
+inherited across `fork` (e.g. `gunicorn --preload`) is replaced rather than
+shared with the parent. It also provides convenience helpers for:
 
 - Getting collections and the database instance
 - FastAPI dependency injection of the database
@@ -11,22 +17,35 @@ and used anywhere in the app. It also provides convenience helpers for:
 Env vars used:
 - MONGO_URI: Mongo connection string
 - MONGODB_DATABASE or MONGO_DB: Database name
+- MONGO_MAX_POOL_SIZE: connections per worker process (driver default 100)
+- MONGO_MIN_POOL_SIZE: connections kept open while idle (driver default 0)
+- MONGO_MAX_IDLE_TIME_MS: close pooled connections idle this long
+- MONGO_COMPRESSORS: wire compression, e.g. "zstd,zlib" (zstd and snappy
+  need the `zstandard` / `python-snappy` packages)
+- MONGO_READ_PREFERENCE: primary (default), primaryPreferred, secondary,
+  secondaryPreferred or nearest
+- MONGO_SERVER_SELECTION_TIMEOUT_MS: default 5000
+- CLASSIFIER_CACHE_BACKEND / CLASSIFIER_CACHE_COLLECTION: with "mongo", the
+  cache collection's TTL index is created by `init_indexes`
+
+Pool options left unset keep whatever the connection string specifies.
 """
 
 from __future__ import annotations
 
-from typing import AsyncIterator
+import os
+import threading
+from typing import Any, AsyncIterator, Dict, Optional, Tuple, cast
 
 from motor.motor_asyncio import (
     AsyncIOMotorClient,
     AsyncIOMotorCollection,
     AsyncIOMotorDatabase,
 )
+from pymongo.errors import OperationFailure
 from starlette.config import Config
 
-import os
-print("CWD:", os.getcwd())
-print("Exists:", os.path.exists(".env"))
+from backend.metrics import METRICS_ENABLED, mongo_listener
 
 # Read environment variables (falls back to .env in local dev)
 _config = Config(".env")
@@ -48,48 +67,254 @@ def _get_required_config(*names: str) -> str:
     raise RuntimeError(f"Missing required environment variable(s): {tried}")
 
 
-# Create a single, module-level client and database for reuse
-_MONGO_URI: str = _get_required_config("MONGO_URI")
-_MONGO_DB_NAME: str = _get_required_config("MONGODB_DATABASE", "MONGO_DB")
+def mongo_settings() -> Tuple[str, str]:
+    """Return the configured (connection string, database name)."""
+    return (
+        _get_required_config("MONGO_URI"),
+        _get_required_config("MONGODB_DATABASE", "MONGO_DB"),
+    )
+
 
-client: AsyncIOMotorClient = AsyncIOMotorClient(
-    _MONGO_URI,
-    uuidRepresentation="standard",
-    tz_aware=True,
-    serverSelectionTimeoutMS=5000,
+_READ_PREFERENCES = (
+    "primary",
+    "primaryPreferred",
+    "secondary",
+    "secondaryPreferred",
+    "nearest",
 )
 
-db: AsyncIOMotorDatabase = client.get_database(_MONGO_DB_NAME)
 
-# Commonly used collections
-users_collection: AsyncIOMotorCollection = db.get_collection("users")
-tokens_collection: AsyncIOMotorCollection = db.get_collection("tokens")
+def mongo_client_options() -> Dict[str, Any]:
+    """Keyword arguments for `AsyncIOMotorClient` from the pool settings."""
+    options: Dict[str, Any] = {
+        "uuidRepresentation": "standard",
+        "tz_aware": True,
+        "serverSelectionTimeoutMS": _config(
+            "MONGO_SERVER_SELECTION_TIMEOUT_MS", cast=int, default=5000
+        ),
+        "event_listeners": [mongo_listener] if METRICS_ENABLED else [],
+    }
+    for name, option in (
+        ("MONGO_MAX_POOL_SIZE", "maxPoolSize"),
+        ("MONGO_MIN_POOL_SIZE", "minPoolSize"),
+        ("MONGO_MAX_IDLE_TIME_MS", "maxIdleTimeMS"),
+    ):
+        value = _config(name, default=None)
+        if value:
+            options[option] = int(value)
+    compressors = _config("MONGO_COMPRESSORS", default=None)
+    if compressors:
+        options["compressors"] = [c.strip() for c in compressors.split(",") if c.strip()]
+    read_preference = _config("MONGO_READ_PREFERENCE", default=None)
+    if read_preference:
+        # Fail at startup on a typo rather than on the first query
+        if read_preference not in _READ_PREFERENCES:
+            raise RuntimeError(f"Invalid MONGO_READ_PREFERENCE: {read_preference}")
+        options["readPreference"] = read_preference
+    return options
+
+
+# The shared client and database, created by `open_client` or `get_client`
+_client: Optional[AsyncIOMotorClient] = None
+_db: Optional[AsyncIOMotorDatabase] = None
+# Process that created `_client`; a forked child must not reuse its sockets
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def _create_client() -> None:
+    global _client, _db, _client_pid
+    uri, db_name = mongo_settings()
+    client = AsyncIOMotorClient(uri, **mongo_client_options())
+    _db = client.get_database(db_name)
+    _client = client
+    _client_pid = os.getpid()
+
+
+def open_client() -> AsyncIOMotorClient:
+    """Create this process's client; call from `lifespan`, inside the event loop.
+
+    Replaces a client created earlier (at import by a script, or inherited
+    from the parent of a forked worker), so requests never share a pool with
+    another process or loop.
+    """
+    global _client, _db
+    with _client_lock:
+        previous, same_process = _client, _client_pid == os.getpid()
+        _client, _db = None, None
+        _create_client()
+    if previous is not None and same_process:
+        previous.close()
+    return cast(AsyncIOMotorClient, _client)
+
+
+def get_client() -> AsyncIOMotorClient:
+    """Return the shared client, creating it on first use."""
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _create_client()
+    return cast(AsyncIOMotorClient, _client)
 
 
 def get_database() -> AsyncIOMotorDatabase:
     """Return the shared database instance."""
-    return db
+    get_client()
+    return cast(AsyncIOMotorDatabase, _db)
 
 
 def get_collection(name: str) -> AsyncIOMotorCollection:
     """Return a collection by name from the shared database."""
-    return db.get_collection(name)
+    return get_database().get_collection(name)
+
+
+class _LazyCollection:
+    """Module-level stand-in for a collection of the shared database.
+
+    Attribute access is forwarded to the real collection, which is resolved
+    (creating the client if needed) on first use.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._collection: Optional[AsyncIOMotorCollection] = None
+
+    def _resolve(self) -> AsyncIOMotorCollection:
+        database = get_database()
+        if self._db is not database:
+            self._db, self._collection = database, database.get_collection(self._name)
+        return cast(AsyncIOMotorCollection, self._collection)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._resolve(), attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy collection {self._name!r}>"
+
+
+def __getattr__(name: str) -> Any:
+    # `client` and `db` are kept as module attributes for existing imports
+    if name == "client":
+        return get_client()
+    if name == "db":
+        return get_database()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Commonly used collections
+users_collection = cast(AsyncIOMotorCollection, _LazyCollection("users"))
+tokens_collection = cast(AsyncIOMotorCollection, _LazyCollection("tokens"))
+applications_collection = cast(AsyncIOMotorCollection, _LazyCollection("applications"))
+application_stats_collection = cast(
+    AsyncIOMotorCollection, _LazyCollection("application_stats")
+)
+checkpoints_collection = cast(AsyncIOMotorCollection, _LazyCollection("checkpoints"))
+checkpoint_writes_collection = cast(
+    AsyncIOMotorCollection, _LazyCollection("checkpoint_writes")
+)
+
+# Conversation threads untouched for this long are removed by TTL indexes
+CHECKPOINT_TTL_SECONDS: int = _config(
+    "CHECKPOINT_TTL_SECONDS", cast=int, default=30 * 24 * 3600
+)
+
+# Tokens that have not been revoked. Written as a $type match (rather than
+# `revoked_at: None`) so it can double as a partial index filter; token
+# documents always carry an explicit `revoked_at`.
+ACTIVE_TOKEN_FILTER: dict = {"revoked_at": {"$type": "null"}}
+REVOKED_TOKEN_FILTER: dict = {"revoked_at": {"$type": "date"}}
+
+# Revoked tokens are kept this long (for auditing) before a TTL index removes them
+TOKEN_REVOKED_RETENTION_SECONDS: int = _config(
+    "TOKEN_REVOKED_RETENTION_SECONDS", cast=int, default=30 * 24 * 3600
+)
+
+# Server error codes: index (or its collection) missing, index exists with
+# other options
+_INDEX_NOT_FOUND = (26, 27)
+_INDEX_OPTIONS_CONFLICT = 85
 
 
 async def mongo_db_dependency() -> AsyncIterator[AsyncIOMotorDatabase]:
     """FastAPI dependency that yields the shared database instance."""
-    yield db
+    yield get_database()
 
 
 async def ping() -> bool:
     """Ping the database to verify connectivity. Returns True on success."""
     try:
-        await db.command("ping")
+        await get_database().command("ping")
         return True
     except Exception:
         return False
 
 
+async def _create_ttl_index(
+    collection: AsyncIOMotorCollection, field: str, name: str, seconds: int, **kwargs: Any
+) -> None:
+    """Create a TTL index, or update its expiry if the setting changed."""
+    try:
+        await collection.create_index(
+            [(field, 1)], name=name, expireAfterSeconds=seconds, **kwargs
+        )
+    except OperationFailure as e:
+        if e.code != _INDEX_OPTIONS_CONFLICT:
+            raise
+        await collection.database.command(
+            "collMod",
+            collection.name,
+            index={"name": name, "expireAfterSeconds": seconds},
+        )
+
+
+async def _drop_index(collection: AsyncIOMotorCollection, name: str) -> None:
+    """Drop a retired index if it is still there."""
+    if name not in await collection.index_information():
+        return
+    try:
+        await collection.drop_index(name)
+    except OperationFailure as e:
+        # Another worker dropped it first
+        if e.code not in _INDEX_NOT_FOUND:
+            raise
+
+
+async def init_token_indexes(collection: AsyncIOMotorCollection) -> None:
+    """Create the token indexes on `collection` (idempotent)."""
+    # Every token query targets either active tokens (the partial unique
+    # index) or revoked ones, so no index carries both. The old full-collection
+    # `user_provider_idx` and `revoked_idx` are dropped.
+    await _drop_index(collection, "user_provider_idx")
+    await _drop_index(collection, "revoked_idx")
+    # At most one active token per user+provider; lets save_or_rotate_token
+    # upsert atomically without racing concurrent logins
+    await collection.create_index(
+        [("user_id", 1), ("provider", 1)],
+        name="active_user_provider_unique",
+        unique=True,
+        partialFilterExpression=ACTIVE_TOKEN_FILTER,
+    )
+    await collection.create_index(
+        [("session_id", 1)],
+        name="session_idx",
+        unique=False,
+    )
+    # Revoked tokens per user (account deletion), then removed after retention
+    await collection.create_index(
+        [("user_id", 1)],
+        name="revoked_user_idx",
+        partialFilterExpression=REVOKED_TOKEN_FILTER,
+    )
+    await _create_ttl_index(
+        collection,
+        "revoked_at",
+        "revoked_at_ttl",
+        TOKEN_REVOKED_RETENTION_SECONDS,
+        partialFilterExpression=REVOKED_TOKEN_FILTER,
+    )
+
+
 async def init_indexes() -> None:
     """Create indexes required by the application (idempotent)."""
     # Unique user identity per provider
@@ -99,26 +324,75 @@ async def init_indexes() -> None:
         name="provider_providerId_unique",
     )
 
-    # Token/session indexes
-    await tokens_collection.create_index(
-        [("user_id", 1), ("provider", 1)],
-        name="user_provider_idx",
-        unique=False,
+    await init_token_indexes(tokens_collection)
+
+    # Application indexes: status/date listings and company lookups per user
+    await applications_collection.create_index(
+        [("user_id", 1), ("status", 1), ("date", -1)],
+        name="user_status_date_idx",
     )
-    await tokens_collection.create_index(
-        [("session_id", 1)],
-        name="session_idx",
-        unique=False,
+    await applications_collection.create_index(
+        [("user_id", 1), ("company_normalized", 1)],
+        name="user_company_idx",
     )
-    await tokens_collection.create_index(
-        [("revoked_at", 1)],
-        name="revoked_idx",
-        unique=False,
+    # Idempotent mailbox ingestion: one application per source email, company
+    # and role. `user_email_unique` allowed only one per email and is dropped.
+    await _drop_index(applications_collection, "user_email_unique")
+    await applications_collection.create_index(
+        [("user_id", 1), ("email_id", 1), ("company_normalized", 1), ("role", 1)],
+        name="user_email_application_unique",
+        unique=True,
+        partialFilterExpression={"email_id": {"$exists": True}},
+    )
+    # Idempotent file imports: one application per imported row
+    await applications_collection.create_index(
+        [("user_id", 1), ("import_key", 1)],
+        name="user_import_unique",
+        unique=True,
+        partialFilterExpression={"import_key": {"$exists": True}},
+    )
+
+    # Agent conversation checkpoints, looked up by thread
+    await checkpoints_collection.create_index(
+        [("thread_id", 1), ("checkpoint_ns", 1), ("checkpoint_id", -1)],
+        name="thread_checkpoint_unique",
+        unique=True,
+    )
+    await _create_ttl_index(
+        checkpoints_collection, "updated_at", "updated_at_ttl", CHECKPOINT_TTL_SECONDS
     )
+    await checkpoint_writes_collection.create_index(
+        [
+            ("thread_id", 1),
+            ("checkpoint_ns", 1),
+            ("checkpoint_id", 1),
+            ("task_id", 1),
+            ("idx", 1),
+        ],
+        name="thread_checkpoint_task_unique",
+        unique=True,
+    )
+    await _create_ttl_index(
+        checkpoint_writes_collection, "updated_at", "updated_at_ttl", CHECKPOINT_TTL_SECONDS
+    )
+
+    # Shared router decision cache; entries carry their own `expires_at`
+    if _config("CLASSIFIER_CACHE_BACKEND", default="memory").strip().lower() == "mongo":
+        await _create_ttl_index(
+            get_collection(_config("CLASSIFIER_CACHE_COLLECTION", default="classifier_cache")),
+            "expires_at",
+            "expires_at_ttl",
+            0,
+        )
 
 
 def close_client() -> None:
     """Close the shared Mongo client (use on application shutdown)."""
+    global _client, _db
+    with _client_lock:
+        client, _client, _db = _client, None, None
+    if client is None or _client_pid != os.getpid():
+        return
     try:
         client.close()
     except Exception:
@@ -130,10 +404,21 @@ __all__ = [
     "db",
     "users_collection",
     "tokens_collection",
+    "applications_collection",
+    "application_stats_collection",
+    "checkpoints_collection",
+    "checkpoint_writes_collection",
+    "ACTIVE_TOKEN_FILTER",
+    "REVOKED_TOKEN_FILTER",
+    "get_client",
+    "open_client",
     "get_database",
     "get_collection",
     "mongo_db_dependency",
     "ping",
     "init_indexes",
-    "close_client"
-]
\ No newline at end of file
+    "init_token_indexes",
+    "close_client",
+    "mongo_client_options",
+    "mongo_settings",
+]
@@ -4,8 +4,10 @@ from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Union
 
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
-from backend.db.db import tokens_collection
+from backend.db.db import ACTIVE_TOKEN_FILTER, REVOKED_TOKEN_FILTER, tokens_collection
 
 
 UserId = Union[str, ObjectId]
@@ -22,7 +24,18 @@ def _normalize_user_id(user_id: UserId) -> ObjectId:
 
 async def get_active_token(user_id: UserId, provider: str) -> Optional[dict]:
     return await tokens_collection.find_one(
-        {"user_id": _normalize_user_id(user_id), "provider": provider, "revoked_at": None}
+        {
+            "user_id": _normalize_user_id(user_id),
+            "provider": provider,
+            **ACTIVE_TOKEN_FILTER,
+        }
+    )
+
+
+async def get_active_token_by_id(token_id: TokenId) -> Optional[dict]:
+    """The token document a session was issued for, unless it was revoked."""
+    return await tokens_collection.find_one(
+        {"_id": _as_object_id(token_id), **ACTIVE_TOKEN_FILTER}
     )
 
 
@@ -41,42 +54,14 @@ async def save_or_rotate_token(
     - If only `scopes` are provided, updates scopes if a token exists.
     - Creates a new document if none exists and `refresh_token_enc` is provided.
     Returns the up-to-date token document.
+
+    This is a single `find_one_and_update` round trip. The partial unique index
+    on active (user_id, provider) pairs makes concurrent upserts safe: the
+    loser of an insert race gets a duplicate key error and retries as an update.
     """
     now = datetime.now(timezone.utc)
-    existing = await get_active_token(user_id, provider)
-
-    if existing is None:
-        if refresh_token_enc is None:
-            # No existing token and nothing to save
-            return {
-                "user_id": _normalize_user_id(user_id),
-                "provider": provider,
-                "scopes": scopes or [],
-                "refresh_token_enc": None,
-                "created_at": now,
-                "updated_at": now,
-                "last_refresh_at": None,
-                "revoked_at": None,
-                "session_id": session_id,
-                "device_info": device_info,
-            }
-        doc = {
-            "user_id": _normalize_user_id(user_id),
-            "provider": provider,
-            "scopes": scopes or [],
-            "refresh_token_enc": refresh_token_enc,
-            "created_at": now,
-            "updated_at": now,
-            "last_refresh_at": None,
-            "revoked_at": None,
-            "session_id": session_id,
-            "device_info": device_info,
-        }
-        insert_result = await tokens_collection.insert_one(doc)
-        doc["_id"] = insert_result.inserted_id
-        return doc
+    user_oid = _normalize_user_id(user_id)
 
-    # Update existing document
     update_fields: Dict[str, Any] = {"updated_at": now}
     if scopes is not None:
         update_fields["scopes"] = scopes
@@ -87,13 +72,47 @@ async def save_or_rotate_token(
     if device_info is not None:
         update_fields["device_info"] = device_info
 
-    await tokens_collection.update_one(
-        {"_id": existing["_id"]}, {"$set": update_fields}
-    )
-    updated_doc = await tokens_collection.find_one({"_id": existing["_id"]})
-    if updated_doc is None:
-        raise RuntimeError("Updated token document not found")
-    return updated_doc
+    insert_defaults = {
+        "scopes": [],
+        "refresh_token_enc": None,
+        "created_at": now,
+        "last_refresh_at": None,
+        "revoked_at": None,
+        "session_id": None,
+        "device_info": None,
+    }
+    on_insert = {k: v for k, v in insert_defaults.items() if k not in update_fields}
+
+    # Without a token to store, only an existing document may be updated
+    upsert = refresh_token_enc is not None
+    for attempt in range(2):
+        try:
+            doc = await tokens_collection.find_one_and_update(
+                {"user_id": user_oid, "provider": provider, **ACTIVE_TOKEN_FILTER},
+                {"$set": update_fields, "$setOnInsert": on_insert},
+                upsert=upsert,
+                return_document=ReturnDocument.AFTER,
+            )
+            break
+        except DuplicateKeyError:
+            if attempt:
+                raise
+
+    if doc is None:
+        # No existing token and nothing to save
+        return {
+            "user_id": user_oid,
+            "provider": provider,
+            "scopes": scopes or [],
+            "refresh_token_enc": None,
+            "created_at": now,
+            "updated_at": now,
+            "last_refresh_at": None,
+            "revoked_at": None,
+            "session_id": session_id,
+            "device_info": device_info,
+        }
+    return doc
 
 
 async def update_last_refresh_at(token_id: TokenId, when: Optional[datetime] = None) -> bool:
@@ -113,8 +132,15 @@ async def revoke_token(token_id: TokenId, when: Optional[datetime] = None) -> bo
 
 
 async def delete_tokens_for_user(user_id: UserId, provider: Optional[str] = None) -> int:
+    """Delete a user's active and revoked tokens.
+
+    Tokens are indexed by two partial indexes (active and revoked), so the
+    query names both states explicitly; one branch uses each index.
+    """
     query: dict = {"user_id": _normalize_user_id(user_id)}
     if provider:
         query["provider"] = provider
-    result = await tokens_collection.delete_many(query)
+    result = await tokens_collection.delete_many(
+        {"$or": [{**query, **ACTIVE_TOKEN_FILTER}, {**query, **REVOKED_TOKEN_FILTER}]}
+    )
     return result.deleted_count or 0
\ No newline at end of file
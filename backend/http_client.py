@@ -0,0 +1,49 @@
+"""Shared outbound HTTP client.
+
+One `httpx.AsyncClient` is created in the FastAPI `lifespan` and reused by
+every request, so connections (and TLS sessions) to Google stay warm instead
+of being re-established on each login.
+
+Env vars used:
+- HTTP_MAX_CONNECTIONS: total pooled connections (default 100)
+- HTTP_MAX_KEEPALIVE_CONNECTIONS: idle connections kept open (default 20)
+- HTTP_KEEPALIVE_EXPIRY_SECONDS: idle connection lifetime (default 60)
+- HTTP_TIMEOUT_SECONDS: per-request timeout (default 10)
+- HTTP2_ENABLED: "0"/"false" disables HTTP/2 (default on)
+"""
+
+from __future__ import annotations
+
+import os
+
+import httpx
+from fastapi import Request
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off")
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build the pooled client using the configured limits."""
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "60")),
+    )
+    return httpx.AsyncClient(
+        http2=_env_flag("HTTP2_ENABLED", True),
+        limits=limits,
+        timeout=float(os.getenv("HTTP_TIMEOUT_SECONDS", "10")),
+    )
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """FastAPI dependency returning the client created in `lifespan`."""
+    return request.app.state.http_client
+
+
+__all__ = ["create_http_client", "get_http_client"]
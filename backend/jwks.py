@@ -0,0 +1,107 @@
+"""Cached JSON Web Key Set for verifying provider-signed JWTs locally.
+
+Keys are fetched with the shared HTTP client and kept for the `max-age` the
+provider advertises (bounded by `min_refresh_seconds`). `refresh_forever`
+can run as a background task so logins never wait on a key fetch; an
+unknown `kid` (key rotation) triggers an immediate, rate-limited refetch.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from typing import Dict, Optional
+
+import httpx
+import jwt
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class JWKSCache:
+    def __init__(
+        self,
+        jwks_uri: str,
+        *,
+        default_ttl_seconds: float = 3600.0,
+        min_refresh_seconds: float = 30.0,
+    ):
+        self.jwks_uri = jwks_uri
+        self.default_ttl_seconds = default_ttl_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._expires_at = 0.0
+        self._fetched_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def stale(self) -> bool:
+        return time.monotonic() >= self._expires_at
+
+    async def refresh(self, client: httpx.AsyncClient) -> None:
+        """Fetch the key set and replace the cached keys."""
+        async with self._lock:
+            if (
+                self._fetched_at is not None
+                and time.monotonic() - self._fetched_at < self.min_refresh_seconds
+            ):
+                return
+            response = await client.get(self.jwks_uri)
+            response.raise_for_status()
+            key_set = jwt.PyJWKSet.from_dict(response.json())
+
+            ttl = self.default_ttl_seconds
+            match = _MAX_AGE_RE.search(response.headers.get("cache-control", ""))
+            if match:
+                ttl = max(float(match.group(1)), self.min_refresh_seconds)
+
+            self._keys = {key.key_id: key for key in key_set.keys if key.key_id}
+            self._fetched_at = time.monotonic()
+            self._expires_at = self._fetched_at + ttl
+
+    async def get_signing_key(
+        self, kid: Optional[str], client: httpx.AsyncClient
+    ) -> jwt.PyJWK:
+        if self.stale or kid not in self._keys:
+            await self.refresh(client)
+        try:
+            return self._keys[kid]
+        except KeyError:
+            raise jwt.InvalidTokenError(f"Unknown signing key {kid}") from None
+
+    async def refresh_forever(
+        self, client: httpx.AsyncClient, interval: float = 300.0
+    ) -> None:
+        """Keep the key set warm; meant to run as a `lifespan` background task."""
+        while True:
+            try:
+                if self.stale:
+                    await self.refresh(client)
+            except Exception:
+                # Keep serving the cached keys; the next login retries the fetch
+                pass
+            await asyncio.sleep(interval)
+
+    async def decode(
+        self,
+        token: str,
+        client: httpx.AsyncClient,
+        *,
+        audience: str,
+        issuer,
+        algorithms=("RS256",),
+    ) -> dict:
+        """Verify signature, expiry, audience and issuer; return the claims."""
+        header = jwt.get_unverified_header(token)
+        key = await self.get_signing_key(header.get("kid"), client)
+        return jwt.decode(
+            token,
+            key,
+            algorithms=list(algorithms),
+            audience=audience,
+            issuer=issuer,
+        )
+
+
+__all__ = ["JWKSCache"]
@@ -1,24 +1,62 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
+from backend.metrics import RouteMetricsMiddleware, metrics_response
 from backend.routers.users import router as users_router
 from backend.routers.auth import router as auth_router
-from backend.db.db import init_indexes, ping, close_client
+from backend.routers.auth import VERIFY_ID_TOKEN_LOCALLY, google_jwks
+from backend.routers.agent import router as agent_router
+from backend.routers.applications import router as applications_router
+from backend.db.db import init_indexes, open_client, ping, close_client
+from backend.db.checkpoints import MongoCheckpointSaver
+from backend.http_client import create_http_client
+from backend.user_cache import user_cache
+from agent.fast_classifier import fast_classifier
+from agent.graph import build_graph
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup: the Mongo client (and its pool) belongs to this worker's loop
+    open_client()
     await ping()
     await init_indexes()
+    app.state.http_client = create_http_client()
+    app.state.agent_graph = build_graph(checkpointer=MongoCheckpointSaver())
+    # Train the router's fast path (and derive its threshold) off the event loop
+    await asyncio.to_thread(lambda: fast_classifier.model)
+    background_tasks = []
+    if VERIFY_ID_TOKEN_LOCALLY:
+        background_tasks.append(
+            asyncio.create_task(google_jwks.refresh_forever(app.state.http_client))
+        )
+    if user_cache is not None and user_cache.bus is not None:
+        background_tasks.append(
+            asyncio.create_task(user_cache.bus.listen_forever(user_cache))
+        )
     try:
         yield
     finally:
         # Shutdown
+        for task in background_tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        await app.state.http_client.aclose()
         close_client()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(RouteMetricsMiddleware)
 
 # Include routers
 app.include_router(users_router)
-app.include_router(auth_router)
\ No newline at end of file
+app.include_router(auth_router)
+app.include_router(agent_router)
+app.include_router(applications_router)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint."""
+    return metrics_response()
@@ -0,0 +1,314 @@
+"""Prometheus metrics for the API, the agent graph and Mongo.
+
+Everything is recorded into the default `prometheus_client` registry and
+served by the `/metrics` route in `backend/main.py`:
+
+- HTTP: `RouteMetricsMiddleware` times every request by route template and
+  counts the Mongo round trips it made.
+- Mongo: `MongoCommandListener` is registered on the Motor client and times
+  every command. Motor copies the caller's context into its worker threads, so
+  the per-request counter lives in a context variable.
+- Graph: `GraphMetricsCallback` is passed in the run config by the agent
+  router. It times nodes and tools, counts LLM calls per user turn and
+  records token usage and estimated cost per model. (It is not bound with
+  `with_config`: LangGraph replaces bound callbacks with the caller's.)
+
+All hooks are plain dict and counter updates so they can stay on in
+production.
+
+Env vars used:
+- METRICS_ENABLED: "0"/"false" disables the graph callback and Mongo listener
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from pymongo import monitoring
+from starlette.responses import Response
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").strip().lower() not in (
+    "0", "false", "no", "off"
+)
+
+GRAPH_NODES = frozenset(
+    {
+        "compact_history",
+        "classifier_router",
+        "application_agent",
+        "llm_call",
+        "environment",
+        "extract_call",
+    }
+)
+
+# USD per million (prompt, completion) tokens
+MODEL_PRICES_PER_MILLION: Dict[str, Tuple[float, float]] = {
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+_FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+_SLOW_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=_SLOW_BUCKETS,
+)
+HTTP_MONGO_ROUND_TRIPS = Histogram(
+    "http_request_mongo_round_trips",
+    "Mongo commands issued while serving one request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongo_command_duration_seconds",
+    "Mongo command latency",
+    ["command"],
+    buckets=_FAST_BUCKETS,
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongo_command_failures_total", "Failed Mongo commands", ["command"]
+)
+GRAPH_NODE_SECONDS = Histogram(
+    "graph_node_duration_seconds",
+    "Agent graph node latency",
+    ["node"],
+    buckets=_SLOW_BUCKETS,
+)
+GRAPH_NODE_ERRORS = Counter(
+    "graph_node_errors_total", "Agent graph node failures", ["node"]
+)
+TOOL_SECONDS = Histogram(
+    "agent_tool_duration_seconds",
+    "Agent tool latency",
+    ["tool"],
+    buckets=_FAST_BUCKETS + (5.0, 15.0),
+)
+TOOL_ERRORS = Counter("agent_tool_errors_total", "Agent tool failures", ["tool"])
+LLM_SECONDS = Histogram(
+    "llm_call_duration_seconds",
+    "Chat model call latency",
+    ["node"],
+    buckets=_SLOW_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Chat model tokens", ["model", "node", "kind"]
+)
+LLM_COST_USD = Counter(
+    "llm_cost_usd_total", "Estimated chat model cost in USD", ["model"]
+)
+LLM_FLIGHTS = Counter(
+    "llm_flights_total", "LLM requests sent upstream by the single-flight layer"
+)
+LLM_CALLS_COALESCED = Counter(
+    "llm_calls_coalesced_total",
+    "LLM calls served by an identical request already in flight",
+)
+LLM_CALLS_PER_TURN = Histogram(
+    "llm_calls_per_turn",
+    "Chat model calls made by one graph run",
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16),
+)
+
+# Mongo commands issued by the current request; None outside a request
+_mongo_round_trips: ContextVar[Optional[list]] = ContextVar(
+    "mongo_round_trips", default=None
+)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every command and counts round trips for the current request."""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        counter = _mongo_round_trips.get()
+        if counter is not None:
+            counter[0] += 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        MONGO_COMMAND_SECONDS.labels(event.command_name).observe(
+            event.duration_micros / 1e6
+        )
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        MONGO_COMMAND_SECONDS.labels(event.command_name).observe(
+            event.duration_micros / 1e6
+        )
+        MONGO_COMMAND_FAILURES.labels(event.command_name).inc()
+
+
+mongo_listener = MongoCommandListener()
+
+
+class RouteMetricsMiddleware:
+    """ASGI middleware timing each request, including streamed bodies."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        round_trips = [0]
+        token = _mongo_round_trips.set(round_trips)
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _mongo_round_trips.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route, str(status)).observe(
+                time.perf_counter() - start
+            )
+            HTTP_MONGO_ROUND_TRIPS.labels(route).observe(round_trips[0])
+
+
+def _usage(response: Any) -> Tuple[Optional[str], int, int]:
+    """Model name and (prompt, completion) tokens from an LLMResult."""
+    llm_output = response.llm_output or {}
+    model = llm_output.get("model_name")
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                model = model or message.response_metadata.get("model_name")
+                return model, usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = llm_output.get("token_usage") or {}
+    return model, usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+def _price(model: str) -> Optional[Tuple[float, float]]:
+    # Responses report dated names such as "gpt-4.1-2025-04-14"
+    for name in sorted(MODEL_PRICES_PER_MILLION, key=len, reverse=True):
+        if model.startswith(name):
+            return MODEL_PRICES_PER_MILLION[name]
+    return None
+
+
+class GraphMetricsCallback(BaseCallbackHandler):
+    """Records node, tool and LLM metrics from LangChain callback events."""
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        # run_id -> (root run id, node or tool name, start time)
+        self._runs: Dict[UUID, Tuple[UUID, Optional[str], float]] = {}
+        self._llm_calls: Dict[UUID, int] = {}
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: Optional[str]) -> UUID:
+        parent = self._runs.get(parent_run_id) if parent_run_id else None
+        root = parent[0] if parent else run_id
+        self._runs[run_id] = (root, name, time.perf_counter())
+        return root
+
+    def _end(self, run_id: UUID) -> Optional[Tuple[UUID, Optional[str], float]]:
+        entry = self._runs.pop(run_id, None)
+        if entry is None:
+            return None
+        return entry[0], entry[1], time.perf_counter() - entry[2]
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name")
+        parent = self._runs.get(parent_run_id) if parent_run_id else None
+        # Nodes wrap a RunnableLambda of the same name; time the outer run only
+        if name not in GRAPH_NODES or (parent is not None and parent[1] == name):
+            name = None
+        root = self._start(run_id, parent_run_id, name)
+        if root == run_id:
+            self._llm_calls[root] = 0
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        entry = self._end(run_id)
+        if entry is None:
+            return
+        root, name, elapsed = entry
+        if name is not None:
+            GRAPH_NODE_SECONDS.labels(name).observe(elapsed)
+        if root == run_id:
+            LLM_CALLS_PER_TURN.observe(self._llm_calls.pop(root, 0))
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        entry = self._end(run_id)
+        if entry is None:
+            return
+        root, name, _ = entry
+        if name is not None:
+            GRAPH_NODE_ERRORS.labels(name).inc()
+        if root == run_id:
+            self._llm_calls.pop(root, None)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, (serialized or {}).get("name") or kwargs.get("name"))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        if (entry := self._end(run_id)) is not None:
+            TOOL_SECONDS.labels(entry[1] or "unknown").observe(entry[2])
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        if (entry := self._end(run_id)) is not None:
+            TOOL_ERRORS.labels(entry[1] or "unknown").inc()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        node = (kwargs.get("metadata") or {}).get("langgraph_node")
+        root = self._start(run_id, parent_run_id, node)
+        if root in self._llm_calls:
+            self._llm_calls[root] += 1
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        entry = self._end(run_id)
+        if entry is None:
+            return
+        node = entry[1] or "unknown"
+        LLM_SECONDS.labels(node).observe(entry[2])
+        model, prompt_tokens, completion_tokens = _usage(response)
+        model = model or "unknown"
+        LLM_TOKENS.labels(model, node, "prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(model, node, "completion").inc(completion_tokens)
+        if price := _price(model):
+            LLM_COST_USD.labels(model).inc(
+                (prompt_tokens * price[0] + completion_tokens * price[1]) / 1e6
+            )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+
+graph_metrics_callback = GraphMetricsCallback()
+
+
+def metrics_response() -> Response:
+    """Render the default registry in the Prometheus text format."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+__all__ = [
+    "METRICS_ENABLED",
+    "GraphMetricsCallback",
+    "MongoCommandListener",
+    "RouteMetricsMiddleware",
+    "graph_metrics_callback",
+    "metrics_response",
+    "mongo_listener",
+]
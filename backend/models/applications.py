@@ -0,0 +1,88 @@
+from datetime import date as date_type
+from typing import Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+
+class ApplicationStats(BaseModel):
+    """
+    Funnel statistics of a user's applications.
+    """
+
+    total: int = Field(..., description="Applications tracked")
+    by_status: Dict[str, int] = Field(default_factory=dict)
+    by_source: Dict[str, int] = Field(default_factory=dict)
+    by_week: Dict[str, int] = Field(
+        default_factory=dict, description="Applications per ISO week of the application date"
+    )
+    response_rate: float = Field(
+        ..., description="Share of applications the company has answered"
+    )
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "total": 42,
+                "by_status": {"applied": 30, "interviewing": 8, "rejected": 4},
+                "by_source": {"linkedin": 25, "referral": 10, "website": 7},
+                "by_week": {"2026-W40": 12, "2026-W41": 18, "2026-W42": 12},
+                "response_rate": 0.286,
+            }
+        },
+    )
+
+
+class ApplicationImportRow(BaseModel):
+    """
+    One application read from an uploaded CSV or JSON file.
+    """
+
+    company: str = Field(..., min_length=1)
+    role: str = Field(..., min_length=1)
+    date: str = Field(..., description="Application date (YYYY-MM-DD)")
+    source: str = Field(default="Unknown")
+    resume_version: Optional[str] = None
+    status: str = Field(default="applied")
+    notes: Optional[str] = None
+    model_config = ConfigDict(str_strip_whitespace=True, extra="ignore")
+
+    @field_validator("date")
+    @classmethod
+    def _iso_date(cls, value: str) -> str:
+        return date_type.fromisoformat(value[:10]).isoformat()
+
+    @field_validator("status", "source", mode="before")
+    @classmethod
+    def _default_blank(cls, value, info):
+        # Spreadsheet cells are often present but empty
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return cls.model_fields[info.field_name].default
+        return value
+
+    @field_validator("resume_version", "notes", mode="before")
+    @classmethod
+    def _blank_is_none(cls, value):
+        return None if isinstance(value, str) and not value.strip() else value
+
+
+class ImportRowError(BaseModel):
+    """
+    A row that was not imported.
+    """
+
+    row: int = Field(..., description="1-based data row (or line) in the upload")
+    error: str = Field(...)
+
+
+class ImportSummary(BaseModel):
+    """
+    Outcome of an application import.
+    """
+
+    received: int = Field(default=0, description="Rows read from the upload")
+    inserted: int = Field(default=0)
+    duplicates: int = Field(
+        default=0, description="Rows already imported (same company, role and date)"
+    )
+    failed: int = Field(default=0)
+    errors: List[ImportRowError] = Field(
+        default_factory=list, description="Failed rows (the first 1000)"
+    )
@@ -0,0 +1,87 @@
+from typing import List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class ChatMessage(BaseModel):
+    """
+    A single message of the conversation sent to the agent.
+    """
+
+    role: Literal["user", "assistant"] = Field(...)
+    content: str = Field(...)
+
+
+class ChatRequest(BaseModel):
+    """
+    New messages for a conversation thread; the last one is answered.
+
+    Threads are persisted server-side, so clients continuing a thread send only
+    the new message(s) along with its `thread_id`. Omit `thread_id` to start a
+    new thread; its id is returned in the first streamed event.
+    """
+
+    messages: List[ChatMessage] = Field(..., min_length=1)
+    thread_id: Optional[str] = Field(default=None, description="Conversation thread")
+    user_id: Optional[str] = Field(default=None, description="Must match the session's user if set")
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": "I applied to Google for a SWE role today via LinkedIn",
+                    }
+                ],
+                "user_id": "665a2d9f3c0a5e3f1a2b3c4d",
+            }
+        },
+    )
+
+
+class BatchItem(BaseModel):
+    """
+    One conversation to run in a batch.
+    """
+
+    messages: List[ChatMessage] = Field(..., min_length=1)
+    thread_id: Optional[str] = Field(default=None, description="Conversation thread")
+    user_id: Optional[str] = Field(default=None, description="Must match the session's user if set")
+    id: Optional[str] = Field(default=None, description="Caller's id, echoed back")
+
+
+class BatchRequest(BaseModel):
+    """
+    Many conversations to run through the agent; results stream back as NDJSON
+    in completion order, one line per item.
+    """
+
+    items: List[BatchItem] = Field(..., min_length=1, max_length=1000)
+    concurrency: Optional[int] = Field(
+        default=None, ge=1, description="Graph runs in flight (server default if unset)"
+    )
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "items": [
+                    {"id": "1", "messages": [{"role": "user", "content": "Show my applications"}]},
+                    {"id": "2", "messages": [{"role": "user", "content": "How do I negotiate?"}]},
+                ],
+                "concurrency": 8,
+            }
+        },
+    )
+
+
+class BatchItemResult(BaseModel):
+    """
+    Outcome of one batch item.
+    """
+
+    index: int = Field(..., description="Position of the item in the request")
+    id: Optional[str] = None
+    thread_id: str
+    ok: bool
+    classification: Optional[str] = None
+    message: Optional[str] = None
+    error: Optional[str] = None
+    elapsed_ms: float
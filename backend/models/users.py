@@ -52,4 +52,8 @@ class UserCollection(BaseModel):
     A container holding a list of `UserModel` instances.
     This exists because providing a top-level array in a JSON response can be a [vulnerability](https://haacked.com/archive/2009/06/25/json-hijacking.aspx/)
     """
-    users: List[UserModel]
\ No newline at end of file
+    users: List[UserModel]
+    next_after: Optional[str] = Field(
+        default=None,
+        description="Pass as `after` to fetch the next page; null on the last page",
+    )
\ No newline at end of file
@@ -0,0 +1,160 @@
+import json
+import os
+import uuid
+from typing import AsyncIterator, List
+from fastapi import APIRouter, Depends, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from langgraph.graph.state import CompiledStateGraph
+from agent.batch import arun_batch
+from backend.metrics import METRICS_ENABLED, graph_metrics_callback
+from backend.models.chat import BatchItemResult, BatchRequest, ChatMessage, ChatRequest
+from backend.sessions import Session, current_session, session_user_id
+
+router = APIRouter()
+
+# Graph runs in flight per batch request, unless the request asks for fewer
+BATCH_CONCURRENCY = int(os.getenv("AGENT_BATCH_CONCURRENCY", "8"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("AGENT_BATCH_MAX_CONCURRENCY", "32"))
+
+
+def get_agent_graph(request: Request) -> CompiledStateGraph:
+    """FastAPI dependency returning the checkpointed graph built in `lifespan`."""
+    return request.app.state.agent_graph
+
+
+def _graph_input(messages: List[ChatMessage]) -> dict:
+    return {
+        "messages": [m.model_dump() for m in messages],
+        "classification_decision": None,
+        "email_input": None,
+    }
+
+
+def _run_config(user_id: str, thread_id: str) -> dict:
+    # Checkpoints are stored per owner: clients pick thread ids, so two users
+    # sending the same one must not read or extend each other's history
+    return {
+        "configurable": {"user_id": user_id, "thread_id": f"{user_id}:{thread_id}"},
+        "callbacks": [graph_metrics_callback] if METRICS_ENABLED else [],
+    }
+
+
+def _final_reply(final_state: dict) -> dict:
+    """Classification and assistant reply from a finished run's state."""
+    reply = None
+    # The turn may end on tool results (the `Done` call); stop at the user's message
+    for message in reversed(final_state.get("messages") or []):
+        if getattr(message, "type", None) == "human":
+            break
+        if getattr(message, "type", None) == "ai":
+            reply = message.content
+            break
+    return {
+        "classification": final_state.get("classification_decision"),
+        "message": reply,
+    }
+
+
+def _sse(event: str, data) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def _chat_events(
+    request: ChatRequest, graph: CompiledStateGraph, user_id: str
+) -> AsyncIterator[str]:
+    """Run the graph with `astream_events` and translate events to SSE.
+
+    - `thread`: the conversation thread id, always sent first
+    - `token`: a chunk of model output, as soon as the model produces it
+    - `tool`: a tool finished, with its output
+    - `done`: the final classification and assistant message
+    - `error`: the run failed; the stream ends after this event
+    """
+    inputs = _graph_input(request.messages)
+    thread_id = request.thread_id or uuid.uuid4().hex
+    config = _run_config(user_id, thread_id)
+    yield _sse("thread", {"thread_id": thread_id})
+    try:
+        async for event in graph.astream_events(inputs, config, version="v2"):
+            kind = event["event"]
+            if kind == "on_chat_model_stream":
+                content = event["data"]["chunk"].content
+                if content:
+                    node = event.get("metadata", {}).get("langgraph_node")
+                    yield _sse("token", {"node": node, "content": content})
+            elif kind == "on_tool_end":
+                output = event["data"].get("output")
+                yield _sse(
+                    "tool",
+                    {"name": event["name"], "output": getattr(output, "content", output)},
+                )
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                yield _sse("done", _final_reply(event["data"].get("output") or {}))
+    except Exception as e:
+        yield _sse("error", {"detail": str(e)})
+
+
+@router.post("/chat", response_description="Stream the agent's response")
+async def chat(
+    request: ChatRequest,
+    graph: CompiledStateGraph = Depends(get_agent_graph),
+    session: Session = Depends(current_session),
+):
+    """
+    Run the agent graph on the conversation and stream progress as Server-Sent Events.
+
+    The agent acts for the session's user; `user_id`, if sent, must match it.
+    """
+    user_id = session_user_id(request.user_id, session)
+    return StreamingResponse(
+        _chat_events(request, graph, user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _batch_results(
+    request: BatchRequest, graph: CompiledStateGraph, user_id: str
+) -> AsyncIterator[str]:
+    """Run the batch and yield one NDJSON line per item as it finishes."""
+    thread_ids = [item.thread_id or uuid.uuid4().hex for item in request.items]
+    runs = (
+        (_graph_input(item.messages), _run_config(user_id, thread_id))
+        for item, thread_id in zip(request.items, thread_ids)
+    )
+    concurrency = min(request.concurrency or BATCH_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    async for result in arun_batch(graph, runs, concurrency=concurrency):
+        item = request.items[result.index]
+        reply = _final_reply(result.output) if result.ok else {}
+        yield BatchItemResult(
+            index=result.index,
+            id=item.id,
+            thread_id=thread_ids[result.index],
+            ok=result.ok,
+            error=result.error,
+            elapsed_ms=round(result.elapsed_ms, 1),
+            **reply,
+        ).model_dump_json() + "\n"
+
+
+@router.post("/agent/batch", response_description="Stream results as items finish")
+async def batch(
+    request: BatchRequest,
+    graph: CompiledStateGraph = Depends(get_agent_graph),
+    session: Session = Depends(current_session),
+):
+    """
+    Run many conversations through the agent with bounded concurrency.
+
+    Results are streamed as NDJSON in completion order; match them to the
+    request with `index` (or your own `id`). Failed items carry an `error`
+    and do not stop the batch. Every item runs as the session's user; an
+    item's `user_id`, if sent, must match it.
+    """
+    for item in request.items:
+        session_user_id(item.user_id, session)
+    return StreamingResponse(
+        _batch_results(request, graph, session.user_id), media_type="application/x-ndjson"
+    )
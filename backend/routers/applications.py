@@ -0,0 +1,102 @@
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from backend import application_io
+from backend.db import application_stats
+from backend.models.applications import ApplicationStats, ImportSummary
+from backend.sessions import require_user
+
+# Every route is under /users/{id}: only that user's session may use them
+router = APIRouter(dependencies=[Depends(require_user)])
+
+
+def _user_oid(id: str) -> ObjectId:
+    try:
+        return ObjectId(id)
+    except InvalidId:
+        raise HTTPException(status_code=400, detail=f"Invalid user id {id}")
+
+
+@router.get(
+    "/users/{id}/applications/stats",
+    response_description="Application funnel statistics",
+    response_model=ApplicationStats,
+)
+async def get_application_stats(
+    id: str,
+    weeks: Optional[int] = Query(
+        default=None, ge=1, le=520, description="Only the most recent weeks"
+    ),
+):
+    """
+    Counts per status, source and week, and the response rate, for a user.
+
+    Served from counters maintained on every application write, so the cost
+    does not grow with the number of applications.
+    """
+    return await application_stats.get_stats(_user_oid(id), weeks=weeks)
+
+
+@router.post(
+    "/users/{id}/applications/stats/rebuild",
+    response_description="Recomputed funnel statistics",
+    response_model=ApplicationStats,
+)
+async def rebuild_application_stats(id: str):
+    """
+    Recompute the user's counters from their applications (aggregation).
+    """
+    user_oid = _user_oid(id)
+    await application_stats.rebuild_stats(user_oid)
+    return await application_stats.get_stats(user_oid)
+
+
+@router.post(
+    "/users/{id}/applications/import",
+    response_description="Import summary with per-row errors",
+    response_model=ImportSummary,
+)
+async def import_applications(
+    id: str,
+    request: Request,
+    format: Optional[Literal["csv", "ndjson", "json"]] = Query(
+        default=None, description="Defaults to the Content-Type of the body"
+    ),
+    batch_size: int = Query(default=application_io.IMPORT_BATCH_SIZE, ge=1, le=5000),
+):
+    """
+    Import applications from a CSV, NDJSON or JSON array request body.
+
+    The body is parsed while it uploads and written in unordered batches of
+    `batch_size`. Invalid rows are skipped and listed in `errors`; rows
+    already imported (same company, role and date) count as `duplicates`.
+    """
+    user_oid = _user_oid(id)
+    return await application_io.import_applications(
+        str(user_oid),
+        request.stream(),
+        format or application_io.format_for(request.headers.get("content-type", "")),
+        batch_size=batch_size,
+    )
+
+
+@router.get("/users/{id}/applications/export", response_description="Stream all applications")
+async def export_applications(
+    id: str, format: Literal["csv", "ndjson", "json"] = "csv"
+):
+    """
+    Download every application of a user, most recent first.
+
+    Rows are streamed from the database cursor as they are read.
+    """
+    user_oid = _user_oid(id)
+    return StreamingResponse(
+        application_io.export_applications(str(user_oid), format),
+        media_type=application_io.MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="applications.{format}"'
+        },
+    )
@@ -1,12 +1,31 @@
-from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 import os
 from urllib.parse import urlencode
 import httpx
+import jwt
 from dotenv import load_dotenv
 from backend.db.db import users_collection
-from backend.db.tokens import save_or_rotate_token
-from typing import List
+from backend.db.tokens import (
+    get_active_token_by_id,
+    revoke_token,
+    save_or_rotate_token,
+    update_last_refresh_at,
+)
+from backend.http_client import get_http_client
+from backend.jwks import JWKSCache
+from backend.sessions import (
+    SESSION_TTL_SECONDS,
+    Session,
+    clear_session_cookie,
+    current_session,
+    decode_refreshable,
+    issue_session_token,
+    session_token,
+    set_session_cookie,
+)
+from backend.user_cache import user_cache
+from typing import List, Optional
 from cryptography.fernet import Fernet
 
 
@@ -23,9 +42,24 @@ GOOGLE_REDIRECT_URI = os.getenv("GOOGLE_REDIRECT_URI")
 if not all([GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, GOOGLE_REDIRECT_URI]):
     raise RuntimeError("Missing required Google OAuth environment variables")
 
-GOOGLE_AUTH_ENDPOINT = "https://accounts.google.com/o/oauth2/v2/auth"
-GOOGLE_TOKEN_ENDPOINT = "https://oauth2.googleapis.com/token"
-GOOGLE_USERINFO_ENDPOINT = "https://www.googleapis.com/oauth2/v2/userinfo"
+# Endpoints can be overridden to point at a local stub in tests/benchmarks
+GOOGLE_AUTH_ENDPOINT = os.getenv(
+    "GOOGLE_AUTH_ENDPOINT", "https://accounts.google.com/o/oauth2/v2/auth"
+)
+GOOGLE_TOKEN_ENDPOINT = os.getenv(
+    "GOOGLE_TOKEN_ENDPOINT", "https://oauth2.googleapis.com/token"
+)
+GOOGLE_USERINFO_ENDPOINT = os.getenv(
+    "GOOGLE_USERINFO_ENDPOINT", "https://www.googleapis.com/oauth2/v2/userinfo"
+)
+GOOGLE_JWKS_URI = os.getenv("GOOGLE_JWKS_URI", "https://www.googleapis.com/oauth2/v3/certs")
+GOOGLE_ISSUERS = ["https://accounts.google.com", "accounts.google.com"]
+
+# Verify the id_token against Google's cached signing keys instead of calling
+# the userinfo endpoint on every login
+_verify_flag = os.getenv("GOOGLE_VERIFY_ID_TOKEN_LOCALLY", "true")
+VERIFY_ID_TOKEN_LOCALLY = _verify_flag.lower() not in ("0", "false", "no", "off")
+google_jwks = JWKSCache(GOOGLE_JWKS_URI)
 
 # Encryption key for refresh tokens (base64 urlsafe 32-byte key)
 REFRESH_TOKEN_ENC_KEY = os.getenv("REFRESH_TOKEN_ENC_KEY")
@@ -37,6 +71,23 @@ fernet = Fernet(REFRESH_TOKEN_ENC_KEY)
 def encrypt_refresh_token(raw: str) -> str:
     return fernet.encrypt(raw.encode()).decode()
 
+
+def decrypt_refresh_token(encrypted: str) -> str:
+    return fernet.decrypt(encrypted.encode()).decode()
+
+
+async def _userinfo_from_id_token(id_token: str, client: httpx.AsyncClient) -> dict:
+    """Map verified id_token claims to the userinfo response shape."""
+    try:
+        claims = await google_jwks.decode(
+            id_token, client, audience=GOOGLE_CLIENT_ID, issuer=GOOGLE_ISSUERS
+        )
+    except jwt.PyJWTError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid id_token: {e}")
+    userinfo = {k: claims[k] for k in ("email", "name", "picture") if k in claims}
+    userinfo["id"] = claims.get("sub")
+    return userinfo
+
 @router.get("/", response_class=HTMLResponse)
 async def home():
     return """
@@ -60,7 +111,9 @@ def login():
 
 
 @router.get("/auth/callback")
-async def auth_callback(request: Request):
+async def auth_callback(
+    request: Request, client: httpx.AsyncClient = Depends(get_http_client)
+):
     code = request.query_params.get("code")
     if not code:
         raise HTTPException(status_code=400, detail="Authorization code not found")
@@ -73,18 +126,21 @@ async def auth_callback(request: Request):
         "grant_type": "authorization_code",
     }
 
-    async with httpx.AsyncClient() as client:
-        token_response = await client.post(GOOGLE_TOKEN_ENDPOINT, data=data)
-        token_response.raise_for_status()
-        token_data = token_response.json()
-        access_token = token_data.get("access_token")
-        refresh_token = token_data.get("refresh_token")  # may be absent
-        scope_str = token_data.get("scope", "")
-        scopes: List[str] = [s for s in scope_str.split(" ") if s]
+    token_response = await client.post(GOOGLE_TOKEN_ENDPOINT, data=data)
+    token_response.raise_for_status()
+    token_data = token_response.json()
+    access_token = token_data.get("access_token")
+    refresh_token = token_data.get("refresh_token")  # may be absent
+    id_token = token_data.get("id_token")
+    scope_str = token_data.get("scope", "")
+    scopes: List[str] = [s for s in scope_str.split(" ") if s]
 
-        if not access_token:
-            raise HTTPException(status_code=400, detail="Failed to retrieve access token")
+    if not access_token:
+        raise HTTPException(status_code=400, detail="Failed to retrieve access token")
 
+    if VERIFY_ID_TOKEN_LOCALLY and id_token:
+        userinfo = await _userinfo_from_id_token(id_token, client)
+    else:
         headers = {"Authorization": f"Bearer {access_token}"}
         userinfo_response = await client.get(GOOGLE_USERINFO_ENDPOINT, headers=headers)
         userinfo_response.raise_for_status()
@@ -116,27 +172,122 @@ async def auth_callback(request: Request):
         user_doc = await users_collection.find_one({"provider": provider, "provider_id": provider_id})
         user_id = user_doc.get("_id") if user_doc else None
 
+    if not user_id:
+        raise HTTPException(status_code=500, detail="Could not load the user")
+
+    # Name or email may have changed
+    if user_cache is not None:
+        await user_cache.invalidate(str(user_id))
+
     # Store/rotate refresh token if provided; otherwise, keep existing
-    if user_id:
-        encrypted = encrypt_refresh_token(refresh_token) if refresh_token else None
+    encrypted = encrypt_refresh_token(refresh_token) if refresh_token else None
+    token_doc = await save_or_rotate_token(
+        user_id=user_id,
+        provider=provider,
+        scopes=scopes,
+        refresh_token_enc=encrypted,
+    )
+
+    session = issue_session_token(
+        user_id,
+        token_doc.get("_id"),
+        name=name,
+        email=email,
+        picture=userinfo.get("picture"),
+    )
+    response = RedirectResponse("/profile", status_code=303)
+    set_session_cookie(response, session)
+    return response
+
+
+@router.post("/auth/refresh")
+async def refresh_session(
+    token: Optional[str] = Depends(session_token),
+    client: httpx.AsyncClient = Depends(get_http_client),
+):
+    """
+    Exchange a session token, even an expired one, for a fresh one.
+
+    Checks that the login behind it is still active by redeeming the stored
+    Google refresh token; a revoked or deleted login must sign in again.
+    """
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    try:
+        session = decode_refreshable(token)
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=401, detail="Invalid session")
+    if session.token_id is None:
+        raise HTTPException(status_code=401, detail="Session cannot be refreshed")
+
+    token_doc = await get_active_token_by_id(session.token_id)
+    if (
+        token_doc is None
+        or str(token_doc["user_id"]) != session.user_id
+        or not token_doc.get("refresh_token_enc")
+    ):
+        raise HTTPException(status_code=401, detail="Login revoked, sign in again")
+
+    grant = await client.post(
+        GOOGLE_TOKEN_ENDPOINT,
+        data={
+            "client_id": GOOGLE_CLIENT_ID,
+            "client_secret": GOOGLE_CLIENT_SECRET,
+            "grant_type": "refresh_token",
+            "refresh_token": decrypt_refresh_token(token_doc["refresh_token_enc"]),
+        },
+    )
+    if grant.status_code in (400, 401):
+        # invalid_grant: the user revoked access at Google
+        await revoke_token(token_doc["_id"])
+        raise HTTPException(status_code=401, detail="Login revoked, sign in again")
+    grant.raise_for_status()
+    rotated = grant.json().get("refresh_token")
+    if rotated:
         await save_or_rotate_token(
-            user_id=user_id,
-            provider=provider,
-            scopes=scopes,
-            refresh_token_enc=encrypted,
+            user_id=token_doc["user_id"],
+            provider=token_doc["provider"],
+            refresh_token_enc=encrypt_refresh_token(rotated),
         )
+    await update_last_refresh_at(token_doc["_id"])
 
-    return RedirectResponse(
-        f"/profile?name={name}&email={email}&picture={userinfo.get('picture','')}{'&id='+str(user_id) if user_id else ''}"
+    new_token = issue_session_token(
+        session.user_id,
+        token_doc["_id"],
+        name=session.name,
+        email=session.email,
+        picture=session.picture,
     )
+    response = JSONResponse(
+        {
+            "access_token": new_token,
+            "token_type": "bearer",
+            "expires_in": SESSION_TTL_SECONDS,
+        }
+    )
+    set_session_cookie(response, new_token)
+    return response
+
+
+@router.post("/auth/logout", status_code=204)
+async def logout(session: Session = Depends(current_session)):
+    """
+    Revoke the login behind the session so it can no longer be refreshed.
+
+    The current session token stays valid until it expires.
+    """
+    if session.token_id is not None:
+        await revoke_token(session.token_id)
+    response = Response(status_code=204)
+    clear_session_cookie(response)
+    return response
 
 
 @router.get("/profile", response_class=HTMLResponse)
-async def profile(request: Request):
-    user_info = request.query_params
-    name = user_info.get("name")
-    email = user_info.get("email")
-    picture = user_info.get("picture")
+async def profile(session: Session = Depends(current_session)):
+    name = session.name
+    email = session.email
+    picture = session.picture or ""
 
     return f"""
     <html>
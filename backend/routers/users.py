@@ -1,12 +1,21 @@
-from fastapi import APIRouter, HTTPException, Body, Response
+from typing import AsyncIterator, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Body, Header, Query, Response
+from fastapi.responses import StreamingResponse
 from backend.models.users import UserCollection, UserModel, UpdateUserModel
 from backend.db.db import users_collection
+from backend.serialization import DocumentRenderer
+from backend.sessions import current_session, require_user
+from backend.user_cache import CachedUser, user_cache
 from bson import ObjectId
+from bson.errors import InvalidId
 from fastapi import status
-from pymongo import ReturnDocument
+from pymongo import ASCENDING, ReturnDocument
 
 router = APIRouter()
 
+# Renders user documents without a per-request `UserModel` round trip
+user_renderer = DocumentRenderer(UserModel)
+
 @router.get("/users")
 async def get_users():
     return {"message": "Hello, World!"}
@@ -16,37 +25,109 @@ async def get_users():
     response_description="List all users",
     response_model=UserCollection,
     response_model_by_alias=False,
+    dependencies=[Depends(current_session)],
 )
-async def list_users():
+async def list_users(
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    after: Optional[str] = Query(
+        default=None, description="Last `id` of the previous page"
+    ),
+    format: Literal["json", "ndjson"] = "json",
+):
     """
-    List all of the user data in the database.
+    List the user data in the database, ordered by `id`.
 
-    The response is unpaginated and limited to 1000 results.
+    Pages are keyset-based: pass the returned `next_after` as `after` to get the
+    next page (`limit` defaults to 100). With `format=ndjson` users are streamed
+    one JSON document per line straight from the cursor, and all users after
+    `after` are returned unless `limit` is set.
     """
-    return UserCollection(users=await users_collection.find().to_list(1000))
+    query: dict = {}
+    if after is not None:
+        try:
+            query["_id"] = {"$gt": ObjectId(after)}
+        except InvalidId:
+            raise HTTPException(status_code=400, detail=f"Invalid cursor {after}")
+
+    cursor = users_collection.find(query, user_renderer.projection).sort("_id", ASCENDING)
+
+    if format == "ndjson":
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return StreamingResponse(
+            _stream_users(cursor.batch_size(500)), media_type="application/x-ndjson"
+        )
+
+    limit = limit or 100
+    users = await cursor.limit(limit).to_list(limit)
+    next_after = str(users[-1]["_id"]) if len(users) == limit else None
+    return Response(
+        content=user_renderer.render_many(users, "users", next_after=next_after),
+        media_type="application/json",
+    )
+
+
+async def _stream_users(cursor) -> AsyncIterator[bytes]:
+    """Yield one serialized user per line as documents arrive from Mongo."""
+    async for doc in cursor:
+        yield user_renderer.render(doc) + b"\n"
+
 
 @router.get(
     "/users/{id}",
     response_description="Get a single user",
     response_model=UserModel,
     response_model_by_alias=False,
+    responses={304: {"description": "Not modified (matches `If-None-Match`)"}},
+    dependencies=[Depends(require_user)],
 )
-async def show_user(id: str):
+async def show_user(id: str, if_none_match: Optional[str] = Header(default=None)):
     """
     Get the record for a specific user, looked up by `id`.
+
+    Responses carry an `ETag`; send it back in `If-None-Match` to get an
+    empty 304 while the user is unchanged.
     """
-    if (
-        user := await users_collection.find_one({"_id": ObjectId(id)})
-    ) is not None:
-        return user
 
-    raise HTTPException(status_code=404, detail=f"User {id} not found")
+    user_oid = ObjectId(id)
+
+    async def load() -> Optional[bytes]:
+        doc = await users_collection.find_one({"_id": user_oid}, user_renderer.projection)
+        if doc is None:
+            return None
+        return user_renderer.render(doc)
+
+    if user_cache is not None:
+        user = await user_cache.get(str(user_oid), load)
+    elif (body := await load()) is not None:
+        user = CachedUser.from_body(body)
+    else:
+        user = None
+    if user is None:
+        raise HTTPException(status_code=404, detail=f"User {id} not found")
+
+    headers = {"ETag": user.etag, "Cache-Control": "private, no-cache"}
+    if if_none_match is not None and _etag_matches(if_none_match, user.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=user.body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+async def _invalidate_user(id: str) -> None:
+    if user_cache is not None:
+        await user_cache.invalidate(str(ObjectId(id)))
+
 
 @router.put(
     "/users/{id}",
     response_description="Update a user",
     response_model=UserModel,
     response_model_by_alias=False,
+    dependencies=[Depends(require_user)],
 )
 async def update_user(id: str, user: UpdateUserModel = Body(...)):
     """
@@ -65,6 +146,7 @@ async def update_user(id: str, user: UpdateUserModel = Body(...)):
             {"$set": user},
             return_document=ReturnDocument.AFTER,
         )
+        await _invalidate_user(id)
         if update_result is not None:
             return update_result
         else:
@@ -76,12 +158,17 @@ async def update_user(id: str, user: UpdateUserModel = Body(...)):
 
     raise HTTPException(status_code=404, detail=f"User {id} not found")
 
-@router.delete("/users/{id}", response_description="Delete a user")
+@router.delete(
+    "/users/{id}",
+    response_description="Delete a user",
+    dependencies=[Depends(require_user)],
+)
 async def delete_user(id: str):
     """
     Remove a single user record from the database.
     """
     delete_result = await users_collection.delete_one({"_id": ObjectId(id)})
+    await _invalidate_user(id)
 
     if delete_result.deleted_count == 1:
         return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,76 @@
+"""Fast JSON rendering of Mongo documents as API response models.
+
+Returning raw documents with a `response_model` makes FastAPI validate every
+document (one `BeforeValidator(str)` call per ObjectId), dump the models
+back to Python objects and encode them with the standard `json` module. For
+large pages that dominates request CPU. `DocumentRenderer` instead:
+
+- derives the Mongo projection from the model, so only exposed fields are
+  read,
+- by default trusts documents the app wrote itself and only renames and
+  picks fields, rendering with orjson,
+- with `VALIDATE_DB_RESPONSES=1` validates through a cached `TypeAdapter`
+  and renders with pydantic-core's `dump_json`.
+
+Routes keep their `response_model` for the OpenAPI schema and return the
+rendered bytes in a `Response`.
+
+Env vars used:
+- VALIDATE_DB_RESPONSES: "1"/"true" validates documents before rendering
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Iterable, List, Mapping, Type
+
+import orjson
+from bson import ObjectId
+from pydantic import BaseModel, TypeAdapter
+
+VALIDATE_DB_RESPONSES = os.getenv("VALIDATE_DB_RESPONSES", "0").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """orjson with ObjectId support."""
+    return orjson.dumps(value, default=_default)
+
+
+class DocumentRenderer:
+    """Renders Mongo documents as the JSON of `model` (field names, not aliases)."""
+
+    def __init__(self, model: Type[BaseModel], *, validate: bool = VALIDATE_DB_RESPONSES):
+        self.model = model
+        self.validate = validate
+        self._fields = [
+            (name, field.alias or name) for name, field in model.model_fields.items()
+        ]
+        # Pass to `find` so Mongo only returns what the response exposes
+        self.projection = {alias: 1 for _, alias in self._fields}
+        self._adapter = TypeAdapter(List[model])
+
+    def _items(self, docs: List[Mapping[str, Any]]) -> bytes:
+        if self.validate:
+            return self._adapter.dump_json(self._adapter.validate_python(docs))
+        return dumps([{name: doc.get(alias) for name, alias in self._fields} for doc in docs])
+
+    def render(self, doc: Mapping[str, Any]) -> bytes:
+        return self._items([doc])[1:-1]
+
+    def render_many(self, docs: Iterable[Mapping[str, Any]], key: str, **extra: Any) -> bytes:
+        """`{key: [docs...], **extra}`, e.g. a page of users with its cursor."""
+        return dumps({key: orjson.Fragment(self._items(list(docs))), **extra})
+
+
+__all__ = ["DocumentRenderer", "VALIDATE_DB_RESPONSES", "dumps"]
@@ -0,0 +1,275 @@
+"""Stateless session tokens issued at login.
+
+`auth_callback` signs a short-lived JWT naming the user and their stored
+refresh token document. `current_session` verifies it in memory: the key set
+is read once per process and nothing is looked up in Mongo, so authenticating
+a request costs no database round trip. The trade-off is that a revoked login
+stays usable until its session token expires (`SESSION_TTL_SECONDS`).
+
+`POST /auth/refresh` exchanges a (possibly expired) session token for a new
+one. That path does read the tokens collection and redeems the stored
+`refresh_token_enc` with Google, so revoked logins stop refreshing.
+
+Keys rotate without logging anyone out: `SESSION_SIGNING_KEYS` lists
+`kid:secret` pairs, the first signs new tokens and all of them verify. Add
+the new key in front, deploy, and drop the old one once the refresh window
+has passed. Without it, a single key is derived from `REFRESH_TOKEN_ENC_KEY`.
+
+Env vars used:
+- SESSION_SIGNING_KEYS: comma-separated `kid:secret` pairs, signing key first
+- REFRESH_TOKEN_ENC_KEY: key material when SESSION_SIGNING_KEYS is unset
+- SESSION_TTL_SECONDS: session token lifetime (default 900)
+- SESSION_REFRESH_WINDOW_SECONDS: how long after expiry a token may still be
+  refreshed (default 30 days)
+- SESSION_COOKIE_NAME: cookie carrying the token (default "session")
+- SESSION_COOKIE_SECURE: "0"/"false" allows the cookie over plain HTTP
+  (local development; default on)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import jwt
+from fastapi import Depends, HTTPException, Request, Response, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+ALGORITHM = "HS256"
+ISSUER = "job-tracker"
+AUDIENCE = "job-tracker:session"
+# Tolerated clock skew between workers, in seconds
+LEEWAY_SECONDS = 30
+
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "900"))
+SESSION_REFRESH_WINDOW_SECONDS = int(
+    os.getenv("SESSION_REFRESH_WINDOW_SECONDS", str(30 * 24 * 3600))
+)
+SESSION_COOKIE_NAME = os.getenv("SESSION_COOKIE_NAME", "session")
+SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", "true").strip().lower() not in (
+    "0",
+    "false",
+    "no",
+    "off",
+)
+
+
+@dataclass(frozen=True)
+class Session:
+    """The verified claims of a session token."""
+
+    user_id: str
+    token_id: Optional[str]
+    name: Optional[str]
+    email: Optional[str]
+    picture: Optional[str]
+    expires_at: int
+
+    @classmethod
+    def from_claims(cls, claims: Dict[str, Any]) -> "Session":
+        return cls(
+            user_id=claims["sub"],
+            token_id=claims.get("sid"),
+            name=claims.get("name"),
+            email=claims.get("email"),
+            picture=claims.get("picture"),
+            expires_at=claims["exp"],
+        )
+
+
+class SessionKeySet:
+    """HMAC keys by `kid`; the active key signs, every key verifies."""
+
+    def __init__(self, keys: List[Tuple[str, bytes]]):
+        if not keys:
+            raise ValueError("At least one session signing key is required")
+        for kid, secret in keys:
+            # RFC 7518: HS256 keys must be at least as long as the hash
+            if len(secret) < 32:
+                raise ValueError(f"Session signing key {kid} is shorter than 32 bytes")
+        self.active_kid = keys[0][0]
+        self._keys: Dict[str, bytes] = dict(keys)
+
+    @classmethod
+    def from_env(cls) -> "SessionKeySet":
+        configured = os.getenv("SESSION_SIGNING_KEYS", "").strip()
+        if configured:
+            keys = []
+            for entry in configured.split(","):
+                kid, sep, secret = entry.strip().partition(":")
+                if not sep or not kid or not secret:
+                    raise ValueError("SESSION_SIGNING_KEYS entries must be kid:secret")
+                keys.append((kid, secret.encode()))
+            return cls(keys)
+        fallback = os.getenv("REFRESH_TOKEN_ENC_KEY")
+        if not fallback:
+            raise RuntimeError(
+                "Missing SESSION_SIGNING_KEYS (or REFRESH_TOKEN_ENC_KEY) for session tokens"
+            )
+        # Separate from the Fernet key itself, and the same in every worker
+        derived = hmac.new(fallback.encode(), b"job-tracker session signing", hashlib.sha256)
+        return cls([("default", derived.digest())])
+
+    @property
+    def kids(self) -> List[str]:
+        return list(self._keys)
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        return jwt.encode(
+            claims,
+            self._keys[self.active_kid],
+            algorithm=ALGORITHM,
+            headers={"kid": self.active_kid},
+        )
+
+    def decode(self, token: str, *, verify_exp: bool = True) -> Dict[str, Any]:
+        """Verified claims; raises `jwt.InvalidTokenError`."""
+        kid = jwt.get_unverified_header(token).get("kid")
+        try:
+            key = self._keys[kid]
+        except KeyError:
+            raise jwt.InvalidTokenError(f"Unknown signing key {kid}") from None
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[ALGORITHM],
+            audience=AUDIENCE,
+            issuer=ISSUER,
+            leeway=LEEWAY_SECONDS,
+            options={"require": ["exp", "iat", "sub"], "verify_exp": verify_exp},
+        )
+
+
+# Shared by every request in this process
+session_keys = SessionKeySet.from_env()
+
+
+def issue_session_token(
+    user_id: Any,
+    token_id: Any = None,
+    *,
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+    picture: Optional[str] = None,
+    ttl_seconds: int = SESSION_TTL_SECONDS,
+) -> str:
+    """Sign a session token for `user_id`.
+
+    `token_id` is the `_id` of the user's stored refresh token; without it
+    the session cannot be refreshed and expires with the token.
+    """
+    now = int(time.time())
+    claims: Dict[str, Any] = {
+        "iss": ISSUER,
+        "aud": AUDIENCE,
+        "sub": str(user_id),
+        "iat": now,
+        "exp": now + ttl_seconds,
+        "jti": uuid.uuid4().hex,
+    }
+    if token_id is not None:
+        claims["sid"] = str(token_id)
+    profile = {"name": name, "email": email, "picture": picture}
+    claims.update({k: v for k, v in profile.items() if v})
+    return session_keys.sign(claims)
+
+
+def decode_refreshable(token: str) -> Session:
+    """Claims of a token that may have expired, within the refresh window.
+
+    Raises `jwt.InvalidTokenError`.
+    """
+    claims = session_keys.decode(token, verify_exp=False)
+    if claims["exp"] + SESSION_REFRESH_WINDOW_SECONDS < time.time():
+        raise jwt.ExpiredSignatureError("Session is past its refresh window")
+    return Session.from_claims(claims)
+
+
+def set_session_cookie(response: Response, token: str) -> None:
+    # Outlives the token so an expired token can still be sent to /auth/refresh
+    response.set_cookie(
+        SESSION_COOKIE_NAME,
+        token,
+        max_age=SESSION_TTL_SECONDS + SESSION_REFRESH_WINDOW_SECONDS,
+        httponly=True,
+        secure=SESSION_COOKIE_SECURE,
+        samesite="lax",
+    )
+
+
+def clear_session_cookie(response: Response) -> None:
+    response.delete_cookie(
+        SESSION_COOKIE_NAME, httponly=True, secure=SESSION_COOKIE_SECURE, samesite="lax"
+    )
+
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def session_token(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> Optional[str]:
+    """The raw token from the `Authorization: Bearer` header or the cookie."""
+    if credentials is not None:
+        return credentials.credentials
+    return request.cookies.get(SESSION_COOKIE_NAME)
+
+
+def current_session(token: Optional[str] = Depends(session_token)) -> Session:
+    """FastAPI dependency: the caller's verified session, or 401."""
+    if not token:
+        raise _unauthorized("Not authenticated")
+    try:
+        return Session.from_claims(session_keys.decode(token))
+    except jwt.ExpiredSignatureError:
+        raise _unauthorized("Session expired")
+    except jwt.InvalidTokenError:
+        raise _unauthorized("Invalid session")
+
+
+def require_user(id: str, session: Session = Depends(current_session)) -> Session:
+    """FastAPI dependency for `/users/{id}/...` routes: the session must be `id`'s."""
+    if session.user_id != id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your user")
+    return session
+
+
+def session_user_id(requested: Optional[str], session: Session) -> str:
+    """The user a request acts for: the session's, which `requested` must match."""
+    if requested is not None and requested != session.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="user_id does not match the session",
+        )
+    return session.user_id
+
+
+__all__ = [
+    "SESSION_COOKIE_NAME",
+    "SESSION_TTL_SECONDS",
+    "Session",
+    "SessionKeySet",
+    "clear_session_cookie",
+    "current_session",
+    "decode_refreshable",
+    "issue_session_token",
+    "require_user",
+    "session_keys",
+    "session_token",
+    "session_user_id",
+    "set_session_cookie",
+]
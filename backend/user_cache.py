@@ -0,0 +1,255 @@
+"""Read-through cache of serialized user records.
+
+`GET /users/{id}` used to read Mongo and validate a `UserModel` on every
+request, although users only change through `update_user`, `delete_user`
+and the login upsert in `auth_callback`. `UserCache` keeps the serialized
+response body and its ETag in a bounded LRU. Those write paths call
+`invalidate`. Entries also expire after a TTL, which bounds staleness if
+an invalidation is ever missed.
+
+With several uvicorn workers each process has its own cache. Setting
+`USER_CACHE_BUS=mongo` publishes invalidations to a small capped collection
+that every worker tails (`listen_forever`, run from `lifespan`), so a write
+handled by one worker evicts the entry everywhere.
+
+Env vars used:
+- USER_CACHE_ENABLED: "0"/"false" disables the cache (default on)
+- USER_CACHE_MAXSIZE: max cached users per process (default 10000)
+- USER_CACHE_TTL_SECONDS: entry lifetime (default 300)
+- USER_CACHE_BUS: "none" (default) or "mongo"
+- USER_CACHE_BUS_COLLECTION: capped collection for the mongo bus
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+
+logger = logging.getLogger(__name__)
+
+# Invalidations are counted per bucket of user ids, so the bookkeeping stays
+# bounded however many users are invalidated
+_GENERATION_BUCKETS = 1024
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_body(cls, body: bytes) -> "CachedUser":
+        return cls(body, f'"{hashlib.sha1(body).hexdigest()}"')
+
+
+class UserCache:
+    """Bounded LRU of serialized users with per-entry TTL."""
+
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        ttl_seconds: float = 300.0,
+        bus: Optional["MongoInvalidationBus"] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.bus = bus
+        self._data: "OrderedDict[str, Tuple[CachedUser, float]]" = OrderedDict()
+        self._generations: List[int] = [0] * _GENERATION_BUCKETS
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _bucket(self, user_id: str) -> int:
+        return hash(user_id) % _GENERATION_BUCKETS
+
+    def _lookup(self, user_id: str) -> Optional[CachedUser]:
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is not None and entry[1] <= time.monotonic():
+                del self._data[user_id]
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._data.move_to_end(user_id)
+            self.stats["hits"] += 1
+            return entry[0]
+
+    def _store(self, user_id: str, user: CachedUser, generation: int) -> None:
+        with self._lock:
+            # Invalidated while it was being loaded: the body may be stale
+            if self._generations[self._bucket(user_id)] != generation:
+                return
+            self._data[user_id] = (user, time.monotonic() + self.ttl_seconds)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    async def get(
+        self, user_id: str, load: Callable[[], Awaitable[Optional[bytes]]]
+    ) -> Optional[CachedUser]:
+        """Cached user, or the result of `load()` (None for a missing user)."""
+        if (user := self._lookup(user_id)) is not None:
+            return user
+        generation = self._generations[self._bucket(user_id)]
+        body = await load()
+        if body is None:
+            return None
+        user = CachedUser.from_body(body)
+        self._store(user_id, user, generation)
+        return user
+
+    def evict(self, user_id: str) -> None:
+        """Drop a user from this process only."""
+        with self._lock:
+            self._generations[self._bucket(user_id)] += 1
+            self._data.pop(user_id, None)
+            self.stats["invalidations"] += 1
+
+    async def invalidate(self, user_id: str) -> None:
+        """Drop a user here and, with a bus, in every other worker."""
+        self.evict(user_id)
+        if self.bus is not None:
+            try:
+                await self.bus.publish(user_id)
+            except Exception:
+                # Other workers fall back to the TTL for this user
+                logger.exception("Could not publish user cache invalidation")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generations = [g + 1 for g in self._generations]
+            self._data.clear()
+
+
+class MongoInvalidationBus:
+    """Invalidations shared through a capped collection and tailable cursors."""
+
+    def __init__(self, collection_name: str, size_bytes: int = 1 << 20):
+        self.collection_name = collection_name
+        self.size_bytes = size_bytes
+        # Lets a worker skip its own messages (already applied locally)
+        self.origin = uuid.uuid4().hex
+
+    def _collection(self):
+        from backend.db.db import get_collection
+
+        return get_collection(self.collection_name)
+
+    async def setup(self) -> None:
+        from backend.db.db import get_database
+
+        try:
+            await get_database().create_collection(
+                self.collection_name, capped=True, size=self.size_bytes
+            )
+        except CollectionInvalid:
+            pass
+        # A tailable cursor on an empty capped collection dies immediately
+        if await self._collection().find_one() is None:
+            await self._collection().insert_one({"user_id": None})
+
+    async def publish(self, user_id: str) -> None:
+        await self._collection().insert_one(
+            {
+                "user_id": user_id,
+                "origin": self.origin,
+                "at": datetime.now(timezone.utc),
+            }
+        )
+
+    async def _newest_id(self, collection) -> Optional[object]:
+        newest = (
+            await collection.find({}, {"_id": 1})
+            .sort("$natural", -1)
+            .limit(1)
+            .to_list(length=1)
+        )
+        return newest[0]["_id"] if newest else None
+
+    async def listen_forever(self, cache: UserCache, retry_seconds: float = 1.0) -> None:
+        """Apply other workers' invalidations; meant to run as a `lifespan` task."""
+        await self.setup()
+        collection = self._collection()
+        # Newest message already reflected in the cache
+        last_id = None
+        while True:
+            try:
+                if last_id is None:
+                    last_id = await self._newest_id(collection)
+                elif await collection.find_one({"_id": last_id}) is None:
+                    # Overwritten in the capped collection: messages were missed
+                    cache.clear()
+                    last_id = await self._newest_id(collection)
+                # The cursor starts at the beginning and skips up to `last_id`:
+                # a tailable query that matches nothing at first is dead
+                # immediately, and ObjectIds from different workers are not
+                # ordered, so `_id > last_id` could skip messages
+                caught_up = last_id is None
+                cursor = collection.find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive:
+                    # Ends on every empty getMore; the cursor itself stays open
+                    async for message in cursor:
+                        if not caught_up:
+                            caught_up = message["_id"] == last_id
+                            continue
+                        last_id = message["_id"]
+                        if message.get("user_id") and message.get("origin") != self.origin:
+                            cache.evict(message["user_id"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("User cache invalidation listener failed")
+                # Messages may have been missed while the listener was failing
+                cache.clear()
+                last_id = None
+            await asyncio.sleep(retry_seconds)
+
+
+def build_user_cache() -> Optional[UserCache]:
+    """Create the cache configured through environment variables."""
+    enabled = os.getenv("USER_CACHE_ENABLED", "1").strip().lower()
+    if enabled in ("0", "false", "no", "off"):
+        return None
+    bus_backend = os.getenv("USER_CACHE_BUS", "none").strip().lower()
+    if bus_backend in ("", "none", "off"):
+        bus = None
+    elif bus_backend == "mongo":
+        bus = MongoInvalidationBus(
+            os.getenv("USER_CACHE_BUS_COLLECTION", "user_cache_invalidations")
+        )
+    else:
+        raise ValueError(f"Unknown USER_CACHE_BUS: {bus_backend}")
+    return UserCache(
+        maxsize=int(os.getenv("USER_CACHE_MAXSIZE", "10000")),
+        ttl_seconds=float(os.getenv("USER_CACHE_TTL_SECONDS", "300")),
+        bus=bus,
+    )
+
+
+# Shared by every request in this process
+user_cache = build_user_cache()
+
+
+__all__ = [
+    "CachedUser",
+    "MongoInvalidationBus",
+    "UserCache",
+    "build_user_cache",
+    "user_cache",
+]
@@ -0,0 +1,66 @@
+"""Helpers shared by the benchmark scripts."""
+
+from __future__ import annotations
+
+import json
+import math
+import threading
+from typing import Dict, Iterable, Optional
+
+from pymongo import monitoring
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty sample."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def latency_summary(seconds: Iterable[float]) -> Dict[str, float]:
+    """p50/p95/p99/max of a latency sample, in milliseconds."""
+    sample = list(seconds)
+    return {
+        "count": len(sample),
+        "p50_ms": percentile(sample, 50) * 1000,
+        "p95_ms": percentile(sample, 95) * 1000,
+        "p99_ms": percentile(sample, 99) * 1000,
+        "max_ms": max(sample, default=0.0) * 1000,
+    }
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts Mongo commands (round trips) sent by a client."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.commands: Dict[str, int] = {}
+
+    @property
+    def total(self) -> int:
+        return sum(self.commands.values())
+
+    def reset(self) -> None:
+        with self._lock:
+            self.commands = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        with self._lock:
+            self.commands[event.command_name] = self.commands.get(event.command_name, 0) + 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        pass
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        pass
+
+
+def write_results(results: dict, path: Optional[str]) -> None:
+    """Print results and optionally save them as JSON for diffing."""
+    text = json.dumps(results, indent=2, default=str)
+    print(text)
+    if path:
+        with open(path, "w") as f:
+            f.write(text + "\n")
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the agent graph.
+
+The chat models in classifier_agent.py, application_agent.py and history.py
+are replaced with scripted fakes that sleep for a configurable latency, so
+the numbers measure orchestration overhead plus simulated model time, with no
+network access. Tools run without a user id and never touch Mongo.
+
+Reports per-node and end-to-end latency (p50/p95/p99), throughput under N
+concurrent sessions and peak memory per run. Save results with --json and
+diff them between commits.
+
+    python -m benchmarks.graph_bench --runs 200 --concurrency 1,8,32 --json bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import os
+import random
+import subprocess
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from benchmarks._common import latency_summary, write_results
+
+MESSAGES = [
+    "I applied to Google for a software engineer role today via LinkedIn",
+    "Can you show me my current applications?",
+    "Update my Google application status to interviewing",
+    "How do I prepare for a technical interview?",
+    "Can you help me schedule a follow-up call?",
+    "I need help updating my resume",
+    "What's the best way to find remote jobs?",
+]
+
+NODES = {
+    "compact_history",
+    "classifier_router",
+    "llm_call",
+    "environment",
+    "finish",
+    "extract_call",
+}
+
+
+class FakeModel:
+    """Builds runnables that answer with scripted output after a delay."""
+
+    def __init__(self, latency_ms: float, jitter: float):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+
+    def _delay(self) -> float:
+        spread = self.latency_ms * self.jitter
+        return max(0.0, self.latency_ms + random.uniform(-spread, spread)) / 1000
+
+    def runnable(self, respond) -> RunnableLambda:
+        def invoke(messages):
+            time.sleep(self._delay())
+            return respond(messages)
+
+        async def ainvoke(messages):
+            await asyncio.sleep(self._delay())
+            return respond(messages)
+
+        return RunnableLambda(invoke, afunc=ainvoke)
+
+
+def _route(messages) -> Any:
+    from agent.schemas import RouterSchema
+
+    text = messages[-1]["content"].lower()
+    if "applied" in text or "application" in text:
+        return RouterSchema(classification="application_tracking")
+    if "interview" in text:
+        return RouterSchema(classification="interview_prep")
+    if "schedule" in text:
+        return RouterSchema(classification="calendar")
+    if "resume" in text:
+        return RouterSchema(classification="resume_assistant")
+    return RouterSchema(classification="general")
+
+
+_call_ids = itertools.count()
+
+
+def _act(messages) -> AIMessage:
+    """Call one tool, then Done once a tool result is in the conversation."""
+    call_id = f"call_{next(_call_ids)}"
+    last = messages[-1]
+    if getattr(last, "type", None) == "tool":
+        return AIMessage(content="", tool_calls=[{"name": "Done", "args": {}, "id": call_id}])
+    return AIMessage(
+        content="",
+        tool_calls=[{"name": "get_applications_by_user", "args": {}, "id": call_id}],
+    )
+
+
+def _extract(messages) -> Any:
+    from agent.schemas import ApplicationOperation, ApplicationOperationsSchema
+
+    return ApplicationOperationsSchema(operations=[ApplicationOperation(action="query")])
+
+
+def install_fakes(args: argparse.Namespace) -> None:
+    # Read by application_agent at import
+    os.environ["APPLICATION_AGENT_MODE"] = args.mode
+
+    import agent.history as history
+    import agent.nodes.application_agent as application_agent
+    import agent.nodes.classifier_agent as classifier_agent
+
+    router = FakeModel(args.router_latency_ms, args.jitter)
+    agent = FakeModel(args.agent_latency_ms, args.jitter)
+    classifier_agent.llm_router = router.runnable(_route)
+    application_agent.llm_with_tools = agent.runnable(_act)
+    application_agent.llm_extractor = agent.runnable(_extract)
+    history.llm = agent.runnable(lambda messages: AIMessage(content="summary"))
+
+    if not args.fast_path:
+        classifier_agent.fast_classifier.enabled = False
+    if not args.cache:
+        classifier_agent.classifier_cache = None
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Records the wall time of every graph node run."""
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self.started: Dict[UUID, tuple] = {}
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+
+    def on_chain_start(
+        self, serialized, inputs, *, run_id, parent_run_id=None, name=None, **kwargs
+    ):
+        # Node runnables nest a same-named RunnableLambda; time the outer run only
+        parent = self.started.get(parent_run_id)
+        if name in NODES and (parent is None or parent[0] != name):
+            self.started[run_id] = (name, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if (entry := self.started.pop(run_id, None)) is not None:
+            self.durations[entry[0]].append(time.perf_counter() - entry[1])
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self.started.pop(run_id, None)
+
+
+def _inputs(message: str) -> dict:
+    return {
+        "messages": [{"role": "user", "content": message}],
+        "classification_decision": None,
+        "email_input": None,
+    }
+
+
+async def run_concurrency(graph, runs: int, concurrency: int) -> Dict[str, Any]:
+    timer = NodeTimer()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def session(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await graph.ainvoke(
+                _inputs(MESSAGES[i % len(MESSAGES)]), {"callbacks": [timer]}
+            )
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(i) for i in range(runs)))
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "runs": runs,
+        "runs_per_second": round(runs / elapsed, 2),
+        "end_to_end": latency_summary(latencies),
+        "nodes": {name: latency_summary(d) for name, d in sorted(timer.durations.items())},
+    }
+
+
+async def measure_memory(graph, runs: int) -> Dict[str, float]:
+    peaks = []
+    for i in range(runs):
+        tracemalloc.start()
+        await graph.ainvoke(_inputs(MESSAGES[i % len(MESSAGES)]))
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {
+        "runs": runs,
+        "peak_kib_mean": round(sum(peaks) / len(peaks) / 1024, 1),
+        "peak_kib_max": round(max(peaks) / 1024, 1),
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return None
+
+
+async def main(args: argparse.Namespace) -> None:
+    install_fakes(args)
+    from agent.graph import graph
+
+    # Nodes print their routing decisions; keep them out of the report
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(
+        open(os.devnull, "w")
+    )
+    with quiet:
+        results = await run_all(graph, args)
+    write_results(results, args.json)
+
+
+async def run_all(graph, args: argparse.Namespace) -> Dict[str, Any]:
+    # Warm up imports, lazy models and the fast classifier
+    await graph.ainvoke(_inputs(MESSAGES[0]))
+    return {
+        "revision": _git_revision(),
+        "settings": {
+            "router_latency_ms": args.router_latency_ms,
+            "agent_latency_ms": args.agent_latency_ms,
+            "jitter": args.jitter,
+            "mode": args.mode,
+            "fast_path": args.fast_path,
+            "cache": args.cache,
+        },
+        "concurrency": [
+            await run_concurrency(graph, args.runs, int(c))
+            for c in args.concurrency.split(",")
+        ],
+        "memory": await measure_memory(graph, min(args.runs, 50)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated levels")
+    parser.add_argument("--router-latency-ms", type=float, default=300.0)
+    parser.add_argument("--agent-latency-ms", type=float, default=600.0)
+    parser.add_argument("--jitter", type=float, default=0.2, help="Relative latency jitter")
+    parser.add_argument(
+        "--mode", choices=["tools", "extract"], default="tools",
+        help="APPLICATION_AGENT_MODE to benchmark",
+    )
+    parser.add_argument("--no-fast-path", dest="fast_path", action="store_false")
+    parser.add_argument("--no-cache", dest="cache", action="store_false")
+    parser.add_argument("--verbose", action="store_true", help="Show node output")
+    parser.add_argument("--json", help="Also write the results to this file")
+    asyncio.run(main(parser.parse_args()))
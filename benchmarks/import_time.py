@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the agent and backend entry points.
+
+Imports each target in fresh interpreters with `python -X importtime` and
+reports wall time, the target's cumulative import time and the top-level
+packages whose modules take the most (self) time to import. Save results
+with --json and diff them between commits to catch startup regressions.
+
+    python -m benchmarks.import_time --repeat 5 --json import_time.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from benchmarks._common import write_results
+
+DEFAULT_TARGETS = ["agent.graph", "backend.main"]
+
+# Imports that should stay off the startup path
+WATCHED = ["openai", "langchain_openai", "langchain.chat_models"]
+
+_LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _parse(stderr: str) -> List[Tuple[int, int, int, str]]:
+    """(self µs, cumulative µs, depth, module) for each importtime line."""
+    rows = []
+    for line in stderr.splitlines():
+        if match := _LINE_RE.match(line):
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    return rows
+
+
+def run_once(target: str) -> Dict[str, Any]:
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{proc.stderr[-2000:]}")
+
+    rows = _parse(proc.stderr)
+    by_package: Dict[str, int] = defaultdict(int)
+    for self_us, _, _, name in rows:
+        by_package[name.split(".")[0]] += self_us
+    modules = {name for *_, name in rows}
+    return {
+        "wall_ms": wall * 1000,
+        "import_ms": next(
+            (c / 1000 for _, c, depth, name in rows if depth == 0 and name == target), 0.0
+        ),
+        "modules": len(rows),
+        "packages_ms": {name: us / 1000 for name, us in by_package.items()},
+        "watched": {name: name in modules for name in WATCHED},
+    }
+
+
+def bench_target(target: str, repeat: int, top: int) -> Dict[str, Any]:
+    runs = [run_once(target) for _ in range(repeat)]
+    best = min(runs, key=lambda r: r["import_ms"])
+    slowest = sorted(best["packages_ms"].items(), key=lambda kv: kv[1], reverse=True)
+    return {
+        "target": target,
+        "repeat": repeat,
+        "wall_ms_median": round(statistics.median(r["wall_ms"] for r in runs), 1),
+        "import_ms_median": round(statistics.median(r["import_ms"] for r in runs), 1),
+        "import_ms_min": round(best["import_ms"], 1),
+        "modules": best["modules"],
+        "slowest_packages_ms": {name: round(ms, 1) for name, ms in slowest[:top]},
+        "watched_imported": best["watched"],
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    results = {
+        "python": sys.version.split()[0],
+        "targets": [bench_target(t, args.repeat, args.top) for t in args.targets],
+    }
+    write_results(results, args.json)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest packages to list")
+    parser.add_argument("--json", help="Also write the results to this file")
+    main(parser.parse_args())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Load test of the LLM scheduler against a local fake OpenAI server.
+
+Starts an OpenAI-compatible `/v1/chat/completions` endpoint in-process. Its
+latency grows once more than `--capacity` requests are in flight, and it
+answers 429 above `--rpm` requests per minute or twice its capacity. Then
+mixed interactive and batch calls are fired through `get_chat_model`, once
+with the scheduler and once with plain OpenAI clients (SDK retries only).
+Reports latency per priority, client-visible failures, 429s served and the
+scheduler's counters.
+
+    python -m benchmarks.llm_scheduler --interactive 50 --batch 200 --rpm 600 --json sched.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List
+
+from benchmarks._common import latency_summary, write_results
+
+
+class FakeOpenAI:
+    """Minimal chat completions server with capacity and rate limits."""
+
+    def __init__(self, latency_ms: float, capacity: int, rpm: float):
+        self.latency = latency_ms / 1000
+        self.capacity = capacity
+        self.rpm = rpm
+        self.in_flight = 0
+        self.served = 0
+        self.rejected = 0
+        self._recent: deque = deque()
+
+    def reset(self) -> None:
+        self.served = self.rejected = 0
+        self._recent.clear()
+
+    def _rate_limited(self) -> bool:
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] > 60:
+            self._recent.popleft()
+        if self.rpm and len(self._recent) >= self.rpm:
+            return True
+        self._recent.append(now)
+        return self.in_flight >= 2 * self.capacity
+
+    def app(self):
+        from starlette.applications import Starlette
+        from starlette.requests import Request
+        from starlette.responses import JSONResponse
+        from starlette.routing import Route
+
+        async def completions(request: Request):
+            body = await request.json()
+            if self._rate_limited():
+                self.rejected += 1
+                return JSONResponse(
+                    {"error": {"message": "Rate limit reached", "type": "requests"}},
+                    status_code=429,
+                    headers={"retry-after-ms": "200"},
+                )
+            self.in_flight += 1
+            try:
+                overload = max(1.0, self.in_flight / self.capacity)
+                await asyncio.sleep(self.latency * overload)
+            finally:
+                self.in_flight -= 1
+            self.served += 1
+            return JSONResponse(
+                {
+                    "id": f"chatcmpl-{self.served}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "gpt-4.1"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "ok"},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {"prompt_tokens": 20, "completion_tokens": 1, "total_tokens": 21},
+                }
+            )
+
+        return Starlette(routes=[Route("/v1/chat/completions", completions, methods=["POST"])])
+
+
+def serve(fake: FakeOpenAI) -> str:
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(fake.app(), host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}/v1"
+
+
+async def run_case(name: str, model, fake: FakeOpenAI, args) -> Dict[str, Any]:
+    from agent.llm_scheduler import Priority, llm_priority
+
+    latencies: Dict[str, List[float]] = {"interactive": [], "batch": []}
+    failures = {"interactive": 0, "batch": 0}
+
+    async def call(kind: str, priority: Priority, i: int) -> None:
+        start = time.perf_counter()
+        try:
+            with llm_priority(priority):
+                await model.ainvoke(f"{kind} message {i}")
+        except Exception:
+            failures[kind] += 1
+        else:
+            latencies[kind].append(time.perf_counter() - start)
+
+    async def interactive() -> None:
+        # Chat traffic trickles in while the batch floods the queue
+        for i in range(args.interactive):
+            await asyncio.sleep(args.interactive_gap_ms / 1000)
+            asyncio.ensure_future(call("interactive", Priority.INTERACTIVE, i))
+
+    fake.reset()
+    start = time.perf_counter()
+    batch = [call("batch", Priority.BATCH, i) for i in range(args.batch)]
+    await asyncio.gather(interactive(), *batch)
+    while sum(len(v) for v in latencies.values()) + sum(failures.values()) < (
+        args.interactive + args.batch
+    ):
+        await asyncio.sleep(0.05)
+    return {
+        "name": name,
+        "elapsed_s": round(time.perf_counter() - start, 2),
+        "failures": failures,
+        "served": fake.served,
+        "rejected_429": fake.rejected,
+        "interactive": latency_summary(latencies["interactive"]),
+        "batch": latency_summary(latencies["batch"]),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    import os
+
+    fake = FakeOpenAI(args.latency_ms, args.capacity, args.rpm)
+    os.environ["OPENAI_BASE_URL"] = serve(fake)
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+    os.environ.setdefault("LLM_RPM_LIMIT", str(args.rpm))
+
+    from langchain_openai import ChatOpenAI
+
+    import agent.llm_scheduler as llm_scheduler
+    from agent.models import get_chat_model
+
+    llm_scheduler.llm_scheduler = llm_scheduler.build_llm_scheduler()
+    scheduled = get_chat_model()
+    plain = ChatOpenAI(model="gpt-4.1", temperature=0.0)
+
+    results = {
+        "settings": vars(args),
+        "cases": [
+            await run_case("scheduler", scheduled, fake, args),
+            await run_case("direct", plain, fake, args),
+        ],
+        "scheduler": llm_scheduler.llm_scheduler.snapshot(),
+    }
+    write_results(results, args.json)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--interactive", type=int, default=50)
+    parser.add_argument("--interactive-gap-ms", type=float, default=50.0)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--capacity", type=int, default=16, help="Requests in flight before slowing")
+    parser.add_argument("--rpm", type=float, default=3000, help="Fake server requests per minute")
+    parser.add_argument("--json", help="Also write the results to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Load test of the API's Mongo-backed reads as uvicorn workers are added.
+
+Seeds `--users` users into a scratch database, then for each worker count in
+`--workers` starts `uvicorn backend.main:app --workers N`. Each worker opens
+its own Mongo client and pool in `lifespan`. Load processes then drive
+`GET /users/{id}` with session tokens for random users for `--duration`
+seconds, after a short warm-up. The user cache is disabled in the server, so
+every request is one Mongo `find`. Reports throughput, latency and errors
+per worker count, and the speedup over the first.
+
+Pool settings are taken from the environment as in production (e.g.
+`MONGO_MAX_POOL_SIZE=50 MONGO_COMPRESSORS=zstd`). The scratch database (in
+the configured MONGO_URI, default name `job_tracker_bench`) is dropped
+before and after the run. Give the load generator enough processes that it
+is not the bottleneck; `--load-processes` defaults to the CPU count.
+
+    python -m benchmarks.mongo_workers --workers 1,2,4,8 --duration 15 --json workers.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+import httpx
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from backend.db.db import mongo_settings
+from backend.sessions import issue_session_token
+from benchmarks._common import latency_summary, write_results
+
+POOL_SETTINGS = (
+    "MONGO_MAX_POOL_SIZE",
+    "MONGO_MIN_POOL_SIZE",
+    "MONGO_MAX_IDLE_TIME_MS",
+    "MONGO_COMPRESSORS",
+    "MONGO_READ_PREFERENCE",
+)
+
+
+async def seed(database: str, count: int) -> List[str]:
+    uri, _ = mongo_settings()
+    client = AsyncIOMotorClient(uri)
+    await client.drop_database(database)
+    users = [
+        {
+            "_id": ObjectId(),
+            "name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "provider": "google",
+            "provider_id": str(10**12 + i),
+        }
+        for i in range(count)
+    ]
+    for start in range(0, count, 10_000):
+        await client[database].users.insert_many(users[start : start + 10_000], ordered=False)
+    client.close()
+    return [str(user["_id"]) for user in users]
+
+
+async def drop(database: str) -> None:
+    uri, _ = mongo_settings()
+    client = AsyncIOMotorClient(uri)
+    await client.drop_database(database)
+    client.close()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int, database: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "MONGODB_DATABASE": database,
+        "USER_CACHE_ENABLED": "0",
+    }
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "backend.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=env,
+    )
+
+
+def wait_ready(base_url: str, server: subprocess.Popen, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Server exited with status {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/users", timeout=1.0).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit("Server did not start in time")
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.terminate()
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+async def _drive(
+    base_url: str, sessions: List[Tuple[str, str]], concurrency: int, seconds: float
+) -> Tuple[List[float], int]:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.monotonic() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+
+        async def loop() -> None:
+            nonlocal errors
+            while time.monotonic() < deadline:
+                user_id, token = random.choice(sessions)
+                start = time.perf_counter()
+                try:
+                    response = await client.get(
+                        f"/users/{user_id}", headers={"Authorization": f"Bearer {token}"}
+                    )
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def _load_process(args: Tuple[str, List[Tuple[str, str]], int, float]) -> Tuple[List[float], int]:
+    return asyncio.run(_drive(*args))
+
+
+def run_load(
+    pool: Any,
+    base_url: str,
+    sessions: List[Tuple[str, str]],
+    processes: int,
+    concurrency: int,
+    seconds: float,
+) -> Dict[str, Any]:
+    per_process = max(1, concurrency // processes)
+    results = pool.map(
+        _load_process, [(base_url, sessions, per_process, seconds)] * processes
+    )
+    latencies = [value for sample, _ in results for value in sample]
+    errors = sum(count for _, count in results)
+    return {
+        "requests_per_second": round(len(latencies) / seconds, 1),
+        "errors": errors,
+        "latency": latency_summary(latencies),
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    user_ids = asyncio.run(seed(args.database, args.users))
+    # The server derives the same signing key from the inherited environment
+    sessions = [(user_id, issue_session_token(user_id, ttl_seconds=3600)) for user_id in user_ids]
+
+    runs = []
+    with multiprocessing.get_context("spawn").Pool(args.load_processes) as pool:
+        for workers in args.workers:
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            server = start_server(workers, port, args.database)
+            try:
+                wait_ready(base_url, server)
+                # Lets every worker open its pool before measuring
+                run_load(pool, base_url, sessions, args.load_processes, args.concurrency, args.warmup)
+                result = run_load(
+                    pool, base_url, sessions, args.load_processes, args.concurrency, args.duration
+                )
+            finally:
+                stop_server(server)
+            runs.append({"workers": workers, **result})
+
+    asyncio.run(drop(args.database))
+    baseline = runs[0]["requests_per_second"] or 1.0
+    for run in runs:
+        run["speedup"] = round(run["requests_per_second"] / baseline, 2)
+    write_results(
+        {
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "load_processes": args.load_processes,
+            "pool_settings": {name: os.environ[name] for name in POOL_SETTINGS if name in os.environ},
+            "runs": runs,
+        },
+        args.json,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--workers",
+        type=lambda value: [int(v) for v in value.split(",")],
+        default=[1, 2, 4],
+        help="uvicorn worker counts to compare (comma-separated)",
+    )
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds measured per run")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds per run")
+    parser.add_argument(
+        "--concurrency", type=int, default=128, help="Requests in flight across all load processes"
+    )
+    parser.add_argument("--load-processes", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--database", default="job_tracker_bench")
+    parser.add_argument("--json", help="Also write the results to this file")
+    main(parser.parse_args())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+CPU cost of rendering user pages: FastAPI response_model vs DocumentRenderer.
+
+For each page size, renders the same user documents three ways and reports
+CPU time per request (`time.process_time`) and the response size:
+- response_model: what `list_users` did before, `UserCollection` built from
+  the raw documents, then FastAPI's `serialize_response` and `JSONResponse`
+- type_adapter: `DocumentRenderer` with validation (cached `TypeAdapter`,
+  pydantic-core `dump_json`)
+- trusted: `DocumentRenderer` without validation (field picking + orjson)
+
+Every case's output is checked to decode to the same JSON. No database
+needed; the documents are generated in memory.
+
+    python -m benchmarks.serialization --sizes 10,1000,100000 --json serialization.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from backend.models.users import UserCollection, UserModel
+from backend.serialization import DocumentRenderer
+from benchmarks._common import write_results
+
+
+def make_users(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "provider": "google",
+            "provider_id": str(10**12 + i),
+        }
+        for i in range(count)
+    ]
+
+
+def response_model_path() -> Callable[[List[dict]], Awaitable[bytes]]:
+    field = create_model_field("Response_list_users", UserCollection, mode="serialization")
+
+    async def render(docs: List[dict]) -> bytes:
+        content = await serialize_response(
+            field=field,
+            response_content=UserCollection(users=docs, next_after=None),
+            by_alias=False,
+            is_coroutine=True,
+        )
+        return JSONResponse(content).body
+
+    return render
+
+
+def renderer_path(validate: bool) -> Callable[[List[dict]], Awaitable[bytes]]:
+    renderer = DocumentRenderer(UserModel, validate=validate)
+
+    async def render(docs: List[dict]) -> bytes:
+        return renderer.render_many(docs, "users", next_after=None)
+
+    return render
+
+
+async def measure(render, docs: List[dict], min_seconds: float) -> Dict[str, Any]:
+    body = await render(docs)
+    runs, start = 0, time.process_time()
+    while runs == 0 or time.process_time() - start < min_seconds:
+        await render(docs)
+        runs += 1
+    cpu = (time.process_time() - start) / runs
+    return {"cpu_ms_per_request": round(cpu * 1000, 3), "runs": runs, "bytes": len(body), "body": body}
+
+
+async def main(args: argparse.Namespace) -> None:
+    cases = {
+        "response_model": response_model_path(),
+        "type_adapter": renderer_path(validate=True),
+        "trusted": renderer_path(validate=False),
+    }
+    sizes = []
+    for size in args.sizes:
+        docs = make_users(size)
+        results = {
+            name: await measure(render, docs, args.min_seconds)
+            for name, render in cases.items()
+        }
+        expected = json.loads(results["response_model"]["body"])
+        for name, result in results.items():
+            if json.loads(result.pop("body")) != expected:
+                raise SystemExit(f"{name} output differs from response_model at {size} users")
+        baseline = results["response_model"]["cpu_ms_per_request"]
+        for result in results.values():
+            result["speedup"] = round(baseline / result["cpu_ms_per_request"], 1)
+        sizes.append({"users": size, "cases": results})
+    write_results({"sizes": sizes}, args.json)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(v) for v in value.split(",")],
+        default=[10, 1_000, 100_000],
+        help="Users per response (comma-separated)",
+    )
+    parser.add_argument(
+        "--min-seconds", type=float, default=1.0, help="CPU time to spend per case and size"
+    )
+    parser.add_argument("--json", help="Also write the results to this file")
+    asyncio.run(main(parser.parse_args()))
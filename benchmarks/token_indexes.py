@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Explain-plan check of the hot token queries as revoked tokens pile up.
+
+Builds a scratch tokens collection with `init_token_indexes`, gives every
+user one active token, and adds revoked tokens (rotations) in steps up to
+the largest of `--sizes`. At each step it explains the queries behind
+`get_active_token` / `save_or_rotate_token` and `delete_tokens_for_user`
+and checks they:
+- never scan the collection,
+- use the expected partial index,
+- examine no more index keys or documents than they return, whatever
+  the number of revoked tokens.
+
+The scratch collection lives in the configured database (MONGO_URI,
+MONGODB_DATABASE or MONGO_DB) and is dropped before and after the run. Exits
+with status 1 if a check fails.
+
+    python -m benchmarks.token_indexes --users 10000 --sizes 0,100000,1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+
+from backend.db.db import (
+    ACTIVE_TOKEN_FILTER,
+    REVOKED_TOKEN_FILTER,
+    init_token_indexes,
+    mongo_settings,
+)
+from benchmarks._common import write_results
+
+
+def _token(user_id: ObjectId, revoked_at) -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "user_id": user_id,
+        "provider": "google",
+        "scopes": ["openid"],
+        "refresh_token_enc": "x" * 200,
+        "created_at": now,
+        "updated_at": now,
+        "last_refresh_at": None,
+        "revoked_at": revoked_at,
+        "session_id": None,
+        "device_info": None,
+    }
+
+
+async def add_revoked(collection: AsyncIOMotorCollection, users: List[ObjectId], count: int) -> None:
+    # Recently revoked, so the TTL monitor leaves them alone during the run
+    revoked_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+    batch: List[dict] = []
+    for i in range(count):
+        batch.append(_token(users[i % len(users)], revoked_at))
+        if len(batch) == 10_000:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+
+
+def _stages(plan: dict) -> List[dict]:
+    stages = [plan]
+    for key in ("inputStage", "inputStages"):
+        children = plan.get(key)
+        for child in children if isinstance(children, list) else [children] if children else []:
+            stages.extend(_stages(child))
+    return stages
+
+
+async def explain(collection: AsyncIOMotorCollection, query: Dict[str, Any]) -> Dict[str, Any]:
+    result = await collection.database.command(
+        "explain",
+        {"find": collection.name, "filter": query},
+        verbosity="executionStats",
+    )
+    stages = _stages(result["queryPlanner"]["winningPlan"])
+    stats = result["executionStats"]
+    return {
+        "stages": [stage["stage"] for stage in stages],
+        "indexes": sorted({stage["indexName"] for stage in stages if "indexName" in stage}),
+        "returned": stats["nReturned"],
+        "keys_examined": stats["totalKeysExamined"],
+        "docs_examined": stats["totalDocsExamined"],
+    }
+
+
+def check(name: str, plan: Dict[str, Any], indexes: List[str]) -> List[str]:
+    failures = []
+    if "COLLSCAN" in plan["stages"]:
+        failures.append(f"{name}: collection scan")
+    if plan["indexes"] != sorted(indexes):
+        failures.append(f"{name}: used {plan['indexes']}, expected {sorted(indexes)}")
+    # A bounded overshoot of one key per index is the end-of-range probe
+    if plan["keys_examined"] > plan["returned"] + len(indexes):
+        failures.append(f"{name}: examined {plan['keys_examined']} keys")
+    if plan["docs_examined"] > plan["returned"]:
+        failures.append(f"{name}: examined {plan['docs_examined']} documents")
+    return failures
+
+
+async def main(args: argparse.Namespace) -> None:
+    uri, db_name = mongo_settings()
+    client = AsyncIOMotorClient(uri, tz_aware=True)
+    collection = client.get_database(db_name).get_collection("bench_token_indexes")
+    await collection.drop()
+    await init_token_indexes(collection)
+
+    users = [ObjectId() for _ in range(args.users)]
+    for start in range(0, len(users), 10_000):
+        await collection.insert_many(
+            [_token(u, None) for u in users[start : start + 10_000]], ordered=False
+        )
+
+    probe = users[len(users) // 2]
+    steps, failures, inserted = [], [], 0
+    for size in sorted(args.sizes):
+        await add_revoked(collection, users, size - inserted)
+        inserted = size
+        plans = {
+            "active_token": await explain(
+                collection,
+                {"user_id": probe, "provider": "google", **ACTIVE_TOKEN_FILTER},
+            ),
+            "delete_for_user": await explain(
+                collection,
+                {
+                    "$or": [
+                        {"user_id": probe, **ACTIVE_TOKEN_FILTER},
+                        {"user_id": probe, **REVOKED_TOKEN_FILTER},
+                    ]
+                },
+            ),
+        }
+        failures += check("active_token", plans["active_token"], ["active_user_provider_unique"])
+        failures += check(
+            "delete_for_user",
+            plans["delete_for_user"],
+            ["active_user_provider_unique", "revoked_user_idx"],
+        )
+        steps.append({"revoked_tokens": size, "plans": plans})
+
+    await collection.drop()
+    client.close()
+    write_results(
+        {"users": args.users, "steps": steps, "failures": failures, "ok": not failures},
+        args.json,
+    )
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(v) for v in value.split(",")],
+        default=[0, 100_000, 1_000_000],
+        help="Revoked tokens to check at (comma-separated)",
+    )
+    parser.add_argument("--json", help="Also write the results to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for save_or_rotate_token under concurrent logins.
+
+Compares the previous find + update_one + find_one implementation with the
+single find_one_and_update upsert, reporting Mongo round trips per call,
+latency percentiles and how many duplicate active tokens each one leaves
+behind. Uses scratch collections in the configured database (MONGO_URI,
+MONGODB_DATABASE or MONGO_DB), dropped before and after the run.
+
+    python -m benchmarks.token_rotation --users 200 --concurrency 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+
+import backend.db.tokens as tokens
+from backend.db.db import ACTIVE_TOKEN_FILTER, mongo_settings
+from benchmarks._common import CommandCounter, latency_summary, write_results
+
+
+async def legacy_save_or_rotate_token(
+    collection: AsyncIOMotorCollection, user_id: ObjectId, provider: str, scopes, enc
+) -> dict:
+    """The find, update_one, find_one version this benchmark replaces."""
+    now = datetime.now(timezone.utc)
+    existing = await collection.find_one(
+        {"user_id": user_id, "provider": provider, "revoked_at": None}
+    )
+    if existing is None:
+        doc = {
+            "user_id": user_id,
+            "provider": provider,
+            "scopes": scopes,
+            "refresh_token_enc": enc,
+            "created_at": now,
+            "updated_at": now,
+            "last_refresh_at": None,
+            "revoked_at": None,
+            "session_id": None,
+            "device_info": None,
+        }
+        doc["_id"] = (await collection.insert_one(doc)).inserted_id
+        return doc
+    await collection.update_one(
+        {"_id": existing["_id"]},
+        {"$set": {"updated_at": now, "scopes": scopes, "refresh_token_enc": enc}},
+    )
+    return await collection.find_one({"_id": existing["_id"]})
+
+
+async def atomic_save_or_rotate_token(
+    collection: AsyncIOMotorCollection, user_id: ObjectId, provider: str, scopes, enc
+) -> dict:
+    tokens.tokens_collection = collection
+    return await tokens.save_or_rotate_token(user_id, provider, scopes, enc)
+
+
+async def run_case(
+    name: str,
+    impl,
+    collection: AsyncIOMotorCollection,
+    counter: CommandCounter,
+    users: List[ObjectId],
+    concurrency: int,
+    rounds: int,
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+
+    async def login(user_id: ObjectId, i: int) -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            await impl(collection, user_id, "google", ["openid"], f"enc-{i}")
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+
+    counter.reset()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        # Every user logs in `concurrency` times at once
+        await asyncio.gather(
+            *(login(u, i) for u in users for i in range(concurrency))
+        )
+    elapsed = time.perf_counter() - start
+
+    calls = len(latencies)
+    duplicates = await collection.aggregate(
+        [
+            {"$match": {"revoked_at": None}},
+            {"$group": {"_id": "$user_id", "n": {"$sum": 1}}},
+            {"$match": {"n": {"$gt": 1}}},
+            {"$count": "users"},
+        ]
+    ).to_list(1)
+    return {
+        "name": name,
+        "calls": calls,
+        "errors": errors,
+        "round_trips_per_call": round(
+            (counter.total - counter.commands.get("aggregate", 0)) / calls, 3
+        ),
+        "calls_per_second": round(calls / elapsed, 1),
+        "users_with_duplicate_active_tokens": duplicates[0]["users"] if duplicates else 0,
+        "latency": latency_summary(latencies),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    counter = CommandCounter()
+    uri, db_name = mongo_settings()
+    client = AsyncIOMotorClient(uri, tz_aware=True, event_listeners=[counter])
+    db = client.get_database(db_name)
+    legacy = db.get_collection("bench_tokens_legacy")
+    atomic = db.get_collection("bench_tokens_atomic")
+    await legacy.drop()
+    await atomic.drop()
+    await legacy.create_index([("user_id", 1), ("provider", 1)])
+    await atomic.create_index(
+        [("user_id", 1), ("provider", 1)],
+        unique=True,
+        partialFilterExpression=ACTIVE_TOKEN_FILTER,
+    )
+
+    users = [ObjectId() for _ in range(args.users)]
+    results = {
+        "users": args.users,
+        "concurrency_per_user": args.concurrency,
+        "rounds": args.rounds,
+        "cases": [
+            await run_case(
+                "legacy", legacy_save_or_rotate_token, legacy, counter,
+                users, args.concurrency, args.rounds,
+            ),
+            await run_case(
+                "find_one_and_update", atomic_save_or_rotate_token, atomic, counter,
+                users, args.concurrency, args.rounds,
+            ),
+        ],
+    }
+    await legacy.drop()
+    await atomic.drop()
+    client.close()
+    write_results(results, args.json)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4, help="Simultaneous logins per user")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--json", help="Also write the results to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for conversations persisted across turns on one thread.
+"""
+
+import itertools
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.memory import MemorySaver
+
+import agent.history as history
+import agent.nodes.application_agent as application_agent
+import agent.nodes.classifier_agent as classifier_agent
+from agent.graph import build_graph
+from agent.schemas import RouterSchema
+
+
+def _assert_tool_calls_answered(messages) -> None:
+    """Every assistant tool call is followed by its tool result."""
+    for i, message in enumerate(messages):
+        for call in getattr(message, "tool_calls", None) or []:
+            answers = [
+                m for m in messages[i + 1 :]
+                if isinstance(m, ToolMessage) and m.tool_call_id == call["id"]
+            ]
+            assert answers, f"{call['name']} call {call['id']} has no tool result"
+
+
+def test_second_turn_replays_a_complete_history(monkeypatch):
+    call_ids = itertools.count()
+    prompts = []
+
+    def act(messages):
+        prompts.append(messages)
+        call_id = f"call_{next(call_ids)}"
+        if isinstance(messages[-1], ToolMessage):
+            return AIMessage(content="", tool_calls=[{"name": "Done", "args": {}, "id": call_id}])
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": "get_applications_by_user", "args": {}, "id": call_id}],
+        )
+
+    monkeypatch.setattr(application_agent, "llm_with_tools", RunnableLambda(act))
+    monkeypatch.setattr(
+        classifier_agent,
+        "llm_router",
+        RunnableLambda(lambda messages: RouterSchema(classification="application_tracking")),
+    )
+    monkeypatch.setattr(classifier_agent.fast_classifier, "enabled", False)
+    monkeypatch.setattr(classifier_agent, "classifier_cache", None)
+
+    graph = build_graph(MemorySaver())
+    config = {"configurable": {"thread_id": "u1:t1"}}
+    for text in ("Show my applications", "Show them again"):
+        graph.invoke(
+            {
+                "messages": [{"role": "user", "content": text}],
+                "classification_decision": None,
+                "email_input": None,
+            },
+            config,
+        )
+
+    # The first prompt of the second turn carries the whole first turn
+    second_turn = [p for p in prompts if p[-1].content == "Show them again"]
+    assert second_turn
+    history_sent = [m for m in second_turn[0] if not isinstance(m, dict)]
+    assert any(call["name"] == "Done" for m in history_sent for call in getattr(m, "tool_calls", []))
+    _assert_tool_calls_answered(history_sent)
+    _assert_tool_calls_answered(graph.get_state(config).values["messages"])
+
+
+def test_compact_history_drops_unanswered_tool_calls():
+    """Threads saved before `Done` got a tool result are repaired on the next turn."""
+    done = AIMessage(
+        id="ai-2",
+        content="",
+        tool_calls=[{"name": "Done", "args": {}, "id": "call_2"}],
+        additional_kwargs={"tool_calls": [{"id": "call_2", "type": "function"}]},
+    )
+    messages = [
+        HumanMessage(id="h-1", content="Show my applications"),
+        AIMessage(
+            id="ai-1",
+            content="",
+            tool_calls=[{"name": "get_applications_by_user", "args": {}, "id": "call_1"}],
+        ),
+        ToolMessage(id="t-1", content="[]", tool_call_id="call_1"),
+        done,
+        HumanMessage(id="h-2", content="Show them again"),
+    ]
+    update = history.compact_history({"messages": messages})
+    (repaired,) = update["messages"]
+    assert repaired.id == "ai-2"
+    assert repaired.tool_calls == []
+    assert "tool_calls" not in repaired.additional_kwargs
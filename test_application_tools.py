@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Tests for running the application agent's tool calls.
+"""
+
+import asyncio
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from agent.nodes.application_agent import atool_node, tool_node
+
+TOOL_CALLS = [
+    {"name": "search_jobs", "args": {"query": "backend"}, "id": "call_1"},
+    {"name": "Done", "args": {}, "id": "call_2"},
+]
+
+
+def _state() -> dict:
+    return {"messages": [AIMessage(content="", tool_calls=TOOL_CALLS)]}
+
+
+def _check(messages) -> None:
+    unknown, done = messages
+    assert isinstance(unknown, ToolMessage)
+    assert unknown.tool_call_id == "call_1"
+    assert unknown.status == "error"
+    assert unknown.content == "Unknown tool search_jobs"
+    # The other calls of the turn still run
+    assert done["tool_call_id"] == "call_2"
+    assert done["content"]["status"] == "done"
+
+
+def test_unknown_tool_is_a_tool_error():
+    _check(tool_node(_state(), {})["messages"])
+
+
+def test_unknown_tool_is_a_tool_error_async():
+    _check(asyncio.run(atool_node(_state(), {}))["messages"])
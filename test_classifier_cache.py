@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for the router cache key: company names are masked, intent is kept.
+"""
+
+import pytest
+
+from agent.classifier_cache import InMemoryClassificationCache, normalize_message
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("Can I get help with my Resume?", "Can I get help with my Cover Letter?"),
+        ("What is LeetCode", "How do I use LinkedIn"),
+        ("What is LeetCode", "What is Glassdoor"),
+        ("Help me prepare for my Interview", "Help me prepare for my Offer"),
+        ("I have an interview with a recruiter", "I have an interview with the CTO"),
+    ],
+)
+def test_different_intents_do_not_collide(first, second):
+    assert normalize_message(first) != normalize_message(second)
+
+
+def test_capitalized_words_outside_a_company_slot_are_kept():
+    assert normalize_message("Can I get help with my Resume?") == "can i get help with my resume"
+    assert normalize_message("How do I use LinkedIn") == "how do i use linkedin"
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("I applied to Google today", "I applied to Jane Street today"),
+        ("applied at stripe yesterday", "Applied at Datadog yesterday"),
+        ("Got an offer from Stripe!", "got an offer from Jane Street"),
+        ("Update my Google application status", "update my jane street application status"),
+        ("I'm interviewing with Meta next week", "I'm interviewing with Two Sigma next week"),
+    ],
+)
+def test_same_request_for_different_companies_shares_a_key(first, second):
+    assert normalize_message(first) == normalize_message(second)
+    assert "<company>" in normalize_message(first)
+
+
+def test_cached_route_is_not_served_for_another_intent():
+    cache = InMemoryClassificationCache()
+    cache.set("Can I get help with my Resume?", "resume_assistant")
+    assert cache.get("Can I get help with my Interview?") is None
+    assert cache.get("can i get help with my resume") == "resume_assistant"
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Regression tests for the router's local fast path.
+"""
+
+import pytest
+
+from agent.fast_classifier import FastClassifier, _SEED_EXAMPLES, derive_threshold
+
+classifier = FastClassifier()
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "I sent my resume to Stripe yesterday via LinkedIn",
+        "Applied to Stripe through a referral, attached my resume",
+    ],
+)
+def test_application_with_resume_mention_is_not_resume_help(message):
+    """Mentioning a resume does not outweigh application phrasing."""
+    decision = classifier.classify(message)
+    assert decision is not None
+    assert decision.classification == "application_tracking"
+
+
+@pytest.mark.parametrize(
+    "message, label",
+    [
+        ("I need help updating my resume", "resume_assistant"),
+        ("Review my cover letter", "resume_assistant"),
+        ("I applied to Google for a software engineer role today via LinkedIn", "application_tracking"),
+        ("Update my Google application status to interviewing", "application_tracking"),
+        ("How do I prepare for a technical interview?", "interview_prep"),
+        ("Can you help me schedule a follow-up call?", "calendar"),
+    ],
+)
+def test_clear_messages(message, label):
+    decision = classifier.classify(message)
+    assert decision is not None
+    assert decision.classification == label
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "hmm",
+        "Tell me about Stripe",
+        "Should I apply to Stripe or Datadog?",
+        "I have an interview at Google, can you put it on my calendar?",
+        # A resume mention without application phrasing the rules know
+        "Emailed my CV to Datadog for the SRE position",
+    ],
+)
+def test_ambiguous_messages_fall_back_to_llm(message):
+    assert classifier.classify(message) is None
+
+
+def test_threshold_is_derived_from_held_out_data():
+    assert classifier.model is not None
+    assert classifier.threshold == derive_threshold(_SEED_EXAMPLES, 0.97)
+    # Asking for more precision never lowers the threshold
+    assert derive_threshold(_SEED_EXAMPLES, 1.0) >= classifier.threshold
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the adaptive concurrency limit of the LLM scheduler.
+"""
+
+import asyncio
+import json
+
+import httpx
+
+from agent.llm_scheduler import LLMScheduler, ScheduledAsyncTransport
+
+
+def _run(
+    scheduler: LLMScheduler, handler, calls: int, concurrency: int, model=lambda i: "gpt-4.1"
+) -> None:
+    async def main():
+        transport = ScheduledAsyncTransport(scheduler, httpx.MockTransport(handler))
+        async with httpx.AsyncClient(transport=transport, base_url="http://llm") as client:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def call(i: int):
+                async with semaphore:
+                    await client.post("/v1/chat/completions", json={"i": i, "model": model(i)})
+
+            await asyncio.gather(*(call(i) for i in range(calls)))
+
+    asyncio.run(main())
+
+
+def test_mixed_latency_does_not_shrink_limit():
+    """Short classifier calls next to long generations are not overload."""
+    scheduler = LLMScheduler(max_concurrency=32, max_retries=0)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        i = json.loads(request.read())["i"]
+        # Every fourth call generates for 20x longer than the others
+        await asyncio.sleep(0.04 if i % 4 == 0 else 0.002)
+        return httpx.Response(200, json={"choices": []})
+
+    _run(scheduler, handler, calls=200, concurrency=16)
+    assert scheduler.limit == 32
+    assert scheduler.stats["latency_backoffs"] == 0
+    assert scheduler.in_flight == 0
+
+
+def test_models_with_different_latency_do_not_shrink_limit():
+    """A fast classifier model is not the baseline of a slow generation model."""
+    scheduler = LLMScheduler(max_concurrency=32, max_retries=0)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        model = json.loads(request.read())["model"]
+        await asyncio.sleep(0.002 if model == "gpt-4.1-nano" else 0.04)
+        return httpx.Response(200, json={"choices": []})
+
+    _run(
+        scheduler,
+        handler,
+        calls=200,
+        concurrency=16,
+        model=lambda i: "gpt-4.1" if i % 2 else "gpt-4.1-nano",
+    )
+    assert scheduler.limit == 32
+    assert scheduler.stats["latency_backoffs"] == 0
+
+
+def test_latency_rise_on_one_model_shrinks_limit():
+    scheduler = LLMScheduler(max_concurrency=32, max_retries=0)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.read())
+        if body["model"] == "gpt-4.1-nano":
+            await asyncio.sleep(0.002)
+        else:
+            # The generation model slows down eightfold halfway through
+            await asyncio.sleep(0.005 if body["i"] < 200 else 0.04)
+        return httpx.Response(200, json={"choices": []})
+
+    _run(
+        scheduler,
+        handler,
+        calls=400,
+        concurrency=8,
+        model=lambda i: "gpt-4.1" if i % 2 else "gpt-4.1-nano",
+    )
+    assert scheduler.stats["latency_backoffs"] >= 1
+    assert scheduler.limit < 32
+    assert scheduler.in_flight == 0
+
+
+def test_burst_of_429s_halves_limit_once():
+    scheduler = LLMScheduler(max_concurrency=32, max_retries=0)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.01)
+        return httpx.Response(429, headers={"retry-after": "0"})
+
+    # All 16 requests are in flight together: one overload signal
+    _run(scheduler, handler, calls=16, concurrency=16)
+    assert scheduler.limit == 16
+    assert scheduler.stats["rate_limited"] == 16
+
+
+def test_server_errors_shrink_limit():
+    scheduler = LLMScheduler(max_concurrency=32, min_concurrency=2, max_retries=0)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503)
+
+    # One at a time: each failure is a new signal
+    _run(scheduler, handler, calls=10, concurrency=1)
+    assert scheduler.limit == 2
+    assert scheduler.stats["server_errors"] == 10
@@ -1,11 +1,23 @@
 #!/usr/bin/env python3
 """
 Test script for the custom supervisor implementation with tool calling.
+
+Calls OpenAI and MongoDB, so under pytest it only runs with
+RUN_INTEGRATION_TESTS=1 and real credentials in the environment.
 """
 
+import os
+
+import pytest
+
 from agent.graph import graph
 from agent.state import State
 
+pytestmark = pytest.mark.skipif(
+    os.getenv("RUN_INTEGRATION_TESTS", "").strip().lower() not in ("1", "true", "yes", "on"),
+    reason="integration test; set RUN_INTEGRATION_TESTS=1 with real credentials",
+)
+
 
 def test_supervisor():
     """Test the supervisor with different types of messages."""
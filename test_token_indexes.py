@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Explain-plan checks of the hot token queries against a real MongoDB.
+
+Builds a scratch collection with `init_token_indexes`, one active token per
+user and many more revoked ones, then checks that the active-token lookup
+and the per-user delete use the partial indexes without scanning revoked
+tokens. Skipped unless MONGO_URI is set.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("MONGO_URI"), reason="MONGO_URI is not set"
+)
+
+USERS = 200
+REVOKED = 5_000
+
+
+async def _explain_token_queries() -> dict:
+    from bson import ObjectId
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from backend.db.db import (
+        ACTIVE_TOKEN_FILTER,
+        REVOKED_TOKEN_FILTER,
+        init_token_indexes,
+        mongo_settings,
+    )
+    from benchmarks.token_indexes import _token, add_revoked, explain
+
+    uri, db_name = mongo_settings()
+    client = AsyncIOMotorClient(uri, tz_aware=True, serverSelectionTimeoutMS=5000)
+    collection = client.get_database(db_name).get_collection("test_token_indexes")
+    try:
+        await collection.drop()
+        await init_token_indexes(collection)
+        users = [ObjectId() for _ in range(USERS)]
+        await collection.insert_many([_token(u, None) for u in users])
+        await add_revoked(collection, users, REVOKED)
+
+        probe = users[USERS // 2]
+        return {
+            "indexes": await collection.index_information(),
+            "active_token": await explain(
+                collection,
+                {"user_id": probe, "provider": "google", **ACTIVE_TOKEN_FILTER},
+            ),
+            "delete_for_user": await explain(
+                collection,
+                {
+                    "$or": [
+                        {"user_id": probe, **ACTIVE_TOKEN_FILTER},
+                        {"user_id": probe, **REVOKED_TOKEN_FILTER},
+                    ]
+                },
+            ),
+        }
+    finally:
+        await collection.drop()
+        client.close()
+
+
+@pytest.fixture(scope="module")
+def plans() -> dict:
+    return asyncio.run(_explain_token_queries())
+
+
+def test_partial_and_ttl_indexes_exist(plans):
+    from backend.db.db import REVOKED_TOKEN_FILTER, TOKEN_REVOKED_RETENTION_SECONDS
+
+    indexes = plans["indexes"]
+    assert "active_user_provider_unique" in indexes
+    assert "revoked_user_idx" in indexes
+    ttl = indexes["revoked_at_ttl"]
+    assert ttl["expireAfterSeconds"] == TOKEN_REVOKED_RETENTION_SECONDS
+    assert ttl["partialFilterExpression"] == REVOKED_TOKEN_FILTER
+    # The full-collection indexes they replaced are gone
+    assert "user_provider_idx" not in indexes
+    assert "revoked_idx" not in indexes
+
+
+def test_active_token_lookup_uses_partial_index(plans):
+    from benchmarks.token_indexes import check
+
+    plan = plans["active_token"]
+    assert "COLLSCAN" not in plan["stages"]
+    assert plan["returned"] == 1
+    assert check("active_token", plan, ["active_user_provider_unique"]) == []
+
+
+def test_delete_for_user_uses_both_partial_indexes(plans):
+    from benchmarks.token_indexes import check
+
+    plan = plans["delete_for_user"]
+    assert "COLLSCAN" not in plan["stages"]
+    assert check(
+        "delete_for_user", plan, ["active_user_provider_unique", "revoked_user_idx"]
+    ) == []